@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# Must be set before pygame is initialized
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# Keep stdout clean for the JSON results
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from graph import Graph
+from dijkstra import DijkstraAlgorithm
+from generators import grid_graph, random_graph, scale_free_graph, road_graph
+from main import DijkstraVisualization
+
+# Graph families: name -> function building a graph with about node_count nodes
+FAMILIES = {
+    'grid': lambda node_count, seed: grid_graph(max(2, round(node_count ** 0.5)),
+                                                max(2, round(node_count ** 0.5)), seed=seed),
+    'sparse': lambda node_count, seed: random_graph(node_count, 4, seed=seed),
+    'dense': lambda node_count, seed: random_graph(node_count, max(4, node_count // 10), seed=seed),
+    'scale_free': lambda node_count, seed: scale_free_graph(node_count, 2, seed=seed),
+    'road': lambda node_count, seed: road_graph(node_count, 3, seed=seed)
+}
+
+DEFAULT_SIZES = [100, 1000, 10000]
+
+# Dense graphs grow quadratically, so the larger sizes are skipped by default
+DENSE_MAX_NODES = 1000
+
+# Drawing creates a font for every node and edge, which is too slow for big graphs
+RENDER_MAX_NODES = 500
+
+# Area of the window where the graph is drawn
+GRAPH_RECT = pygame.Rect(0, 0, 800, 600)
+
+# Metrics compared against a baseline; lower is better for all of them
+COMPARED_METRICS = ['build_s', 'run_s', 'advance_us', 'step_us', 'draw_s', 'frame_s',
+                    'build_peak_bytes', 'run_peak_bytes']
+
+
+def graph_data(graph):
+    """Nodes, positions and edges of a graph, to rebuild it in a timed loop"""
+    edges = [(start, end, weight) for start in graph.get_nodes() for end, weight in graph.get_neighbors(start)]
+    return graph.get_nodes(), dict(graph.node_positions), edges
+
+
+def build_graph(nodes, positions, edges):
+    """Build a Graph through its public methods"""
+    graph = Graph()
+    for node in nodes:
+        graph.add_node(node, positions.get(node))
+    for start, end, weight in edges:
+        graph.add_edge(start, end, weight)
+    return graph
+
+
+def place_randomly(graph, rect, seed=0):
+    """Give nodes without a position a random one inside rect
+
+    The benchmark measures drawing, not the force-directed layout, so a cheap
+    deterministic placement is enough.
+    """
+    rng = random.Random(seed)
+    for node in graph.get_nodes():
+        if node not in graph.node_positions:
+            graph.node_positions[node] = (rng.uniform(rect.left + 20, rect.right - 20),
+                                          rng.uniform(rect.top + 20, rect.bottom - 20))
+
+
+def best_time(function, repeat):
+    """Smallest wall time of repeat calls to function, and its last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(function):
+    """Peak memory allocated by Python while running function, in bytes"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def solve(graph, start_node, end_node):
+    """Run Dijkstra's algorithm to completion and return it"""
+    algorithm = DijkstraAlgorithm(graph)
+    algorithm.initialize(start_node, end_node)
+    algorithm.run_to_completion()
+    return algorithm
+
+
+def benchmark_case(family, node_count, repeat=3, step_samples=200, render=True, render_frames=3, seed=0):
+    """Measure one graph of a family
+
+    Args:
+        family: Key of FAMILIES
+        node_count: Approximate number of nodes
+        repeat: Timings are the best of this many runs
+        step_samples: Number of step() calls timed for the per-step cost
+        render: Whether drawing is measured
+        render_frames: Frames drawn for every render timing
+        seed: Seed of the generated graph
+
+    Returns:
+        Dictionary of results
+    """
+    generated = FAMILIES[family](node_count, seed)
+    nodes, positions, edges = graph_data(generated)
+    # Without a destination every reachable node is settled, so the run does
+    # not depend on where a target happens to be
+    start_node = nodes[0]
+    end_node = None
+
+    result = {
+        'family': family,
+        'nodes': len(nodes),
+        'edges': len(edges)
+    }
+
+    # Graph construction
+    result['build_s'], graph = best_time(lambda: build_graph(nodes, positions, edges), repeat)
+
+    # Full run; the per-step cost of run_to_completion is the run time over the steps taken
+    result['run_s'], algorithm = best_time(lambda: solve(graph, start_node, end_node), repeat)
+    result['steps'] = algorithm.steps_taken
+    result['advance_us'] = result['run_s'] / max(1, algorithm.steps_taken) * 1e6
+
+    # step() also builds the state shown by the visualization
+    algorithm = DijkstraAlgorithm(graph)
+    algorithm.initialize(start_node, end_node)
+    samples = 0
+    start = time.perf_counter()
+    while samples < step_samples and not algorithm.finished:
+        algorithm.step()
+        samples += 1
+    result['step_us'] = (time.perf_counter() - start) / max(1, samples) * 1e6
+
+    # Memory is measured separately since tracing slows everything down
+    result['build_peak_bytes'] = peak_memory(lambda: build_graph(nodes, positions, edges))
+    result['run_peak_bytes'] = peak_memory(lambda: solve(graph, start_node, end_node))
+
+    if render:
+        result.update(benchmark_render(graph, start_node, end_node, repeat, render_frames))
+    return result
+
+
+def benchmark_render(graph, start_node, end_node, repeat, frames):
+    """Time Graph.draw and a full frame of the visualization halfway through a run"""
+    # Placed before the window is created, so it does not start a layout
+    place_randomly(graph, GRAPH_RECT)
+    app = DijkstraVisualization(graph=graph, start_node=start_node, end_node=end_node)
+
+    app.handle_button_click('init')
+    total_steps = solve(graph, start_node, end_node).steps_taken
+    state = app.dijkstra.run_steps(max(1, total_steps // 2))
+    if state:
+        app.apply_state(state)
+    state = app.algorithm_state or {}
+
+    def draw_graph():
+        for _ in range(frames):
+            graph.draw(app.screen,
+                       current_node=state.get('current_node'),
+                       visited_nodes=state.get('visited', []),
+                       testing_edges=state.get('testing_edges', []),
+                       start_node=start_node,
+                       end_node=end_node)
+
+    def draw_frame():
+        for _ in range(frames):
+            app.draw()
+
+    draw_time, _ = best_time(draw_graph, repeat)
+    frame_time, _ = best_time(draw_frame, repeat)
+    return {
+        'draw_s': draw_time / frames,
+        'frame_s': frame_time / frames
+    }
+
+
+def run_suite(families, sizes, repeat=3, step_samples=200, render_max_nodes=RENDER_MAX_NODES,
+              dense_max_nodes=DENSE_MAX_NODES, render_frames=3, seed=0, log=None):
+    """Benchmark every family at every size
+
+    Returns:
+        Dictionary with the environment and a list of case results
+    """
+    cases = []
+    for family in families:
+        for size in sizes:
+            if family == 'dense' and size > dense_max_nodes:
+                continue
+            if log:
+                log(f"{family} {size}...")
+            cases.append(benchmark_case(family, size, repeat, step_samples,
+                                        size <= render_max_nodes, render_frames, seed))
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'seed': seed,
+        'cases': cases
+    }
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compare results with a baseline
+
+    Args:
+        results: Output of run_suite
+        baseline: Output of an earlier run_suite
+        threshold: Relative slowdown reported as a regression
+
+    Returns:
+        (lines, regressions): report lines and the number of regressed metrics
+    """
+    baseline_cases = {(case['family'], case['nodes']): case for case in baseline['cases']}
+    lines = [f"{'case':<22}{'metric':<18}{'baseline':>14}{'current':>14}{'change':>10}"]
+    regressions = 0
+    for case in results['cases']:
+        name = f"{case['family']} {case['nodes']}"
+        old = baseline_cases.get((case['family'], case['nodes']))
+        if old is None:
+            lines.append(f"{name:<22}(not in baseline)")
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in case or metric not in old:
+                continue
+            before, after = old[metric], case[metric]
+            change = (after - before) / before if before else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif change < -threshold:
+                flag = "  improved"
+            lines.append(f"{name:<22}{metric:<18}{before:>14.6g}{after:>14.6g}{change:>+10.1%}{flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver and the renderer on synthetic graphs")
+    parser.add_argument('--families', nargs='+', choices=sorted(FAMILIES), default=list(FAMILIES),
+                        help="graph families to benchmark")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help="approximate node counts")
+    parser.add_argument('--repeat', type=int, default=3, help="timings are the best of this many runs")
+    parser.add_argument('--step-samples', type=int, default=200, help="step() calls timed per graph")
+    parser.add_argument('--render-max-nodes', type=int, default=RENDER_MAX_NODES,
+                        help="largest graph whose drawing is timed")
+    parser.add_argument('--dense-max-nodes', type=int, default=DENSE_MAX_NODES,
+                        help="largest dense graph benchmarked")
+    parser.add_argument('--render-frames', type=int, default=3, help="frames drawn per render timing")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the generated graphs")
+    parser.add_argument('--output', help="write the results to this JSON file instead of stdout")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare with the results stored in BASELINE")
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help="relative slowdown reported as a regression by --compare")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    results = run_suite(args.families, args.sizes, args.repeat, args.step_samples, args.render_max_nodes,
+                        args.dense_max_nodes, args.render_frames, args.seed,
+                        log=lambda message: print(message, file=sys.stderr))
+    pygame.quit()
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    elif not args.compare:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        lines, regressions = compare(results, baseline, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{regressions} metric(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
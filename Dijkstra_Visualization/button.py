@@ -62,6 +62,41 @@ class Button:
         self.is_enabled = False
         self.state = 'disabled'
         
+    def handle_event(self, event):
+        """Update button state from a pygame mouse event
+        
+        Args:
+            event: Pygame event (MOUSEMOTION, MOUSEBUTTONDOWN or MOUSEBUTTONUP)
+            
+        Returns:
+            Boolean indicating if the event completed a click (released while hovering)
+        """
+        if not self.is_enabled:
+            return False
+            
+        clicked = False
+        
+        if event.type == pygame.MOUSEMOTION:
+            self.is_hovered = self.rect.collidepoint(event.pos)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.is_hovered = self.rect.collidepoint(event.pos)
+            self.is_pressed = self.is_hovered
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.is_hovered = self.rect.collidepoint(event.pos)
+            clicked = self.is_pressed and self.is_hovered
+            self.is_pressed = False
+        else:
+            return False
+            
+        if self.is_pressed and self.is_hovered:
+            self.state = 'pressed'
+        elif self.is_hovered:
+            self.state = 'hover'
+        else:
+            self.state = 'normal'
+            
+        return clicked
+        
     def update(self, mouse_pos, mouse_pressed):
         """Update button state based on mouse position and button state
         
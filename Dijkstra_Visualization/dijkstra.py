@@ -1,56 +1,292 @@
 import heapq
+from collections import deque
+from collections.abc import Mapping, Set
+from itertools import islice
+
+# Predecessor id of nodes without a predecessor
+NO_NODE = -1
+
+# Log lines kept by an algorithm; a step writes one line per edge, so a
+# long run cannot keep them all
+MAX_LOGS = 200
+
+
+class LogTail(deque):
+    """The latest log lines of a run, with the number of lines written in total"""
+    
+    def __init__(self, lines=(), maxlen=MAX_LOGS, total=None):
+        super().__init__(lines, maxlen)
+        self.total = len(self) if total is None else total
+        
+    def append(self, line):
+        super().append(line)
+        self.total += 1
+
+class StepListener:
+    """Base class for objects observing the execution of an algorithm
+    
+    Listeners are registered in DijkstraAlgorithm.listeners. Every method is
+    a no-op here, so subclasses only override the events they need. When no
+    listener is registered the algorithm skips the notifications entirely.
+    
+    Nodes are passed as graph ids (see Graph.get_id), and a missing
+    predecessor as NO_NODE.
+    """
+    
+    def step_started(self, algorithm):
+        """Called before a step changes the algorithm state"""
+        
+    def node_popped(self, distance, node):
+        """Called for every (distance, node) entry removed from the queue"""
+        
+    def node_settled(self, node):
+        """Called when a node is marked as visited"""
+        
+    def edge_relaxed(self, node, neighbor, new_distance, improved, old_distance, old_predecessor):
+        """Called for every edge tested; improved is True when the distance
+        of neighbor was updated and (new_distance, neighbor) pushed"""
+        
+    def step_finished(self, algorithm):
+        """Called after a step completed"""
+
+
+class AlgorithmCounters(StepListener):
+    """Counts the work done by the algorithm since it was initialized
+    
+    Enabled with DijkstraAlgorithm.enable_counters(). Steps replayed by the
+    timeline are counted again, since they are executed again.
+    """
+    
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.reset()
+        
+    def reset(self):
+        """Set every counter to zero"""
+        self.pops = 0
+        self.stale_pops = 0
+        self.pushes = 0
+        self.relaxations = 0
+        self.successful_relaxations = 0
+        self.peak_queue_size = len(self.algorithm.priority_queue)
+        
+    def node_popped(self, distance, node):
+        self.pops += 1
+        if self.algorithm.settled[node]:
+            self.stale_pops += 1
+            
+    def edge_relaxed(self, node, neighbor, new_distance, improved, old_distance, old_predecessor):
+        self.relaxations += 1
+        if improved:
+            self.successful_relaxations += 1
+            self.pushes += 1
+            
+    def step_finished(self, algorithm):
+        # Pushes only happen after the pops of a step, so the queue is
+        # largest when the step finishes
+        if len(algorithm.priority_queue) > self.peak_queue_size:
+            self.peak_queue_size = len(algorithm.priority_queue)
+            
+    def to_dict(self):
+        """Counter values by name"""
+        return {
+            'pops': self.pops,
+            'stale_pops': self.stale_pops,
+            'pushes': self.pushes,
+            'relaxations': self.relaxations,
+            'successful_relaxations': self.successful_relaxations,
+            'peak_queue_size': self.peak_queue_size
+        }
+
+
+class _DistanceView(Mapping):
+    """Read-only {node: distance} view, with labels, of a list indexed by node id"""
+    
+    def __init__(self, graph, dist):
+        self._graph = graph
+        self._dist = dist
+        
+    def __getitem__(self, node):
+        return self._dist[self._graph.get_id(node)]
+        
+    def __contains__(self, node):
+        return self._graph.has_node(node)
+        
+    def __iter__(self):
+        return iter(self._graph.get_nodes())
+        
+    def __len__(self):
+        return len(self._dist)
+        
+    def copy(self):
+        return dict(zip(self._graph.get_nodes(), self._dist))
+
+
+class _PredecessorView(Mapping):
+    """Read-only {node: predecessor or None} view of a list of predecessor ids"""
+    
+    def __init__(self, graph, pred):
+        self._graph = graph
+        self._pred = pred
+        
+    def __getitem__(self, node):
+        predecessor = self._pred[self._graph.get_id(node)]
+        return None if predecessor == NO_NODE else self._graph.get_label(predecessor)
+        
+    def __contains__(self, node):
+        return self._graph.has_node(node)
+        
+    def __iter__(self):
+        return iter(self._graph.get_nodes())
+        
+    def __len__(self):
+        return len(self._pred)
+        
+    def copy(self):
+        return {node: self[node] for node in self}
+
+
+class _VisitedView(Set):
+    """Read-only set of the visited nodes, with labels, in the order they were visited"""
+    
+    def __init__(self, algorithm):
+        self._algorithm = algorithm
+        
+    def __contains__(self, node):
+        graph = self._algorithm.graph
+        return graph.has_node(node) and bool(self._algorithm.settled[graph.get_id(node)])
+        
+    def __iter__(self):
+        return iter(self._algorithm.graph.get_labels(self._algorithm.settle_order))
+        
+    def __len__(self):
+        return len(self._algorithm.settle_order)
+        
+    def copy(self):
+        return set(self)
+
 
 class DijkstraAlgorithm:
+    # Name shown where several algorithms are compared
+    name = "Dijkstra"
+    
+    # Whether every change of a step goes through the listener events (and
+    # the queue keys are the distances plus the potential), so StepHistory
+    # and TraceRecorder can record the algorithm
+    recordable = True
+    
     def __init__(self, graph):
-        """Initialize Dijkstra's algorithm with a graph instance"""
+        """Initialize Dijkstra's algorithm with a graph instance
+        
+        The algorithm works on the integer node ids of the graph, with its
+        state in lists indexed by id. The attributes distances, predecessors,
+        visited, current_node and testing_edges translate it back to labels.
+        """
         self.graph = graph
         
-        # Algorithm state
-        self.distances = {}
-        self.predecessors = {}
-        self.visited = set()
-        self.priority_queue = []  # Min heap priority queue
-        self.current_node = None
-        self.current_neighbors = []
-        self.path = []  # Final shortest path
+        # Algorithm state, indexed by node id
+        self.dist = []
+        self.pred = []
+        self.settled = bytearray()
+        self.settle_order = []  # Ids of the visited nodes, in order
+        self.priority_queue = []  # Min heap priority queue of (distance, id)
+        self.potential = None  # Optional lower bounds added to the queue keys (see _compute_potential)
+        self.current_id = NO_NODE
+        self.testing_ids = []  # (node id, neighbor id) of the edges currently being tested
+        self.path = []  # Final shortest path (labels)
+        self.start_node = None
+        self.end_node = None
+        self.start_id = NO_NODE
+        self.end_id = NO_NODE
+        self.sorted_ids = None  # Row order of the distances/predecessors tables, built when first needed
         
         # Algorithm logs for explanation display
         self.step_count = 0
-        self.logs = []
-        self.testing_edges = []  # Store edges currently being tested
+        self.steps_taken = 0  # Number of step() calls, unlike step_count which counts queue pops
+        self.logs = LogTail()
         
         # State flags
         self.initialized = False
         self.finished = False
         
+        # Objects notified of every change made by a step (see StepListener)
+        self.listeners = []
+        
+        # AlgorithmCounters while counting is enabled; disabled counters are
+        # not registered as a listener, so they cost nothing
+        self.counters = None
+        
+    @property
+    def distances(self):
+        """{node: distance} view of the current distances"""
+        return _DistanceView(self.graph, self.dist)
+        
+    @property
+    def predecessors(self):
+        """{node: predecessor} view, None for nodes without a predecessor"""
+        return _PredecessorView(self.graph, self.pred)
+        
+    @property
+    def visited(self):
+        """Set-like view of the visited nodes"""
+        return _VisitedView(self)
+        
+    @property
+    def current_node(self):
+        """Node processed by the last step (None before the first step)"""
+        return self._label_or_none(self.current_id)
+        
+    @property
+    def current_neighbors(self):
+        """(neighbor, weight) tuples of the current node"""
+        if self.current_id == NO_NODE:
+            return []
+        return self.graph.get_neighbors_of_id(self.current_id)
+        
+    @property
+    def testing_edges(self):
+        """(node, neighbor) edges tested by the last step"""
+        get_label = self.graph.get_label
+        return [(get_label(node), get_label(neighbor)) for node, neighbor in self.testing_ids]
+        
+    def _label_or_none(self, node_id):
+        """Label of a node id, None for NO_NODE"""
+        return None if node_id == NO_NODE else self.graph.get_label(node_id)
+        
     def initialize(self, start_node, end_node):
         """Initialize the algorithm with start and end nodes"""
+        if not self.graph.has_node(start_node):
+            raise ValueError(f"Start node {start_node!r} is not in the graph")
         self.start_node = start_node
         self.end_node = end_node
+        self.start_id = self.graph.get_id(start_node)
+        self.end_id = self.graph.get_id(end_node) if self.graph.has_node(end_node) else NO_NODE
         
-        # Reset state
-        self.distances = {}
-        self.predecessors = {}
-        self.visited = set()
+        # Reset state: every distance is infinity except the start node's
+        node_count = self.graph.get_node_count()
+        self.dist = [float('inf')] * node_count
+        self.dist[self.start_id] = 0
+        self.pred = [NO_NODE] * node_count
+        self.settled = bytearray(node_count)
+        self.settle_order = []
         self.priority_queue = []
-        self.current_node = None
-        self.current_neighbors = []
+        self.current_id = NO_NODE
+        self.testing_ids = []
         self.path = []
+        self.sorted_ids = None
+        self.potential = self._compute_potential()
         
         self.step_count = 0
-        self.logs = []
-        self.testing_edges = []
+        self.steps_taken = 0
+        self.logs = LogTail()
         
-        # Set initial distances
-        for node in self.graph.get_nodes():
-            if node == start_node:
-                self.distances[node] = 0
-            else:
-                self.distances[node] = float('inf')
-            self.predecessors[node] = None
-            
         # Add start node to priority queue
-        heapq.heappush(self.priority_queue, (0, start_node))
+        start_key = self.potential[self.start_id] if self.potential is not None else 0
+        heapq.heappush(self.priority_queue, (start_key, self.start_id))
+        
+        if self.counters is not None:
+            self.counters.reset()
+            self.counters.pushes = 1
         
         self.initialized = True
         self.finished = False
@@ -59,85 +295,181 @@ class DijkstraAlgorithm:
         self.logs.append(f"Initialized Dijkstra's algorithm from {start_node} to {end_node}")
         self.logs.append(f"Set distance to {start_node} as 0 and all other nodes as infinity")
         
+    def _compute_potential(self):
+        """Lower bound on the distance from every node id to the end node
+        
+        When it returns a list, the queue is ordered by distance plus bound
+        (A*, see variants.py). The bounds must be consistent: the bound of a
+        node is at most the weight of an edge plus the bound of its end.
+        """
+        return None
+        
+    def enable_counters(self):
+        """Start counting pops, pushes and relaxations (see AlgorithmCounters)"""
+        if self.counters is None:
+            self.counters = AlgorithmCounters(self)
+            self.listeners.append(self.counters)
+        return self.counters
+        
+    def disable_counters(self):
+        """Stop counting"""
+        if self.counters is not None:
+            self.listeners.remove(self.counters)
+            self.counters = None
+            
     def step(self):
         """Execute one step of the algorithm and return state information"""
         if not self.initialized or self.finished:
             return None
             
-        self.step_count += 1
-        self.testing_edges = []  # Reset testing edges
-        
-        # If the priority queue is empty, we're done
-        if not self.priority_queue:
-            self.logs.append("Priority queue is empty. Algorithm complete.")
-            self.finished = True
-            self._reconstruct_path()
-            return {
-                'finished': True,
-                'path': self.path
-            }
+        self._advance()
+        return self.get_state()
+        
+    def run_steps(self, count):
+        """Execute up to count steps and return the state after the last one
+        
+        Only the final state is built, so a batch of steps is much cheaper than
+        calling step() repeatedly.
+        """
+        if not self.initialized or self.finished:
+            return None
             
-        # Get the node with the smallest distance from the priority queue
-        current_distance, self.current_node = heapq.heappop(self.priority_queue)
-        
-        # If we've reached the end node, we're done
-        if self.current_node == self.end_node:
-            self.logs.append(f"Reached destination node {self.end_node}")
-            self.finished = True
-            self._reconstruct_path()
+        self.advance(count)
+        return self.get_state()
+        
+    def advance(self, count):
+        """Execute up to count steps without building any state
+        
+        Returns:
+            Number of steps executed
+        """
+        executed = 0
+        while executed < count and self.initialized and not self.finished:
+            self._advance()
+            executed += 1
+        return executed
+        
+    def get_state(self):
+        """Return the current state information of the algorithm"""
+        if self.finished:
             return {
                 'finished': True,
                 'path': self.path
             }
             
-        # Skip if the node has already been visited
-        if self.current_node in self.visited:
-            self.logs.append(f"Node {self.current_node} has already been visited. Skipping.")
-            return self.step()
+        # Copying the id-indexed lists is much cheaper than building label
+        # dictionaries; the views translate lookups to labels
+        get_label = self.graph.get_label
+        return {
+            'current_node': self.current_node,
+            'visited': self.graph.get_labels(self.settle_order),
+            'testing_edges': self.testing_edges,
+            'distances': _DistanceView(self.graph, self.dist.copy()),
+            'predecessors': _PredecessorView(self.graph, self.pred.copy()),
+            'priority_queue': [(distance, get_label(node)) for distance, node in sorted(self.priority_queue)],
+            'finished': False
+        }
+        
+    def _advance(self):
+        """Execute one step of the algorithm without building a state"""
+        listeners = self.listeners
+        if listeners:
+            for listener in listeners:
+                listener.step_started(self)
+                
+        self._execute_step(listeners)
+        self.steps_taken += 1
+        
+        if listeners:
+            for listener in listeners:
+                listener.step_finished(self)
+                
+    def _execute_step(self, listeners):
+        """Pop nodes until one is processed or the algorithm finishes"""
+        queue = self.priority_queue
+        settled = self.settled
+        labels = self.graph.get_label_sequence()
+        while True:
+            self.step_count += 1
+            self.testing_ids = []  # Reset testing edges
+            
+            # If the priority queue is empty, we're done
+            if not queue:
+                self.logs.append("Priority queue is empty. Algorithm complete.")
+                self.finished = True
+                self._reconstruct_path()
+                return
+                
+            # Get the node with the smallest distance from the priority queue
+            current_distance, node = heapq.heappop(queue)
+            self.current_id = node
+            if listeners:
+                for listener in listeners:
+                    listener.node_popped(current_distance, node)
+            
+            # If we've reached the end node, we're done
+            if node == self.end_id:
+                self.logs.append(f"Reached destination node {self.end_node}")
+                self.finished = True
+                self._reconstruct_path()
+                return
+                
+            # Skip if the node has already been visited
+            if settled[node]:
+                self.logs.append(f"Node {labels[node]} has already been visited. Skipping.")
+                continue
+            break
             
         # Mark the node as visited
-        self.visited.add(self.current_node)
+        settled[node] = 1
+        self.settle_order.append(node)
+        if listeners:
+            for listener in listeners:
+                listener.node_settled(node)
         
-        self.logs.append(f"Step {self.step_count}: Processing node {self.current_node} with distance {current_distance}")
+        # Process neighbors
+        dist = self.dist
+        pred = self.pred
+        potential = self.potential
+        testing = self.testing_ids
+        node_distance = dist[node]
         
-        # Get the neighbors of the current node
-        self.current_neighbors = self.graph.get_neighbors(self.current_node)
+        label = labels[node]
+        self.logs.append(f"Step {self.step_count}: Processing node {label} with distance {node_distance}")
         
-        # Process neighbors
-        for neighbor, weight in self.current_neighbors:
-            self.testing_edges.append((self.current_node, neighbor))
+        for neighbor, weight in self.graph.get_id_neighbors(node):
+            testing.append((node, neighbor))
             
             # Calculate new distance
-            new_distance = self.distances[self.current_node] + weight
+            new_distance = node_distance + weight
             
             # If we have a shorter path to the neighbor
-            if new_distance < self.distances[neighbor]:
-                self.logs.append(f"Found shorter path to {neighbor} via {self.current_node}: {new_distance}")
-                self.distances[neighbor] = new_distance
-                self.predecessors[neighbor] = self.current_node
+            if new_distance < dist[neighbor]:
+                if listeners:
+                    for listener in listeners:
+                        listener.edge_relaxed(node, neighbor, new_distance, True,
+                                              dist[neighbor], pred[neighbor])
+                self.logs.append(f"Found shorter path to {labels[neighbor]} via {label}: {new_distance}")
+                dist[neighbor] = new_distance
+                pred[neighbor] = node
                 
                 # Add to the priority queue
-                heapq.heappush(self.priority_queue, (new_distance, neighbor))
+                if potential is None:
+                    heapq.heappush(queue, (new_distance, neighbor))
+                else:
+                    heapq.heappush(queue, (new_distance + potential[neighbor], neighbor))
             else:
-                self.logs.append(f"Path to {neighbor} via {self.current_node} is not shorter: {new_distance} >= {self.distances[neighbor]}")
-                
-        # Return the current state
-        return {
-            'current_node': self.current_node,
-            'visited': list(self.visited),
-            'testing_edges': self.testing_edges,
-            'distances': self.distances.copy(),
-            'predecessors': self.predecessors.copy(),
-            'priority_queue': sorted(self.priority_queue.copy()),
-            'finished': False
-        }
+                if listeners:
+                    for listener in listeners:
+                        listener.edge_relaxed(node, neighbor, new_distance, False,
+                                              dist[neighbor], pred[neighbor])
+                self.logs.append(f"Path to {labels[neighbor]} via {label} is not shorter: "
+                                 f"{new_distance} >= {dist[neighbor]}")
         
     def run_to_completion(self):
         """Run the algorithm to completion and return the final state"""
-        while not self.finished:
-            state = self.step()
-            if state and state.get('finished', False):
-                break
+        while self.initialized and not self.finished:
+            self._advance()
                 
         return {
             'path': self.path,
@@ -149,52 +481,175 @@ class DijkstraAlgorithm:
         
     def _reconstruct_path(self):
         """Reconstruct the shortest path from start to end"""
-        if self.end_node not in self.distances or self.distances[self.end_node] == float('inf'):
+        if self.end_id == NO_NODE or self.dist[self.end_id] == float('inf'):
             self.logs.append(f"No path exists from {self.start_node} to {self.end_node}")
             return
             
-        current = self.end_node
+        current = self.end_id
         path = []
         
-        while current:
+        while current != NO_NODE:
             path.append(current)
-            current = self.predecessors.get(current)
+            current = self.pred[current]
             
-        self.path = list(reversed(path))
-        self.logs.append(f"Shortest path: {' -> '.join(self.path)}")
-        self.logs.append(f"Total distance: {self.distances[self.end_node]}")
+        get_label = self.graph.get_label
+        self.path = [get_label(node) for node in reversed(path)]
+        self.logs.append(f"Shortest path: {' -> '.join(str(node) for node in self.path)}")
+        self.logs.append(f"Total distance: {self.dist[self.end_id]}")
         
     def get_current_logs(self, max_logs=5):
         """Get the most recent log entries for display"""
         if not self.logs:
             return ["No steps executed yet."]
         
-        return self.logs[-max_logs:]
+        return list(islice(self.logs, max(0, len(self.logs) - max_logs), None))
+        
+    def get_heap_items(self, count=None, start=0):
+        """Get items in the priority queue (heap) for display
+        
+        Without count every item is returned in priority order. With count only
+        the ordered window [start, start + count) is returned. It is extracted by
+        walking the heap from the root with a small auxiliary heap, which costs
+        O(k log k) for k = start + count, no matter how large the queue is.
+        """
+        get_label = self.graph.get_label
+        if count is None:
+            return [(distance, get_label(node)) for distance, node in sorted(self.priority_queue)]
+            
+        heap = self.priority_queue
+        items = []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(items) < start + count:
+            item, index = heapq.heappop(frontier)
+            items.append(item)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return [(distance, get_label(node)) for distance, node in items[start:]]
+        
+    def get_heap_entries(self, indices):
+        """Get (index, item) pairs of the heap array for the given indices"""
+        heap = self.priority_queue
+        get_label = self.graph.get_label
+        return [(index, (heap[index][0], get_label(heap[index][1]))) for index in indices if index < len(heap)]
+        
+    def get_heap_size(self):
+        """Number of items in the priority queue"""
+        return len(self.priority_queue)
         
-    def get_heap_items(self):
-        """Get items in the priority queue (heap) for display"""
-        return sorted(self.priority_queue.copy())
+    def get_table_size(self):
+        """Number of rows of the distances and predecessors tables"""
+        return len(self.dist)
         
-    def get_distances_table(self):
-        """Get current distances as a formatted table for display"""
+    def get_distances_table(self, count=None, start=0):
+        """Get current distances as a formatted table for display
+        
+        Rows follow the node order sorted by label. With count only the rows
+        [start, start + count) are formatted.
+        """
+        get_label = self.graph.get_label
         table = []
-        for node in sorted(self.distances.keys()):
-            distance = self.distances[node]
+        for node in self._table_ids(count, start):
+            distance = self.dist[node]
             if distance == float('inf'):
                 distance_str = "∞"
             else:
                 distance_str = str(distance)
-            table.append((node, distance_str))
+            table.append((get_label(node), distance_str))
         return table
         
-    def get_predecessors_table(self):
-        """Get current predecessors as a formatted table for display"""
+    def get_predecessors_table(self, count=None, start=0):
+        """Get current predecessors as a formatted table for display
+        
+        Rows follow the node order sorted by label. With count only the rows
+        [start, start + count) are formatted.
+        """
+        get_label = self.graph.get_label
         table = []
-        for node in sorted(self.predecessors.keys()):
-            predecessor = self.predecessors[node]
-            if predecessor is None:
+        for node in self._table_ids(count, start):
+            predecessor = self.pred[node]
+            if predecessor == NO_NODE:
                 predecessor_str = "-"
             else:
-                predecessor_str = predecessor
-            table.append((node, predecessor_str))
-        return table 
\ No newline at end of file
+                predecessor_str = get_label(predecessor)
+            table.append((get_label(node), predecessor_str))
+        return table
+        
+    def _table_ids(self, count, start):
+        """Node ids of the table rows [start, start + count)"""
+        if self.sorted_ids is None:
+            # Nodes never change during a run, so the order is sorted once
+            get_label = self.graph.get_label
+            node_ids = range(len(self.dist))
+            if isinstance(self.graph.get_nodes(), range):
+                # The labels are the ids (grids), already in order
+                self.sorted_ids = node_ids
+            else:
+                self.sorted_ids = self._sort_by_label(node_ids, get_label)
+        if count is None:
+            return self.sorted_ids[start:]
+        return self.sorted_ids[start:start + count]
+        
+    def _sort_by_label(self, node_ids, get_label):
+        """Node ids sorted by label"""
+        try:
+            return sorted(node_ids, key=get_label)
+        except TypeError:
+            # Labels of different types that can't be compared
+            return sorted(node_ids, key=lambda node: (type(get_label(node)).__name__, str(get_label(node))))
+
+
+def shortest_path_tree(graph, source_id, target_id=NO_NODE):
+    """Run Dijkstra's algorithm from a node id to every reachable node
+    
+    Unlike DijkstraAlgorithm there are no steps, logs or listeners, which
+    makes it the solver for batch work where only the results matter.
+    
+    Args:
+        graph: Graph with the integer id interface (get_id_neighbors)
+        source_id: Id of the source node
+        target_id: Stop as soon as this node is settled; distances of nodes
+                   that are not settled yet are then upper bounds
+        
+    Returns:
+        (dist, pred, settled): distance and predecessor id lists indexed by
+        node id (inf and NO_NODE for unreached nodes) and the number of
+        settled nodes
+    """
+    node_count = graph.get_node_count()
+    dist = [float('inf')] * node_count
+    pred = [NO_NODE] * node_count
+    done = bytearray(node_count)
+    get_id_neighbors = graph.get_id_neighbors
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    
+    dist[source_id] = 0
+    queue = [(0, source_id)]
+    settled = 0
+    while queue:
+        distance, node = heappop(queue)
+        if done[node]:
+            continue
+        done[node] = 1
+        settled += 1
+        if node == target_id:
+            break
+        for neighbor, weight in get_id_neighbors(node):
+            new_distance = distance + weight
+            if new_distance < dist[neighbor]:
+                dist[neighbor] = new_distance
+                pred[neighbor] = node
+                heappush(queue, (new_distance, neighbor))
+    return dist, pred, settled
+
+
+def path_ids(pred, target_id):
+    """Node ids of the path ending at target_id, following a predecessor list"""
+    path = []
+    node = target_id
+    while node != NO_NODE:
+        path.append(node)
+        node = pred[node]
+    path.reverse()
+    return path
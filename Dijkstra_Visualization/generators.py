@@ -0,0 +1,579 @@
+import argparse
+import math
+import random
+import sys
+import time
+
+import numpy as np
+
+from graph import Graph
+from grid import GridGraph, WALL_NORTH, WALL_EAST, WALL_SOUTH, WALL_WEST, ALL_WALLS, OPPOSITE, MAX_COST
+
+
+def grid_graph(width, height, max_weight=9, seed=0, cell_size=20):
+    """Grid where every cell is connected to its 4 neighbors in both directions
+
+    Args:
+        width: Number of columns
+        height: Number of rows
+        max_weight: Edge weights are drawn uniformly from 1..max_weight
+        seed: Random seed
+        cell_size: Distance between neighboring nodes on screen
+
+    Returns:
+        Graph with nodes labeled str(row * width + column)
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    for row in range(height):
+        for column in range(width):
+            graph.add_node(str(row * width + column), (column * cell_size, row * cell_size))
+    for row in range(height):
+        for column in range(width):
+            node = row * width + column
+            if column + 1 < width:
+                _add_both(graph, node, node + 1, rng.randint(1, max_weight))
+            if row + 1 < height:
+                _add_both(graph, node, node + width, rng.randint(1, max_weight))
+    return graph
+
+
+def random_graph(node_count, average_degree, max_weight=100, seed=0):
+    """Directed random graph (Erdos-Renyi style) with a given average out-degree
+
+    A small average degree gives sparse graphs, a degree close to node_count
+    gives dense ones.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    for node in range(node_count):
+        graph.add_node(str(node))
+    edge_count = int(node_count * average_degree)
+    for _ in range(edge_count):
+        start = rng.randrange(node_count)
+        end = rng.randrange(node_count)
+        if start != end:
+            graph.add_edge(str(start), str(end), rng.randint(1, max_weight))
+    return graph
+
+
+def scale_free_graph(node_count, edges_per_node=2, max_weight=100, seed=0):
+    """Scale-free graph built by preferential attachment (Barabasi-Albert)
+
+    Every new node links to edges_per_node existing nodes chosen with
+    probability proportional to their degree. Edges go both ways.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    for node in range(node_count):
+        graph.add_node(str(node))
+
+    # Every node appears in targets once per incident edge
+    targets = []
+    initial = min(node_count, edges_per_node + 1)
+    for node in range(1, initial):
+        _add_both(graph, node, node - 1, rng.randint(1, max_weight))
+        targets.extend((node, node - 1))
+    for node in range(initial, node_count):
+        chosen = set()
+        while len(chosen) < min(edges_per_node, node):
+            chosen.add(rng.choice(targets) if targets else rng.randrange(node))
+        for other in chosen:
+            _add_both(graph, node, other, rng.randint(1, max_weight))
+            targets.extend((node, other))
+    return graph
+
+
+def road_graph(node_count, neighbors=3, seed=0, size=(760, 560)):
+    """Road-like graph: random points joined to their nearest neighbors
+
+    Weights are the rounded Euclidean distances, edges go both ways and
+    every node gets a position, like a road network drawn on a map.
+    """
+    rng = random.Random(seed)
+    graph = Graph()
+    points = [(rng.uniform(20, size[0]), rng.uniform(20, size[1])) for _ in range(node_count)]
+    for node, position in enumerate(points):
+        graph.add_node(str(node), position)
+
+    # Bucket the points in a grid so nearest neighbors are found locally
+    cell = max(size) / max(1.0, math.sqrt(node_count)) * 2
+    buckets = {}
+    for node, (x, y) in enumerate(points):
+        buckets.setdefault((int(x // cell), int(y // cell)), []).append(node)
+
+    for node, (x, y) in enumerate(points):
+        bx, by = int(x // cell), int(y // cell)
+        radius = 1
+        candidates = []
+        while len(candidates) <= neighbors and radius <= 4:
+            candidates = [other for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+                          for other in buckets.get((bx + dx, by + dy), ()) if other != node]
+            radius += 1
+        candidates.sort(key=lambda other: (points[other][0] - x) ** 2 + (points[other][1] - y) ** 2)
+        for other in candidates[:neighbors]:
+            distance = math.dist(points[node], points[other])
+            _add_both(graph, node, other, max(1, round(distance)))
+    return graph
+
+
+def _add_both(graph, a, b, weight):
+    """Add an edge in both directions between nodes with integer ids"""
+    graph.add_edge(str(a), str(b), weight)
+    graph.add_edge(str(b), str(a), weight)
+
+
+def backtracker_maze(width, height, seed=0):
+    """Perfect maze carved by a depth-first search (recursive backtracker)
+
+    The search uses an explicit stack, so there is no recursion limit on the
+    maze size. Mazes have long corridors and few branches.
+
+    Returns:
+        GridGraph with exactly one path between every pair of cells
+    """
+    rng = random.Random(seed)
+    maze = GridGraph(width, height, closed=True)
+    cells = maze.cells
+    last_row = (height - 1) * width
+    visited = bytearray(width * height)
+
+    start = rng.randrange(width * height)
+    visited[start] = 1
+    stack = [start]
+    while stack:
+        node = stack[-1]
+        column = node % width
+        options = []
+        if node >= width and not visited[node - width]:
+            options.append((node - width, WALL_NORTH))
+        if column < width - 1 and not visited[node + 1]:
+            options.append((node + 1, WALL_EAST))
+        if node < last_row and not visited[node + width]:
+            options.append((node + width, WALL_SOUTH))
+        if column > 0 and not visited[node - 1]:
+            options.append((node - 1, WALL_WEST))
+        if not options:
+            stack.pop()
+            continue
+
+        neighbor, wall = options[int(rng.random() * len(options))]
+        cells[node] &= ~wall & 0xFF
+        cells[neighbor] &= ~OPPOSITE[wall] & 0xFF
+        visited[neighbor] = 1
+        stack.append(neighbor)
+    maze.version += 1
+    return maze
+
+
+def kruskal_maze(width, height, seed=0):
+    """Perfect maze built by Kruskal's algorithm on randomly ordered walls
+
+    Walls are removed in random order when they separate two cells that are
+    not connected yet (tracked with a union-find). Mazes have many short
+    dead ends.
+    """
+    maze = GridGraph(width, height, closed=True)
+    cells = maze.cells
+    node_count = width * height
+
+    # Wall ids: 2 * cell for the east wall, 2 * cell + 1 for the south wall
+    nodes = np.arange(node_count, dtype=np.int64)
+    east = 2 * nodes[nodes % width < width - 1]
+    south = 2 * nodes[nodes < (height - 1) * width] + 1
+    walls = np.concatenate((east, south))
+    np.random.default_rng(seed).shuffle(walls)
+
+    parent = list(range(node_count))
+    remaining = node_count - 1
+    for wall in walls.tolist():
+        a = wall >> 1
+        b = a + width if wall & 1 else a + 1
+
+        # Find both roots, halving the paths on the way
+        root_a = a
+        while parent[root_a] != root_a:
+            parent[root_a] = parent[parent[root_a]]
+            root_a = parent[root_a]
+        root_b = b
+        while parent[root_b] != root_b:
+            parent[root_b] = parent[parent[root_b]]
+            root_b = parent[root_b]
+        if root_a == root_b:
+            continue
+
+        parent[root_a] = root_b
+        if wall & 1:
+            cells[a] &= ~WALL_SOUTH & 0xFF
+            cells[b] &= ~WALL_NORTH & 0xFF
+        else:
+            cells[a] &= ~WALL_EAST & 0xFF
+            cells[b] &= ~WALL_WEST & 0xFF
+        remaining -= 1
+        if not remaining:
+            break
+    maze.version += 1
+    return maze
+
+
+def wilson_maze(width, height, seed=0):
+    """Perfect maze built by Wilson's algorithm (loop-erased random walks)
+
+    Every perfect maze of the grid is equally likely (a uniform spanning
+    tree), unlike the backtracker and Kruskal mazes.
+    """
+    rng = random.Random(seed)
+    maze = GridGraph(width, height, closed=True)
+    cells = maze.cells
+    node_count = width * height
+    last_row = (height - 1) * width
+    steps = {WALL_NORTH: -width, WALL_EAST: 1, WALL_SOUTH: width, WALL_WEST: -1}
+    directions = [WALL_NORTH, WALL_EAST, WALL_SOUTH, WALL_WEST]
+
+    in_maze = bytearray(node_count)
+    in_maze[rng.randrange(node_count)] = 1
+
+    # Direction in which the walk last left every cell; overwriting it when
+    # the walk comes back erases the loop
+    leaving = bytearray(node_count)
+
+    for start in range(node_count):
+        if in_maze[start]:
+            continue
+
+        node = start
+        while not in_maze[node]:
+            wall = directions[int(rng.random() * 4)]
+            if ((wall == WALL_NORTH and node < width) or (wall == WALL_SOUTH and node >= last_row)
+                    or (wall == WALL_EAST and node % width == width - 1)
+                    or (wall == WALL_WEST and node % width == 0)):
+                continue
+            leaving[node] = wall
+            node += steps[wall]
+
+        # Carve the loop-erased walk into the maze
+        node = start
+        while not in_maze[node]:
+            wall = leaving[node]
+            neighbor = node + steps[wall]
+            cells[node] &= ~wall & 0xFF
+            cells[neighbor] &= ~OPPOSITE[wall] & 0xFF
+            in_maze[node] = 1
+            node = neighbor
+    maze.version += 1
+    return maze
+
+
+def braid_maze(maze, fraction=1.0, seed=0):
+    """Remove dead ends of a maze, creating loops (a braided maze)
+
+    Every dead end is opened into a neighbor with probability fraction,
+    preferring neighbors that are dead ends too.
+
+    Returns:
+        The same GridGraph, changed in place
+    """
+    rng = random.Random(seed)
+    width, height = maze.width, maze.height
+    cells = maze.cells
+    steps = {WALL_NORTH: -width, WALL_EAST: 1, WALL_SOUTH: width, WALL_WEST: -1}
+
+    def dead_end(node):
+        walls = cells[node] & ALL_WALLS
+        return walls in (ALL_WALLS ^ WALL_NORTH, ALL_WALLS ^ WALL_EAST,
+                         ALL_WALLS ^ WALL_SOUTH, ALL_WALLS ^ WALL_WEST)
+
+    for node in range(width * height):
+        if not dead_end(node) or rng.random() >= fraction:
+            continue
+        row, column = divmod(node, width)
+        options = []
+        for wall in (WALL_NORTH, WALL_EAST, WALL_SOUTH, WALL_WEST):
+            if not cells[node] & wall:
+                continue
+            if ((wall == WALL_NORTH and row == 0) or (wall == WALL_SOUTH and row == height - 1)
+                    or (wall == WALL_EAST and column == width - 1) or (wall == WALL_WEST and column == 0)):
+                continue
+            options.append(wall)
+        if not options:
+            continue
+        preferred = [wall for wall in options if dead_end(node + steps[wall])]
+        wall = rng.choice(preferred or options)
+        cells[node] &= ~wall & 0xFF
+        cells[node + steps[wall]] &= ~OPPOSITE[wall] & 0xFF
+    maze.version += 1
+    return maze
+
+
+def randomize_costs(grid, max_cost=MAX_COST, seed=0):
+    """Give every cell of a GridGraph a random cost between 1 and max_cost
+
+    Returns:
+        The same GridGraph, changed in place
+    """
+    costs = np.random.default_rng(seed).integers(0, max_cost, size=len(grid.cells), dtype=np.uint8)
+    cells = np.frombuffer(grid.cells, dtype=np.uint8)
+    cells &= ALL_WALLS
+    cells |= costs << 4
+    del cells  # Release the buffer so the bytearray may be resized again
+    grid.version += 1
+    return grid
+
+
+def weighted_grid(width, height, max_cost=MAX_COST, seed=0):
+    """Open GridGraph (only border walls) with random cell costs"""
+    return randomize_costs(GridGraph(width, height), max_cost, seed)
+
+
+def random_geometric_graph(node_count, radius=None, seed=0, size=(760, 560)):
+    """Random geometric graph: random points joined when closer than radius
+
+    Edges go both ways, weights are the rounded distances and nodes
+    0..node_count-1 get their point as position.
+
+    Args:
+        node_count: Number of nodes
+        radius: Connection radius; by default about 6 neighbors per node
+        seed: Random seed
+        size: Area (width, height) the points are placed in
+    """
+    sources, targets, weights, points = geometric_edges(node_count, radius, seed, size)
+    return _graph_from_pairs(node_count, sources, targets, weights, points)
+
+
+def geometric_edges(node_count, radius=None, seed=0, size=(760, 560)):
+    """Edges of random_geometric_graph as arrays, without building the Graph
+
+    Returns:
+        (sources, targets, weights, points): every edge once (it goes both
+        ways) and the (node_count, 2) array of node positions
+    """
+    rng = np.random.default_rng(seed)
+    margin = 20
+    points = np.column_stack((rng.uniform(margin, size[0], node_count),
+                              rng.uniform(margin, size[1], node_count)))
+    if radius is None:
+        radius = math.sqrt(6 * size[0] * size[1] / (math.pi * max(1, node_count)))
+
+    # Bucket the points in cells of side radius; neighbors are in the same or
+    # an adjacent cell. Each pair of cells is visited from one side only
+    cell_x = (points[:, 0] // radius).astype(np.int64)
+    cell_y = (points[:, 1] // radius).astype(np.int64)
+    columns = int(cell_x.max()) + 2 if node_count else 1
+    rows = int(cell_y.max()) + 2 if node_count else 1
+    keys = cell_y * columns + cell_x
+    order = _stable_order(keys, rows * columns)
+    # Points of cell k are order[cell_starts[k]:cell_starts[k] + cell_counts[k]]
+    cell_counts = np.bincount(keys, minlength=rows * columns)
+    cell_starts = np.cumsum(cell_counts) - cell_counts
+
+    sources = []
+    targets = []
+    for dx, dy in ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)):
+        outside = (cell_x + dx) < 0
+        target_keys = (cell_y + dy) * columns + (cell_x + dx)
+        target_keys[outside] = 0
+        starts = cell_starts[target_keys]
+        lengths = cell_counts[target_keys]
+        lengths[outside] = 0
+        total = int(lengths.sum())
+        first = np.repeat(np.arange(node_count), lengths)
+        within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        second = order[np.repeat(starts, lengths) + within]
+        keep = first < second if (dx, dy) == (0, 0) else np.ones(total, dtype=bool)
+        sources.append(first[keep])
+        targets.append(second[keep])
+
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+    # Gathering from one coordinate array at a time is faster than from points
+    x = np.ascontiguousarray(points[:, 0])
+    y = np.ascontiguousarray(points[:, 1])
+    distances = np.hypot(x[sources] - x[targets], y[sources] - y[targets])
+    close = distances <= radius
+    weights = np.maximum(1, np.rint(distances[close])).astype(np.int64)
+    return sources[close], targets[close], weights, points
+
+
+def power_law_graph(node_count, exponent=2.5, average_degree=4, max_weight=100, seed=0):
+    """Graph whose degrees follow a power law (Chung-Lu model)
+
+    Node i gets an expected degree proportional to (i + 1) ** (-1 / (exponent - 1)),
+    so a few hubs have very high degrees. Edges go both ways.
+    """
+    return _graph_from_pairs(node_count, *power_law_edges(node_count, exponent, average_degree, max_weight, seed))
+
+
+def power_law_edges(node_count, exponent=2.5, average_degree=4, max_weight=100, seed=0):
+    """Edges of power_law_graph as arrays, without building the Graph
+
+    Returns:
+        (sources, targets, weights): every edge once (it goes both ways)
+    """
+    rng = np.random.default_rng(seed)
+    expected = np.arange(1, node_count + 1, dtype=float) ** (-1 / (exponent - 1))
+    expected /= expected.sum()
+
+    cumulative = np.cumsum(expected)
+    cumulative /= cumulative[-1]
+
+    def sample(count):
+        # Same draws as rng.choice(node_count, count, p=expected), but looked
+        # up in sorted order, which is much faster on large graphs
+        uniform = rng.random(count)
+        order = np.argsort(uniform)
+        nodes = np.empty(count, dtype=np.int64)
+        nodes[order] = np.searchsorted(cumulative, uniform[order], side='right')
+        return nodes
+
+    edge_count = node_count * average_degree // 2
+    sources = sample(edge_count)
+    targets = sample(edge_count)
+
+    # Drop self loops and duplicate edges
+    low = np.minimum(sources, targets)
+    high = np.maximum(sources, targets)
+    pairs = np.sort(low[low != high] * node_count + high[low != high])
+    first = np.ones(len(pairs), dtype=bool)
+    first[1:] = pairs[1:] != pairs[:-1]
+    sources, targets = np.divmod(pairs[first], node_count)
+    weights = rng.integers(1, max_weight + 1, size=len(sources))
+    return sources, targets, weights
+
+
+def lattice_chunks(width, height, degree=16, reach=3, seed=0, chunk_nodes=1 << 20):
+    """Local random graph on a width x height lattice, in chunks of nodes
+
+    Node row * width + column gets degree edges to random nodes at most reach
+    columns and rows away, weighted by 10 times their distance plus noise.
+    Nothing is kept between chunks, so graphs larger than the memory can be
+    streamed to write_csr_snapshot.
+
+    Yields:
+        (degrees, targets, weights) of the next (at most) chunk_nodes nodes
+    """
+    node_count = width * height
+    for chunk, first in enumerate(range(0, node_count, chunk_nodes)):
+        # Seeded per chunk, so no chunk depends on the ones before it (the
+        # graph still depends on chunk_nodes)
+        rng = np.random.default_rng([seed, chunk])
+        nodes = np.arange(first, min(first + chunk_nodes, node_count), dtype=np.int64)
+        rows, columns = np.divmod(nodes, width)
+        dx = rng.integers(-reach, reach + 1, size=(len(nodes), degree))
+        dy = rng.integers(-reach, reach + 1, size=(len(nodes), degree))
+        dx[(dx == 0) & (dy == 0)] = 1
+        target_columns = np.clip(columns[:, None] + dx, 0, width - 1)
+        target_rows = np.clip(rows[:, None] + dy, 0, height - 1)
+        targets = (target_rows * width + target_columns).reshape(-1)
+        weights = (np.rint(10 * np.hypot(dx, dy)) + rng.integers(0, 10, size=dx.shape)).astype(np.int64).reshape(-1)
+        yield np.full(len(nodes), degree, dtype=np.int64), targets, weights
+
+
+def _stable_order(keys, key_count):
+    """np.argsort(keys, kind='stable') for integer keys in 0..key_count-1
+
+    Sorting the unique values key * len(keys) + index is several times
+    faster than a stable argsort.
+    """
+    count = len(keys)
+    if key_count * count >= 1 << 62:
+        return np.argsort(keys, kind='stable')
+    values = keys.astype(np.int64) * count + np.arange(count, dtype=np.int64)
+    values.sort()
+    return values % count
+
+
+def _csr_from_pairs(node_count, sources, targets, weights):
+    """CSR arrays (offsets, targets, weights) with an edge both ways for every pair"""
+    starts = np.concatenate((sources, targets))
+    ends = np.concatenate((targets, sources))
+    weights = np.concatenate((weights, weights))
+    order = _stable_order(starts, node_count)
+    offsets = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(starts, minlength=node_count), out=offsets[1:])
+    return offsets, ends[order], weights[order]
+
+
+def _graph_from_pairs(node_count, sources, targets, weights, positions=None):
+    """Graph with nodes 0..node_count-1 and an edge both ways for every pair
+
+    The adjacency lists are built in bulk, without the duplicate check of
+    Graph.add_edge (the pairs must be unique).
+    """
+    offsets, ends, weights = _csr_from_pairs(node_count, sources, targets, weights)
+    ends = ends.tolist()
+    weights = weights.tolist()
+    offsets = offsets.tolist()
+
+    # Labels are the ids, so the id adjacency lists are built directly
+    neighbors = [list(zip(ends[offsets[node]:offsets[node + 1]], weights[offsets[node]:offsets[node + 1]]))
+                 for node in range(node_count)]
+    node_positions = None
+    if positions is not None:
+        node_positions = dict(enumerate(map(tuple, positions.tolist())))
+    return Graph.from_adjacency(range(node_count), neighbors, node_positions)
+
+
+def _geometric_csr(args):
+    sources, targets, weights, points = geometric_edges(args.nodes, seed=args.seed)
+    return _csr_from_pairs(args.nodes, sources, targets, weights) + (points,)
+
+
+def _power_law_csr(args):
+    return _csr_from_pairs(args.nodes, *power_law_edges(args.nodes, seed=args.seed)) + (None,)
+
+
+# Generators available from the command line: name -> (function(args), produces a grid).
+# The others return (offsets, targets, weights, positions) CSR arrays, which
+# are written to the snapshot without building a Graph
+GENERATORS = {
+    'backtracker': (lambda args: backtracker_maze(args.width, args.height, args.seed), True),
+    'kruskal': (lambda args: kruskal_maze(args.width, args.height, args.seed), True),
+    'wilson': (lambda args: wilson_maze(args.width, args.height, args.seed), True),
+    'weighted-grid': (lambda args: weighted_grid(args.width, args.height, seed=args.seed), True),
+    'geometric': (_geometric_csr, False),
+    'power-law': (_power_law_csr, False)
+}
+
+
+def main(argv=None):
+    from snapshot import save_csr_snapshot, save_snapshot
+
+    parser = argparse.ArgumentParser(description="Generate a maze or synthetic graph and save it as a snapshot")
+    parser.add_argument('generator', choices=sorted(GENERATORS), help="what to generate")
+    parser.add_argument('--width', type=int, default=1000, help="grid columns")
+    parser.add_argument('--height', type=int, default=1000, help="grid rows")
+    parser.add_argument('--nodes', type=int, default=100000, help="number of nodes of non-grid graphs")
+    parser.add_argument('--braid', type=float, default=0.0, help="fraction of maze dead ends removed")
+    parser.add_argument('--costs', action='store_true', help="give maze cells random costs")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--output', help="snapshot file to write")
+    args = parser.parse_args(argv)
+
+    generate, is_grid = GENERATORS[args.generator]
+    start = time.perf_counter()
+    graph = generate(args)
+    if is_grid and args.braid:
+        braid_maze(graph, args.braid, args.seed)
+    if is_grid and args.costs:
+        randomize_costs(graph, seed=args.seed)
+    elapsed = time.perf_counter() - start
+
+    size = args.width * args.height if is_grid else args.nodes
+    unit = "cells" if is_grid else "nodes"
+    print(f"Generated {size} {unit} in {elapsed:.2f}s ({size / max(elapsed, 1e-9) / 1e6:.2f}M {unit}/s)",
+          file=sys.stderr)
+
+    if args.output:
+        if is_grid:
+            save_snapshot(args.output, graph)
+        else:
+            save_csr_snapshot(args.output, *graph)
+        elapsed = time.perf_counter() - start
+        print(f"Written to {args.output}, {elapsed:.2f}s in total ({size / max(elapsed, 1e-9) / 1e6:.2f}M {unit}/s)",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
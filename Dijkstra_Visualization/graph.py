@@ -1,11 +1,35 @@
-import pygame
 import math
+from collections.abc import Mapping
+
+class AdjacencyView(Mapping):
+    """Read-only {node: [(neighbor, weight), ...]} view of a Graph, with labels"""
+    
+    def __init__(self, graph):
+        self._graph = graph
+        
+    def __getitem__(self, node):
+        return self._graph.get_neighbors_of_id(self._graph.get_id(node))
+        
+    def __iter__(self):
+        return iter(self._graph._labels)
+        
+    def __len__(self):
+        return len(self._graph._labels)
+        
+    def __contains__(self, node):
+        return node in self._graph._ids
 
 class Graph:
     def __init__(self):
-        # Dictionary to store the graph as an adjacency list
-        # Format: {node: [(neighbor, weight), ...]}
-        self.graph = {}
+        # Node labels are interned to dense integer ids 0..n-1, in the order
+        # the nodes were added. The solver works on ids; labels are only used
+        # at the API boundary (get_neighbors, get_nodes, drawing)
+        self._ids = {}         # label -> id
+        self._labels = []      # id -> label
+        self._neighbors = []   # id -> [(neighbor id, weight), ...]
+        
+        # Adjacency list with labels, format: {node: [(neighbor, weight), ...]}
+        self.graph = AdjacencyView(self)
         
         # Node positions for rendering
         self.node_positions = {}
@@ -30,42 +54,121 @@ class Graph:
         # Arrow properties
         self.arrow_size = 10
         
-    def add_node(self, node, position):
-        """Add a node to the graph with position (x, y)"""
-        if node not in self.graph:
-            self.graph[node] = []
-        self.node_positions[node] = position
+    @classmethod
+    def from_adjacency(cls, labels, neighbors, node_positions=None):
+        """Build a graph in bulk from id-based adjacency lists
+        
+        Args:
+            labels: Label of every node id
+            neighbors: neighbors[i] is the list of (neighbor id, weight) of node i
+            node_positions: Optional {label: (x, y)} dictionary
+        """
+        graph = cls()
+        graph._labels = list(labels)
+        graph._ids = {label: node_id for node_id, label in enumerate(graph._labels)}
+        graph._neighbors = neighbors
+        if node_positions is not None:
+            graph.node_positions = node_positions
+        return graph
+        
+    def clear(self):
+        """Remove every node and edge"""
+        self._ids = {}
+        self._labels = []
+        self._neighbors = []
+        self.node_positions = {}
+        
+    def add_node(self, node, position=None):
+        """Add a node to the graph with an optional position (x, y)"""
+        self._intern(node)
+        if position is not None:
+            self.node_positions[node] = position
+            
+    def _intern(self, node):
+        """Id of a node, adding the node when it is new"""
+        node_id = self._ids.get(node)
+        if node_id is None:
+            node_id = len(self._labels)
+            self._ids[node] = node_id
+            self._labels.append(node)
+            self._neighbors.append([])
+        return node_id
         
     def add_edge(self, start, end, weight):
         """Add a directed edge from start to end with given weight"""
-        if start in self.graph:
-            # Check if edge already exists
-            for i, (neighbor, _) in enumerate(self.graph[start]):
-                if neighbor == end:
-                    # Update weight if edge exists
-                    self.graph[start][i] = (end, weight)
-                    return
-            # Add new edge
-            self.graph[start].append((end, weight))
-        else:
-            # Create node with this edge
-            self.graph[start] = [(end, weight)]
-            
+        ids = self._ids
+        start_id = ids.get(start)
+        if start_id is None:
+            start_id = self._intern(start)
+        end_id = ids.get(end)
+        if end_id is None:
+            end_id = self._intern(end)
+        neighbors = self._neighbors[start_id]
+        
+        # Check if edge already exists
+        for i, (neighbor, _) in enumerate(neighbors):
+            if neighbor == end_id:
+                # Update weight if edge exists
+                neighbors[i] = (end_id, weight)
+                return
+        # Add new edge
+        neighbors.append((end_id, weight))
+        
+    def has_node(self, node):
+        """True if the node is in the graph"""
+        return node in self._ids
+        
+    def get_id(self, node):
+        """Integer id of a node (KeyError for unknown nodes)"""
+        return self._ids[node]
+        
+    def get_label(self, node_id):
+        """Node label of an integer id"""
+        return self._labels[node_id]
+        
+    def get_labels(self, node_ids):
+        """List of the node labels of a sequence of ids"""
+        return list(map(self._labels.__getitem__, node_ids))
+        
+    def get_label_sequence(self):
+        """Sequence of the label of every id
+        
+        This is the stored list, callers must not change it. Indexing it is
+        cheaper than calling get_label in a loop.
+        """
+        return self._labels
+        
+    def get_node_count(self):
+        """Number of nodes; ids are 0..count-1"""
+        return len(self._labels)
+        
+    def get_id_neighbors(self, node_id):
+        """Return list of (neighbor id, weight) tuples for a node id
+        
+        This is the stored list, callers must not change it.
+        """
+        return self._neighbors[node_id]
+        
+    def get_neighbors_of_id(self, node_id):
+        """Return list of (neighbor, weight) tuples, with labels, for a node id"""
+        labels = self._labels
+        return [(labels[neighbor], weight) for neighbor, weight in self._neighbors[node_id]]
+        
     def get_neighbors(self, node):
         """Return list of (neighbor, weight) tuples for a node"""
-        if node in self.graph:
-            return self.graph[node]
-        return []
+        node_id = self._ids.get(node)
+        if node_id is None:
+            return []
+        return self.get_neighbors_of_id(node_id)
         
     def get_nodes(self):
         """Return list of all nodes in the graph"""
-        return list(self.graph.keys())
+        return list(self._labels)
         
     def load_example_graph(self):
         """Load the example graph shown in the provided image"""
         # Clear any existing graph
-        self.graph = {}
-        self.node_positions = {}
+        self.clear()
         
         # Define node positions based on a circle layout
         center_x, center_y = 400, 300
@@ -98,115 +201,11 @@ class Graph:
         
     def draw(self, screen, current_node=None, visited_nodes=None, 
              testing_edges=None, shortest_path=None, start_node=None, end_node=None):
-        """Draw the graph on the screen with visualization of algorithm state"""
-        if visited_nodes is None:
-            visited_nodes = []
-        if testing_edges is None:
-            testing_edges = []
-        if shortest_path is None:
-            shortest_path = []
-            
-        # Draw edges first (so they appear behind the nodes)
-        for start in self.graph:
-            start_pos = self.node_positions[start]
-            for end, weight in self.graph[start]:
-                end_pos = self.node_positions[end]
-                
-                # Determine edge color based on algorithm state
-                edge_color = self.colors['edge']
-                
-                # Check if this edge is part of the shortest path
-                if shortest_path and len(shortest_path) > 1:
-                    for i in range(len(shortest_path) - 1):
-                        if shortest_path[i] == start and shortest_path[i + 1] == end:
-                            edge_color = self.colors['shortest']
-                            break
-                
-                # Check if this edge is being tested
-                if (start, end) in testing_edges:
-                    edge_color = self.colors['testing']
-                
-                # Draw the edge line
-                self._draw_edge(screen, start_pos, end_pos, weight, edge_color)
-        
-        # Draw nodes
-        for node in self.graph:
-            # Determine node color based on algorithm state
-            node_color = self.colors['node']
-            
-            if node == current_node:
-                node_color = self.colors['current']
-            elif node in visited_nodes:
-                node_color = self.colors['visited']
-            
-            if node == start_node:
-                node_color = self.colors['start']
-            elif node == end_node:
-                node_color = self.colors['end']
-                
-            # Draw the node
-            pos = self.node_positions[node]
-            pygame.draw.circle(screen, node_color, pos, self.node_radius)
-            pygame.draw.circle(screen, self.colors['edge'], pos, self.node_radius, 2)
-            
-            # Draw node label
-            font = pygame.font.SysFont('Arial', 20)
-            text = font.render(str(node), True, self.colors['text'])
-            text_rect = text.get_rect(center=pos)
-            screen.blit(text, text_rect)
-    
-    def _draw_edge(self, screen, start_pos, end_pos, weight, color):
-        """Draw a directed edge with weight and arrow"""
-        # Calculate direction vector
-        dx = end_pos[0] - start_pos[0]
-        dy = end_pos[1] - start_pos[1]
-        distance = max(1, math.sqrt(dx * dx + dy * dy))
-        
-        # Normalize direction
-        dx, dy = dx / distance, dy / distance
-        
-        # Adjust start and end positions to account for node radius
-        adjusted_start_x = start_pos[0] + dx * self.node_radius
-        adjusted_start_y = start_pos[1] + dy * self.node_radius
-        adjusted_end_x = end_pos[0] - dx * self.node_radius
-        adjusted_end_y = end_pos[1] - dy * self.node_radius
-        
-        # Draw the line
-        pygame.draw.line(screen, color, 
-                         (adjusted_start_x, adjusted_start_y), 
-                         (adjusted_end_x, adjusted_end_y), 2)
-        
-        # Draw arrow at the end
-        self._draw_arrow(screen, (adjusted_end_x, adjusted_end_y), (dx, dy), color)
-        
-        # Draw weight
-        # Position the weight text in the middle of the edge
-        mid_x = (adjusted_start_x + adjusted_end_x) / 2
-        mid_y = (adjusted_start_y + adjusted_end_y) / 2
-        
-        # Offset the text slightly to the side of the edge
-        normal_x, normal_y = -dy, dx  # Normal vector to the edge
-        offset_x = mid_x + normal_x * 15
-        offset_y = mid_y + normal_y * 15
-        
-        font = pygame.font.SysFont('Arial', 16)
-        text = font.render(str(weight), True, color)
-        text_rect = text.get_rect(center=(offset_x, offset_y))
-        screen.blit(text, text_rect)
-    
-    def _draw_arrow(self, screen, pos, direction, color):
-        """Draw an arrow head at pos pointing in direction"""
-        dx, dy = direction
-        
-        # Calculate perpendicular vector
-        perp_dx, perp_dy = -dy, dx
-        
-        # Calculate arrow points
-        x, y = pos
-        point1 = (x - dx * self.arrow_size - perp_dx * self.arrow_size/2, 
-                  y - dy * self.arrow_size - perp_dy * self.arrow_size/2)
-        point2 = (x - dx * self.arrow_size + perp_dx * self.arrow_size/2, 
-                  y - dy * self.arrow_size + perp_dy * self.arrow_size/2)
-        
-        # Draw arrow head
-        pygame.draw.polygon(screen, color, [pos, point1, point2]) 
\ No newline at end of file
+        """Draw the graph on the screen with visualization of algorithm state
+        
+        The drawing code lives in renderer.py and is imported here, on the
+        first draw, so the graph can be used without pygame.
+        """
+        from renderer import draw_graph
+        draw_graph(self, screen, current_node, visited_nodes, testing_edges,
+                   shortest_path, start_node, end_node)
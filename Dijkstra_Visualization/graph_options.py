@@ -0,0 +1,51 @@
+import generators
+
+# Command line options choosing the graph of a run: a generated maze or a
+# snapshot file. Shared by the window, the headless renderer and the trace
+# recorder, which imports this without pygame.
+
+MAZE_GENERATORS = {
+    'backtracker': generators.backtracker_maze,
+    'kruskal': generators.kruskal_maze,
+    'wilson': generators.wilson_maze
+}
+
+
+def add_graph_arguments(parser):
+    """Add the options choosing the graph to an argparse parser"""
+    parser.add_argument('--maze', choices=sorted(MAZE_GENERATORS),
+                        help="solve a generated maze instead of the example graph")
+    parser.add_argument('--size', type=int, nargs=2, default=[40, 30], metavar=('WIDTH', 'HEIGHT'),
+                        help="maze size in cells")
+    parser.add_argument('--braid', type=float, default=0.0, help="fraction of maze dead ends removed")
+    parser.add_argument('--costs', action='store_true', help="give maze cells random costs")
+    parser.add_argument('--seed', type=int, default=0, help="random seed of the maze")
+    parser.add_argument('--snapshot', help="load the graph from a snapshot file written by generators.py")
+
+
+def graph_from_args(args):
+    """Graph chosen by the options of add_graph_arguments
+
+    Returns:
+        Graph or GridGraph, None when no option chose one
+    """
+    if args.maze:
+        graph = MAZE_GENERATORS[args.maze](args.size[0], args.size[1], args.seed)
+        if args.braid:
+            generators.braid_maze(graph, args.braid, args.seed)
+        if args.costs:
+            generators.randomize_costs(graph, seed=args.seed)
+        return graph
+    if args.snapshot:
+        from snapshot import load_snapshot
+        return load_snapshot(args.snapshot)
+    return None
+
+
+def corner_nodes(graph):
+    """Default (start, end) nodes: the first and the last node
+
+    For grids these are the top-left and the bottom-right cells.
+    """
+    nodes = graph.get_nodes()
+    return nodes[0], nodes[-1]
@@ -0,0 +1,168 @@
+# Wall bits in the low nibble of a cell; a set bit closes that side
+WALL_NORTH = 1
+WALL_EAST = 2
+WALL_SOUTH = 4
+WALL_WEST = 8
+ALL_WALLS = WALL_NORTH | WALL_EAST | WALL_SOUTH | WALL_WEST
+
+# The high nibble stores the cost of entering the cell minus one (1..16)
+MAX_COST = 16
+
+# Wall on the other side of the same passage
+OPPOSITE = {WALL_NORTH: WALL_SOUTH, WALL_EAST: WALL_WEST, WALL_SOUTH: WALL_NORTH, WALL_WEST: WALL_EAST}
+
+
+class GridGraph:
+    def __init__(self, width, height, closed=False, rect=(0, 0, 800, 600)):
+        """Grid graph whose edges are computed from the cells on demand
+
+        Every cell is one byte: four wall bits and a four bit cost. Nodes are
+        the cell ids row * width + column, and moving into a cell costs its
+        cost, so a cell needs no adjacency list.
+
+        Args:
+            width: Number of columns
+            height: Number of rows
+            closed: Start with every wall closed (to carve a maze) instead of
+                    only the walls around the border
+            rect: Area of the screen the grid is drawn in
+        """
+        self.width = width
+        self.height = height
+        self.rect = rect
+
+        # Incremented on every change, so drawing caches know when to rebuild
+        self.version = 0
+        self.draw_cache = None  # Owned by renderer.draw_grid
+
+        if closed:
+            self.cells = bytearray([ALL_WALLS]) * (width * height)
+        else:
+            self.cells = bytearray(width * height)
+            self._close_border()
+
+        # Colors for visualization (same meaning as in Graph)
+        self.colors = {
+            'cell': (250, 250, 250),           # Cell with cost 1
+            'expensive': (150, 140, 120),      # Cell with the highest cost
+            'wall': (30, 30, 30),
+            'visited': (100, 100, 255),
+            'testing': (255, 165, 0),
+            'shortest': (0, 200, 0),
+            'current': (0, 120, 255),
+            'start': (0, 255, 0),
+            'end': (255, 0, 0)
+        }
+
+    def _close_border(self):
+        """Close the walls on the outside of the grid"""
+        width, height = self.width, self.height
+        for column in range(width):
+            self.cells[column] |= WALL_NORTH
+            self.cells[(height - 1) * width + column] |= WALL_SOUTH
+        for row in range(height):
+            self.cells[row * width] |= WALL_WEST
+            self.cells[row * width + width - 1] |= WALL_EAST
+        self.version += 1
+
+    def node_id(self, row, column):
+        """Node of the cell at (row, column)"""
+        return row * self.width + column
+
+    def cell(self, node):
+        """(row, column) of a node"""
+        return divmod(node, self.width)
+
+    def has_node(self, node):
+        """True if the node is a cell of the grid"""
+        return isinstance(node, int) and 0 <= node < len(self.cells)
+
+    def get_id(self, node):
+        """Integer id of a node; cells are their own ids"""
+        if not self.has_node(node):
+            raise KeyError(node)
+        return node
+
+    def get_label(self, node_id):
+        """Node label of an integer id; cells are their own labels"""
+        return node_id
+
+    def get_labels(self, node_ids):
+        """List of the node labels of a sequence of ids"""
+        return list(node_ids)
+
+    def get_label_sequence(self):
+        """Sequence of the label of every id"""
+        return range(len(self.cells))
+
+    def get_node_count(self):
+        """Number of cells"""
+        return len(self.cells)
+
+    def get_neighbors(self, node):
+        """Return list of (neighbor, weight) tuples for a node"""
+        cells = self.cells
+        cell = cells[node]
+        neighbors = []
+        if not cell & WALL_NORTH:
+            neighbor = node - self.width
+            neighbors.append((neighbor, (cells[neighbor] >> 4) + 1))
+        if not cell & WALL_EAST:
+            neighbor = node + 1
+            neighbors.append((neighbor, (cells[neighbor] >> 4) + 1))
+        if not cell & WALL_SOUTH:
+            neighbor = node + self.width
+            neighbors.append((neighbor, (cells[neighbor] >> 4) + 1))
+        if not cell & WALL_WEST:
+            neighbor = node - 1
+            neighbors.append((neighbor, (cells[neighbor] >> 4) + 1))
+        return neighbors
+
+    # Node ids and labels are the same, so both lookups are get_neighbors
+    get_id_neighbors = get_neighbors
+    get_neighbors_of_id = get_neighbors
+
+    def get_nodes(self):
+        """Return all nodes of the grid (a range, not a materialized list)"""
+        return range(self.width * self.height)
+
+    def get_cost(self, node):
+        """Cost of entering a cell"""
+        return (self.cells[node] >> 4) + 1
+
+    def set_cost(self, node, cost):
+        """Set the cost (1..16) of entering a cell"""
+        if not 1 <= cost <= MAX_COST:
+            raise ValueError(f"Cell cost must be between 1 and {MAX_COST}, got {cost}")
+        self.cells[node] = (self.cells[node] & ALL_WALLS) | ((cost - 1) << 4)
+        self.version += 1
+
+    def set_passage(self, a, b, passable=True):
+        """Open (or close) the wall between two adjacent cells on both sides"""
+        wall = self._direction(a, b)
+        if passable:
+            self.cells[a] &= ~wall & 0xFF
+            self.cells[b] &= ~OPPOSITE[wall] & 0xFF
+        else:
+            self.cells[a] |= wall
+            self.cells[b] |= OPPOSITE[wall]
+        self.version += 1
+
+    def _direction(self, a, b):
+        """Wall of cell a that separates it from cell b"""
+        if b == a - self.width and a >= self.width:
+            return WALL_NORTH
+        if b == a + self.width and b < len(self.cells):
+            return WALL_SOUTH
+        if b == a + 1 and b % self.width != 0:
+            return WALL_EAST
+        if b == a - 1 and a % self.width != 0:
+            return WALL_WEST
+        raise ValueError(f"Cells {a} and {b} are not adjacent")
+
+    def draw(self, screen, current_node=None, visited_nodes=None,
+             testing_edges=None, shortest_path=None, start_node=None, end_node=None):
+        """Draw the grid as a bitmap inside self.rect (see renderer.draw_grid)"""
+        from renderer import draw_grid
+        draw_grid(self, screen, current_node, visited_nodes, testing_edges,
+                  shortest_path, start_node, end_node)
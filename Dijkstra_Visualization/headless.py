@@ -0,0 +1,162 @@
+import argparse
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+# Must be set before pygame is initialized
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+from main import add_visualization_arguments, visualization_from_args
+
+
+class FrameWriter:
+    def __init__(self, size, output_dir=None, pipe_command=None, queue_size=16):
+        """Write rendered frames on a background thread
+
+        Frames are queued as raw RGB bytes. The queue is bounded, so rendering
+        waits when the writer (or the encoder) cannot keep up.
+
+        Args:
+            size: Frame size (width, height)
+            output_dir: Directory for a frame_00000.png sequence
+            pipe_command: Shell command receiving raw RGB frames on stdin
+            queue_size: Maximum number of frames waiting to be written
+        """
+        self.size = size
+        self.output_dir = output_dir
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.process = None
+
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if pipe_command:
+            self.process = subprocess.Popen(shlex.split(pipe_command), stdin=subprocess.PIPE)
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, surface):
+        """Queue a copy of the surface, waiting while the queue is full"""
+        if self.error is not None:
+            raise self.error
+        self.frames.put(pygame.image.tostring(surface, 'RGB'))
+
+    def close(self):
+        """Write the remaining frames and stop the writer"""
+        self.frames.put(None)
+        self._thread.join()
+        if self.process is not None:
+            self.process.stdin.close()
+            self.process.wait()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        """Writer thread loop"""
+        index = 0
+        while True:
+            data = self.frames.get()
+            if data is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                if self.output_dir:
+                    frame = pygame.image.frombuffer(data, self.size, 'RGB')
+                    pygame.image.save(frame, os.path.join(self.output_dir, f"frame_{index:05d}.png"))
+                if self.process is not None:
+                    self.process.stdin.write(data)
+            except (OSError, pygame.error) as error:
+                # Keep draining the queue so the renderer never blocks forever
+                self.error = error
+            index += 1
+
+
+def render_run(app, writer=None, steps_per_frame=1, hold_frames=30, max_frames=None):
+    """Drive the visualization through a complete run, rendering every frame
+
+    Args:
+        app: DijkstraVisualization instance
+        writer: Optional FrameWriter receiving every frame
+        steps_per_frame: Algorithm steps executed between two frames
+        hold_frames: Frames rendered after the algorithm finished
+        max_frames: Stop after this many frames
+
+    Returns:
+        Number of frames rendered
+    """
+    # Let the layout converge before the run starts
+    app.finish_layout()
+
+    app.handle_button_click('init')
+    frames = 0
+    remaining_hold = hold_frames
+    while max_frames is None or frames < max_frames:
+        app.update()
+        app.draw()
+        if writer is not None:
+            writer.write(app.screen)
+        frames += 1
+
+        if app.dijkstra.finished:
+            if remaining_hold <= 0:
+                break
+            remaining_hold -= 1
+        else:
+            with app.algorithm_lock:
+                state = app.dijkstra.run_steps(steps_per_frame)
+            if state:
+                app.apply_state(state)
+    return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a run of the Dijkstra visualization without a display")
+    parser.add_argument('--output', help="directory for a PNG frame sequence")
+    parser.add_argument('--pipe', help="encoder command reading raw RGB frames from stdin; "
+                                       "{width}, {height} and {fps} are replaced")
+    parser.add_argument('--fps', type=int, default=30, help="frame rate passed to the encoder command")
+    parser.add_argument('--steps-per-frame', type=int, default=1, help="algorithm steps between frames")
+    parser.add_argument('--hold-frames', type=int, default=30, help="frames rendered after the run finished")
+    parser.add_argument('--max-frames', type=int, help="stop after this many frames")
+    parser.add_argument('--queue-size', type=int, default=16, help="frames buffered for the writer")
+    parser.add_argument('--profile', help="write render timings and algorithm counters to this JSON file")
+    add_visualization_arguments(parser)
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    app = visualization_from_args(args)
+    size = app.screen.get_size()
+    if args.profile:
+        app.toggle_profiling()
+
+    writer = None
+    if args.output or args.pipe:
+        pipe_command = None
+        if args.pipe:
+            pipe_command = args.pipe.format(width=size[0], height=size[1], fps=args.fps)
+        writer = FrameWriter(size, args.output, pipe_command, args.queue_size)
+
+    start = time.perf_counter()
+    frames = render_run(app, writer, args.steps_per_frame, args.hold_frames, args.max_frames)
+    if writer is not None:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    if args.profile:
+        app.export_profile(args.profile)
+
+    print(f"Rendered {frames} frames in {elapsed:.2f}s ({frames / max(elapsed, 1e-9):.1f} frames/s)",
+          file=sys.stderr)
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import pygame
 class HeapVisualizer:
     def __init__(self, rect, font_size=16):
         """Initialize heap visualizer in a specified rectangle
-        
+
         Args:
             rect: A rectangle (x, y, width, height) to contain the heap visualization
             font_size: Size of the font for text
@@ -11,7 +11,9 @@ class HeapVisualizer:
         self.rect = rect
         self.font_size = font_size
         self.font = pygame.font.SysFont('Arial', font_size)
-        
+        self.title_font = pygame.font.SysFont('Arial', font_size + 4, bold=True)
+        self.small_font = pygame.font.SysFont('Arial', font_size - 4)
+
         # Colors
         self.colors = {
             'background': (240, 240, 240),
@@ -21,180 +23,267 @@ class HeapVisualizer:
             'title': (0, 0, 0),
             'extracted': (255, 200, 200)
         }
-        
+
         # Node properties
         self.node_radius = 25
         self.last_extracted = None
-        
-    def draw(self, screen, heap_items, extracted_item=None):
+
+        # Layout of the content below the title and the last extracted item
+        self.header_height = 100
+        self.row_height = 40
+        self.level_height = 55
+        self.tree_node_radius = 18
+        self.min_node_spacing = 2 * self.tree_node_radius + 6
+
+        # View state: 'list' shows the items in priority order starting at
+        # scroll_offset, 'tree' shows the subtree rooted at heap index tree_root
+        self.mode = 'list'
+        self.scroll_offset = 0
+        self.tree_root = 0
+        self.total_items = 0
+
+        # Screen positions of the tree nodes drawn last frame, for clicks
+        self.tree_hitboxes = []
+
+    def toggle_mode(self):
+        """Switch between the list and the tree view"""
+        self.mode = 'tree' if self.mode == 'list' else 'list'
+
+    def visible_rows(self):
+        """Number of list rows that fit in the panel"""
+        return max(1, (self.rect[3] - self.header_height - 40) // self.row_height)
+
+    def visible_window(self):
+        """Ordered window (start, count) of queue items shown in list mode"""
+        return self.scroll_offset, self.visible_rows()
+
+    def visible_levels(self):
+        """Number of tree levels below tree_root that fit in the panel"""
+        by_height = max(1, (self.rect[3] - self.header_height) // self.level_height)
+        by_width = 1
+        while (2 ** by_width) * self.min_node_spacing <= self.rect[2] - 40:
+            by_width += 1
+        return min(by_height, by_width)
+
+    def visible_indices(self):
+        """Heap array indices of the subtree shown in tree mode"""
+        indices = []
+        level_start = [self.tree_root]
+        for _ in range(self.visible_levels()):
+            indices.extend(level_start)
+            level_start = [child for index in level_start for child in (2 * index + 1, 2 * index + 2)]
+        return indices
+
+    def scroll(self, amount):
+        """Scroll the list by amount rows, or move the tree view up/down
+
+        In tree mode scrolling up moves the view to the parent of the current
+        subtree root and scrolling down to its left child.
+        """
+        if self.mode == 'list':
+            limit = max(0, self.total_items - self.visible_rows())
+            self.scroll_offset = max(0, min(limit, self.scroll_offset + amount))
+        elif amount < 0:
+            for _ in range(-amount):
+                if self.tree_root > 0:
+                    self.tree_root = (self.tree_root - 1) // 2
+        else:
+            for _ in range(amount):
+                if 2 * self.tree_root + 1 < self.total_items:
+                    self.tree_root = 2 * self.tree_root + 1
+
+    def click(self, pos):
+        """Focus the tree view on the node at pos, returns True if one was hit"""
+        if self.mode != 'tree':
+            return False
+        for index, center in self.tree_hitboxes:
+            dx = pos[0] - center[0]
+            dy = pos[1] - center[1]
+            if dx * dx + dy * dy <= self.tree_node_radius ** 2:
+                self.tree_root = index
+                return True
+        return False
+
+    def draw(self, screen, heap_items, extracted_item=None, total_items=None):
         """Draw the heap visualization
-        
+
         Args:
             screen: Pygame screen to draw on
-            heap_items: List of (priority, node) tuples to visualize
+            heap_items: In list mode, (priority, node) tuples in priority order
+                        starting at scroll_offset. In tree mode, (index,
+                        (priority, node)) pairs for visible_indices()
             extracted_item: Last extracted (priority, node) from the heap
+            total_items: Number of items in the queue. When omitted, heap_items
+                         is the complete ordered queue
         """
+        if total_items is None:
+            total_items = len(heap_items)
+            if self.mode == 'list':
+                start, count = self.visible_window()
+                heap_items = heap_items[start:start + count]
+            else:
+                heap_items = [(index, heap_items[index]) for index in self.visible_indices()
+                              if index < total_items]
+        self.total_items = total_items
+        if self.tree_root >= total_items:
+            self.tree_root = 0
+
         # Draw background rectangle
         pygame.draw.rect(screen, self.colors['background'], self.rect)
         pygame.draw.rect(screen, self.colors['node_outline'], self.rect, 2)
-        
+
         # Draw title
-        title_font = pygame.font.SysFont('Arial', self.font_size + 4, bold=True)
-        title_text = title_font.render("Priority Queue (Min Heap)", True, self.colors['title'])
+        mode_name = "List" if self.mode == 'list' else "Tree"
+        title_text = self.title_font.render(f"Priority Queue (Min Heap) - {mode_name}", True, self.colors['title'])
         title_rect = title_text.get_rect(centerx=self.rect[0]+self.rect[2]//2, y=self.rect[1]+10)
         screen.blit(title_text, title_rect)
-        
+
         # Keep track of the last extracted item
         if extracted_item:
             self.last_extracted = extracted_item
-        
+
         # Draw the extracted item if available
         if self.last_extracted:
             y_pos = title_rect.bottom + 30
-            extracted_text = self.font.render(f"Last extracted: ({self.last_extracted[0]}, {self.last_extracted[1]})", 
+            extracted_text = self.font.render(f"Last extracted: ({self.last_extracted[0]}, {self.last_extracted[1]})",
                                            True, self.colors['text'])
             extracted_rect = extracted_text.get_rect(centerx=self.rect[0]+self.rect[2]//2, y=y_pos)
             screen.blit(extracted_text, extracted_rect)
-            
+
             # Draw red box around extracted
-            pygame.draw.rect(screen, self.colors['extracted'], 
-                            (extracted_rect.x - 5, extracted_rect.y - 5, 
+            pygame.draw.rect(screen, self.colors['extracted'],
+                            (extracted_rect.x - 5, extracted_rect.y - 5,
                              extracted_rect.width + 10, extracted_rect.height + 10), 2)
-            
-            start_y = extracted_rect.bottom + 20
-        else:
-            start_y = title_rect.bottom + 20
-        
+
+        # Content always starts at the same height so the number of visible
+        # rows does not depend on the extracted item
+        start_y = self.rect[1] + self.header_height
+
         # Draw the heap as a list
         if not heap_items:
+            self.tree_hitboxes = []
             empty_text = self.font.render("Queue is empty", True, self.colors['text'])
             empty_rect = empty_text.get_rect(centerx=self.rect[0]+self.rect[2]//2, y=start_y+20)
             screen.blit(empty_text, empty_rect)
             return
-        
+
         # Draw heap nodes
-        self._draw_heap_as_list(screen, heap_items, start_y)
-        
+        if self.mode == 'list':
+            self._draw_heap_as_list(screen, heap_items, start_y)
+        else:
+            self._draw_heap_as_tree(screen, dict(heap_items), start_y)
+
+    def _format_item(self, priority, node):
+        """Text for a (priority, node) item"""
+        if isinstance(priority, float) and priority == float('inf'):
+            priority_str = '∞'
+        else:
+            priority_str = str(priority)
+        return f"({priority_str}, {node})"
+
     def _draw_heap_as_list(self, screen, heap_items, start_y):
-        """Draw the heap as a vertical list
-        
+        """Draw the visible window of the heap as a vertical list
+
         Args:
             screen: Pygame screen to draw on
-            heap_items: List of (priority, node) tuples to visualize
+            heap_items: (priority, node) tuples in order, starting at scroll_offset
             start_y: Y coordinate to start drawing from
         """
         # Calculate maximum items that can fit
-        max_items = min(len(heap_items), (self.rect[3] - start_y - 20) // 40)
-        
-        for i in range(min(len(heap_items), max_items)):
+        max_items = min(len(heap_items), self.visible_rows())
+
+        for i in range(max_items):
             priority, node = heap_items[i]
-            
+
             # Y position for each node
-            y_pos = start_y + i * 40
-            
+            y_pos = start_y + i * self.row_height
+
             # Center of node
             center_x = self.rect[0] + self.rect[2] // 2
             center_y = y_pos + 20
-            
+
             # Draw circle for node
             pygame.draw.circle(screen, self.colors['node'], (center_x, center_y), self.node_radius)
             pygame.draw.circle(screen, self.colors['node_outline'], (center_x, center_y), self.node_radius, 2)
-            
+
             # Text for the node
-            if isinstance(priority, float) and priority == float('inf'):
-                priority_str = '∞'
-            else:
-                priority_str = str(priority)
-                
-            text = self.font.render(f"({priority_str}, {node})", True, self.colors['text'])
+            text = self.font.render(self._format_item(priority, node), True, self.colors['text'])
             text_rect = text.get_rect(center=(center_x, center_y))
             screen.blit(text, text_rect)
-            
-            # Add index label
-            index_text = self.font.render(f"{i}", True, self.colors['text'])
+
+            # Add rank label
+            index_text = self.font.render(f"{self.scroll_offset + i}", True, self.colors['text'])
             index_rect = index_text.get_rect(x=center_x - 40 - self.node_radius, centery=center_y)
             screen.blit(index_text, index_rect)
-        
-        # Show count of remaining items if not all shown
-        if len(heap_items) > max_items:
-            more_text = self.font.render(f"... {len(heap_items) - max_items} more items", True, self.colors['text'])
-            more_rect = more_text.get_rect(centerx=self.rect[0]+self.rect[2]//2, y=start_y + max_items * 40 + 10)
+
+        # Show count of items above and below the visible window
+        remaining = self.total_items - self.scroll_offset - max_items
+        if self.scroll_offset > 0 or remaining > 0:
+            more_text = self.font.render(f"{self.scroll_offset} above, {max(0, remaining)} more items (scroll)",
+                                         True, self.colors['text'])
+            more_rect = more_text.get_rect(centerx=self.rect[0]+self.rect[2]//2, y=start_y + max_items * self.row_height + 10)
             screen.blit(more_text, more_rect)
-    
+
     def _draw_heap_as_tree(self, screen, heap_items, start_y):
-        """Draw the heap as a binary tree (more advanced visualization)
-        
-        Note: This is more complex and may not always render well for larger heaps,
-        so we're using the list representation as the default.
-        
+        """Draw the visible subtree of the heap as a binary tree
+
+        Only the subtree rooted at tree_root is laid out, as deep as fits in
+        the panel. Click a node to show its subtree, scroll up to go back to
+        the parent.
+
         Args:
             screen: Pygame screen to draw on
-            heap_items: List of (priority, node) tuples to visualize
+            heap_items: Dictionary from heap index to (priority, node) for the visible indices
             start_y: Y coordinate to start drawing from
         """
-        if not heap_items:
-            return
-            
-        level_height = 70
-        max_levels = 4  # Limit levels to prevent overflow
-        
-        # Calculate the number of levels in the heap
-        levels = 0
-        total_nodes = 0
-        while total_nodes < len(heap_items) and levels < max_levels:
-            levels += 1
-            total_nodes += 2 ** (levels - 1)
-        
-        # Width of the tree visualization
+        self.tree_hitboxes = []
+        levels = self.visible_levels()
         tree_width = self.rect[2] - 40
-        
-        # Draw nodes level by level
+        start_y += self.tree_node_radius
+
+        def position(level, i):
+            node_spacing = tree_width / (2 ** level)
+            return (self.rect[0] + 20 + i * node_spacing + node_spacing / 2,
+                    start_y + level * self.level_height)
+
+        # Draw nodes level by level, relative to the subtree root
+        level_indices = [self.tree_root]
         for level in range(levels):
-            # Number of nodes at this level and previous levels
-            nodes_in_level = 2 ** level
-            start_index = 2 ** level - 1
-            
-            # Level spacing
-            level_width = tree_width
-            node_spacing = level_width / nodes_in_level
-            
-            for i in range(nodes_in_level):
-                node_index = start_index + i
-                if node_index >= len(heap_items):
-                    break
-                    
+            for i, node_index in enumerate(level_indices):
+                if node_index not in heap_items:
+                    continue
                 priority, node = heap_items[node_index]
-                
-                # Node position (centered)
-                x = self.rect[0] + 20 + i * node_spacing + node_spacing / 2
-                y = start_y + level * level_height
-                
+                x, y = position(level, i)
+
+                # Draw lines to children, or mark hidden children below the last level
+                for child_offset in (0, 1):
+                    child = 2 * node_index + 1 + child_offset
+                    if child >= self.total_items:
+                        continue
+                    if level + 1 < levels:
+                        child_x, child_y = position(level + 1, 2 * i + child_offset)
+                        pygame.draw.line(screen, self.colors['node_outline'], (x, y + self.tree_node_radius),
+                                         (child_x, child_y - self.tree_node_radius), 2)
+                    else:
+                        more_text = self.small_font.render("...", True, self.colors['text'])
+                        more_rect = more_text.get_rect(centerx=x, y=y + self.tree_node_radius)
+                        screen.blit(more_text, more_rect)
+
                 # Draw circle for node
-                pygame.draw.circle(screen, self.colors['node'], (x, y), self.node_radius)
-                pygame.draw.circle(screen, self.colors['node_outline'], (x, y), self.node_radius, 2)
-                
-                # Text for the node
-                if isinstance(priority, float) and priority == float('inf'):
-                    priority_str = '∞'
-                else:
-                    priority_str = str(priority)
-                    
-                text = self.font.render(f"({priority_str}, {node})", True, self.colors['text'])
+                pygame.draw.circle(screen, self.colors['node'], (x, y), self.tree_node_radius)
+                pygame.draw.circle(screen, self.colors['node_outline'], (x, y), self.tree_node_radius, 2)
+
+                text = self.small_font.render(self._format_item(priority, node), True, self.colors['text'])
                 text_rect = text.get_rect(center=(x, y))
                 screen.blit(text, text_rect)
-                
-                # Draw lines to children
-                left_child = 2 * node_index + 1
-                right_child = 2 * node_index + 2
-                
-                if left_child < len(heap_items):
-                    left_x = self.rect[0] + 20 + (2 * i) * (node_spacing / 2) + node_spacing / 4
-                    left_y = start_y + (level + 1) * level_height
-                    pygame.draw.line(screen, self.colors['node_outline'], (x, y + self.node_radius), 
-                                   (left_x, left_y - self.node_radius), 2)
-                    
-                if right_child < len(heap_items):
-                    right_x = self.rect[0] + 20 + (2 * i + 1) * (node_spacing / 2) + node_spacing / 4
-                    right_y = start_y + (level + 1) * level_height
-                    pygame.draw.line(screen, self.colors['node_outline'], (x, y + self.node_radius), 
-                                   (right_x, right_y - self.node_radius), 2) 
\ No newline at end of file
+                self.tree_hitboxes.append((node_index, (x, y)))
+
+            level_indices = [child for index in level_indices for child in (2 * index + 1, 2 * index + 2)]
+
+        # Show where the subtree is located in the heap
+        if self.tree_root > 0:
+            root_text = self.small_font.render(f"Subtree at heap index {self.tree_root} (scroll up for parent)",
+                                               True, self.colors['text'])
+            root_rect = root_text.get_rect(centerx=self.rect[0]+self.rect[2]//2,
+                                           bottom=self.rect[1] + self.rect[3] - 5)
+            screen.blit(root_text, root_rect)
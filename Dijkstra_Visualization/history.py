@@ -0,0 +1,328 @@
+import heapq
+
+from dijkstra import LogTail, StepListener, NO_NODE
+
+# Rough memory cost, in bytes, of one stored entry (a tuple in a delta or an
+# item of the heap in a checkpoint)
+ENTRY_BYTES = 100
+
+# Memory cost of one node in a checkpoint: distance and predecessor list
+# slots and the visited flag
+NODE_BYTES = 17
+
+# Rough memory cost, in bytes, of one kept log line
+LOG_BYTES = 150
+
+# Number of log lines kept in the algorithm while scrubbing through the history
+LOG_TAIL = 50
+
+
+class _StepDelta:
+    """Changes made by one step, stored so that the step can be undone
+
+    Nodes are graph ids, like in the algorithm state.
+    """
+    __slots__ = ('popped', 'updated', 'settled', 'current_id', 'testing_ids', 'step_count', 'log_count')
+
+    def __init__(self, algorithm):
+        self.popped = []    # (distance, node) entries removed from the queue
+        self.updated = []   # (node, new_distance, old_distance, old_predecessor)
+        self.settled = NO_NODE
+        self.current_id = algorithm.current_id
+        self.testing_ids = algorithm.testing_ids
+        self.step_count = algorithm.step_count
+        self.log_count = algorithm.logs.total
+
+    def size(self):
+        """Approximate memory used by the delta, in bytes"""
+        return ENTRY_BYTES * (4 + len(self.popped) + len(self.updated) + len(self.testing_ids))
+
+
+class StepHistory(StepListener):
+    def __init__(self, algorithm, checkpoint_interval=100, memory_budget=64 * 1024 * 1024):
+        """Record the steps of an algorithm so any step can be restored
+
+        The history keeps a full checkpoint of the state every
+        checkpoint_interval steps and, for every step, a compact reverse delta
+        with just what the step changed. Restoring step N loads the nearest
+        checkpoint at or after N and undoes at most checkpoint_interval steps.
+
+        When the recorded data grows beyond memory_budget, the oldest part of
+        the history is dropped. Steps before the remaining history are still
+        reachable by re-running the algorithm from the start.
+
+        Args:
+            algorithm: Initialized DijkstraAlgorithm to record
+            checkpoint_interval: Number of steps between two full checkpoints
+            memory_budget: Approximate maximum memory of the history, in bytes
+        """
+        if not algorithm.recordable:
+            raise ValueError(f"{algorithm.name} steps cannot be recorded")
+        self.algorithm = algorithm
+        self.checkpoint_interval = checkpoint_interval
+        self.memory_budget = memory_budget
+
+        self.position = 0  # Number of steps executed to reach the current state
+        self.head = 0      # Latest step recorded
+        self.first = 0     # Earliest step that can be restored from the history
+        self.deltas = []   # deltas[i] undoes the step from first + i to first + i + 1
+        self.checkpoints = {}
+        self.memory_used = 0
+
+        # Latest logs at the head (the algorithm keeps a bounded tail of its
+        # logs); behind the head the algorithm shows the part of them written
+        # up to the current step
+        self.head_logs = algorithm.logs
+        self.log_bytes = 0
+        self._count_logs()
+
+        self._delta = None
+        self._replaying = False
+
+        self._take_checkpoint()
+        algorithm.listeners.append(self)
+
+    def detach(self):
+        """Stop recording the algorithm"""
+        if self in self.algorithm.listeners:
+            self.algorithm.listeners.remove(self)
+
+    def seek(self, target):
+        """Restore the algorithm state after the given number of steps
+
+        Targets past the head are reached by executing (and recording) new
+        steps, so the result may stop short of target when the algorithm
+        finishes first.
+
+        Returns:
+            The step number that was restored
+        """
+        target = max(0, target)
+        if target == self.position:
+            return self.position
+
+        if target > self.head:
+            self.seek(self.head)
+            while self.position < target and not self.algorithm.finished:
+                self.algorithm._advance()
+            return self.position
+
+        if target < self.first:
+            self._replay(target)
+            return self.position
+
+        # Leaving the head: keep a checkpoint there to come back to it
+        if self.position == self.head and self.head not in self.checkpoints:
+            self._take_checkpoint()
+
+        if target > self.position or self.position < self.first:
+            checkpoint = min(p for p in self.checkpoints if p >= target)
+            self._restore_checkpoint(checkpoint)
+        self._undo_until(target)
+        return self.position
+
+    def step_started(self, algorithm):
+        if self._replaying:
+            return
+        if self.position < self.head or self.position < self.first:
+            self._truncate()
+        self._delta = _StepDelta(algorithm)
+
+    def node_popped(self, distance, node):
+        if self._delta is not None:
+            self._delta.popped.append((distance, node))
+
+    def node_settled(self, node):
+        if self._delta is not None:
+            self._delta.settled = node
+
+    def edge_relaxed(self, node, neighbor, new_distance, improved, old_distance, old_predecessor):
+        if improved and self._delta is not None:
+            self._delta.updated.append((neighbor, new_distance, old_distance, old_predecessor))
+
+    def step_finished(self, algorithm):
+        if self._replaying:
+            self.position += 1
+            return
+        delta = self._delta
+        self._delta = None
+        self.deltas.append(delta)
+        self.memory_used += delta.size()
+        self.position += 1
+        self.head = self.position
+        self.head_logs = algorithm.logs
+        self._count_logs()
+
+        if self.position % self.checkpoint_interval == 0 or algorithm.finished:
+            self._take_checkpoint()
+        self._enforce_budget()
+
+    def _take_checkpoint(self):
+        """Store a full copy of the current state"""
+        algorithm = self.algorithm
+        checkpoint = {
+            'dist': algorithm.dist.copy(),
+            'pred': algorithm.pred.copy(),
+            'settled': algorithm.settled[:],
+            'settle_order': algorithm.settle_order.copy(),
+            'priority_queue': algorithm.priority_queue.copy(),
+            'current_id': algorithm.current_id,
+            'testing_ids': algorithm.testing_ids,
+            'step_count': algorithm.step_count,
+            'log_count': algorithm.logs.total,
+            'finished': algorithm.finished,
+            'path': list(algorithm.path)
+        }
+        checkpoint['size'] = (NODE_BYTES * len(checkpoint['dist']) + 8 * len(checkpoint['settle_order'])
+                              + ENTRY_BYTES * len(checkpoint['priority_queue']))
+        self.checkpoints[self.position] = checkpoint
+        self.memory_used += checkpoint['size']
+
+    def _restore_checkpoint(self, position):
+        """Load the checkpoint taken after the given number of steps"""
+        algorithm = self.algorithm
+        checkpoint = self.checkpoints[position]
+        algorithm.dist = checkpoint['dist'].copy()
+        algorithm.pred = checkpoint['pred'].copy()
+        algorithm.settled = checkpoint['settled'][:]
+        algorithm.settle_order = checkpoint['settle_order'].copy()
+        algorithm.priority_queue = checkpoint['priority_queue'].copy()
+        algorithm.current_id = checkpoint['current_id']
+        algorithm.testing_ids = checkpoint['testing_ids']
+        algorithm.step_count = checkpoint['step_count']
+        algorithm.finished = checkpoint['finished']
+        algorithm.path = list(checkpoint['path'])
+        self._set_logs(checkpoint['log_count'])
+        self.position = position
+        algorithm.steps_taken = position
+
+    def _undo_until(self, target):
+        """Undo the recorded steps from the current position back to target"""
+        if target >= self.position:
+            return
+        algorithm = self.algorithm
+        dist = algorithm.dist
+        pred = algorithm.pred
+        potential = algorithm.potential
+        removed = {}
+        restored = []
+        delta = None
+        for position in range(self.position - 1, target - 1, -1):
+            delta = self.deltas[position - self.first]
+            for node, new_distance, old_distance, old_predecessor in reversed(delta.updated):
+                dist[node] = old_distance
+                pred[node] = old_predecessor
+                # The entry pushed by the step, keyed like in the algorithm
+                entry = (new_distance if potential is None else new_distance + potential[node], node)
+                removed[entry] = removed.get(entry, 0) + 1
+            restored.extend(delta.popped)
+            if delta.settled != NO_NODE:
+                # Steps are undone newest first, so the node is the last one settled
+                algorithm.settled[delta.settled] = 0
+                algorithm.settle_order.pop()
+
+        # Rebuild the queue once: drop the pushed entries, add the popped ones
+        queue = []
+        for entry in algorithm.priority_queue:
+            if removed.get(entry):
+                removed[entry] -= 1
+            else:
+                queue.append(entry)
+        for entry in restored:
+            if removed.get(entry):
+                removed[entry] -= 1
+            else:
+                queue.append(entry)
+        heapq.heapify(queue)
+        algorithm.priority_queue = queue
+
+        algorithm.current_id = delta.current_id
+        algorithm.testing_ids = delta.testing_ids
+        algorithm.step_count = delta.step_count
+        algorithm.finished = False
+        algorithm.path = []
+        self._set_logs(delta.log_count)
+        self.position = target
+        algorithm.steps_taken = target
+
+    def _count_logs(self):
+        """Keep the log lines held at the head counted in memory_used"""
+        size = LOG_BYTES * len(self.head_logs)
+        self.memory_used += size - self.log_bytes
+        self.log_bytes = size
+
+    def _logs_until(self, count, tail=None):
+        """Logs as they were after count lines, from the lines still kept at the head"""
+        head_logs = self.head_logs
+        first_kept = head_logs.total - len(head_logs)
+        start = max(0, count - tail) if tail else 0
+        lines = list(head_logs)[max(0, start - first_kept):max(0, count - first_kept)]
+        if tail and start < first_kept:
+            lines.insert(0, "(Older log lines are no longer kept)")
+        return LogTail(lines, total=count)
+
+    def _set_logs(self, count):
+        """Show the logs written up to count while behind the head"""
+        if count == self.head_logs.total:
+            self.algorithm.logs = self.head_logs
+        else:
+            self.algorithm.logs = self._logs_until(count, LOG_TAIL)
+
+    def _replay(self, target):
+        """Reach a step before the recorded history by re-running the algorithm"""
+        algorithm = self.algorithm
+        if self.position == self.head and self.head not in self.checkpoints:
+            self._take_checkpoint()
+        if target < self.position:
+            algorithm.initialize(algorithm.start_node, algorithm.end_node)
+            self.position = 0
+        self._replaying = True
+        try:
+            while self.position < target and not algorithm.finished:
+                algorithm._advance()
+        finally:
+            self._replaying = False
+
+    def _truncate(self):
+        """Forget the steps after the current position before recording new ones"""
+        algorithm = self.algorithm
+        if self.position < self.first:
+            # Replayed state before the history: start a new history from here
+            self.deltas = []
+            self.checkpoints = {}
+            self.memory_used = 0
+            self.log_bytes = 0
+            self.first = self.position
+            self.head = self.position
+            self._take_checkpoint()
+            self.head_logs = algorithm.logs
+            self._count_logs()
+            return
+
+        if self.position in self.checkpoints:
+            log_count = self.checkpoints[self.position]['log_count']
+        else:
+            log_count = self.deltas[self.position - self.first].log_count
+
+        for delta in self.deltas[self.position - self.first:]:
+            self.memory_used -= delta.size()
+        del self.deltas[self.position - self.first:]
+        for position in [p for p in self.checkpoints if p > self.position]:
+            self.memory_used -= self.checkpoints.pop(position)['size']
+        self.head = self.position
+        algorithm.logs = self._logs_until(log_count)
+        self.head_logs = algorithm.logs
+        self._count_logs()
+
+    def _enforce_budget(self):
+        """Drop the oldest part of the history while it is over budget"""
+        while self.memory_used > self.memory_budget:
+            positions = sorted(self.checkpoints)
+            if len(positions) < 2 or positions[1] > self.position:
+                break
+            first_kept = positions[1]
+            for delta in self.deltas[:first_kept - self.first]:
+                self.memory_used -= delta.size()
+            del self.deltas[:first_kept - self.first]
+            self.memory_used -= self.checkpoints.pop(positions[0])['size']
+            self.first = first_kept
@@ -0,0 +1,525 @@
+import argparse
+import bisect
+import heapq
+import json
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+from dijkstra import NO_NODE, shortest_path_tree
+from queries import reverse_adjacency
+from query_cli import load_graph
+from server import percentile
+
+# Hub labeling distance oracle, built with pruned landmark labeling.
+#
+# Every node v gets an out-label, pairs (hub, distance from v to the hub),
+# and an in-label, pairs (hub, distance from the hub to v), such that every
+# shortest path from s to t passes through a hub of both the out-label of s
+# and the in-label of t. The distance is then the smallest sum over the
+# hubs the two labels share, found by merging them, without any search.
+#
+# Hubs are numbered by rank (the order nodes were processed in), and every
+# label is sorted by rank because the labels are built rank by rank.
+#
+# File layout (little endian), like the graph snapshots: a HEADER padded to
+# ALIGNMENT bytes, then the sections, each at a multiple of ALIGNMENT so
+# they can be memory mapped. Labels are stored in CSR form: the out-label
+# of node v is out_hubs[out_offsets[v]:out_offsets[v + 1]] with the
+# matching out_distances (and out_parents, the next node towards the hub,
+# when paths were kept).
+MAGIC = b'DJHL'
+VERSION = 1
+ALIGNMENT = 64
+
+# Flags
+FLAG_INT_DISTANCES = 1  # distances are int64 instead of float64
+FLAG_PARENTS = 2  # parent sections present, paths can be rebuilt
+FLAG_LABELS = 4  # labels section present, otherwise node i is labeled i
+
+# Sections, in file order
+SECTIONS = ['order', 'out_offsets', 'out_hubs', 'out_distances', 'out_parents',
+            'in_offsets', 'in_hubs', 'in_distances', 'in_parents', 'labels']
+
+# magic, version, flags, padding, node count, label entry count, then
+# (offset, length) in bytes of every section
+HEADER = struct.Struct('<4sBBHQQ' + 'QQ' * len(SECTIONS))
+
+# Shortest path trees sampled to order the hubs
+DEFAULT_ORDER_SAMPLES = 64
+
+
+def _aligned(position):
+    """Round position up to the next multiple of ALIGNMENT"""
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _section_dtype(flags, name):
+    """Numpy dtype of a section"""
+    if name in ('out_offsets', 'in_offsets'):
+        return np.int64
+    if name in ('out_distances', 'in_distances'):
+        return np.int64 if flags & FLAG_INT_DISTANCES else np.float64
+    if name == 'labels':
+        return np.uint8
+    return np.int32
+
+
+def hub_order(graph, reverse=None, samples=DEFAULT_ORDER_SAMPLES, seed=0):
+    """Nodes in the order they become hubs, most covering first
+
+    Nodes on many shortest paths should come first, since every later
+    search is pruned by the labels of the earlier hubs. Each node is scored
+    by the number of nodes below it in the shortest path trees of a few
+    random sources, a cheap estimate of how many shortest paths cross it;
+    ties (and samples=0) fall back to the degree.
+
+    Args:
+        graph: Graph with the integer id interface
+        reverse: reverse_adjacency(graph), computed when not given
+        samples: Number of sampled shortest path trees
+        seed: Random seed of the sample sources
+
+    Returns:
+        List of node ids
+    """
+    node_count = graph.get_node_count()
+    if reverse is None:
+        reverse = reverse_adjacency(graph)
+    degrees = [len(graph.get_id_neighbors(node)) + len(reverse[node]) for node in range(node_count)]
+
+    coverage = [0] * node_count
+    rng = random.Random(seed)
+    for _ in range(min(samples, node_count)):
+        dist, pred, _ = shortest_path_tree(graph, rng.randrange(node_count))
+        # Add every subtree size to the parent, deepest nodes first
+        below = [1] * node_count
+        for node in sorted((node for node in range(node_count) if pred[node] != NO_NODE),
+                           key=dist.__getitem__, reverse=True):
+            below[pred[node]] += below[node]
+            coverage[node] += below[node]
+    return sorted(range(node_count), key=lambda node: (-coverage[node], -degrees[node], node))
+
+
+def build_hub_labels(graph, keep_paths=False, order=None, log=None):
+    """Compute hub labels with pruned landmark labeling
+
+    For every hub in order, a forward Dijkstra search adds the hub to the
+    in-label of the nodes it settles and a backward one to their out-labels.
+    A search does not add nor expand a node whose distance the labels built
+    so far already give, which keeps both the searches and the labels small.
+
+    Args:
+        graph: Graph with the integer id interface
+        keep_paths: Also store, for every label entry, the next node on the
+                    path to the hub, so paths can be rebuilt
+        order: Node ids in hub order, by default hub_order(graph)
+        log: Optional function called with progress messages
+
+    Returns:
+        HubLabels
+    """
+    node_count = graph.get_node_count()
+    reverse = reverse_adjacency(graph)
+    if order is None:
+        order = hub_order(graph, reverse)
+
+    out_hubs = [[] for _ in range(node_count)]
+    out_distances = [[] for _ in range(node_count)]
+    in_hubs = [[] for _ in range(node_count)]
+    in_distances = [[] for _ in range(node_count)]
+    out_parents = [[] for _ in range(node_count)] if keep_paths else None
+    in_parents = [[] for _ in range(node_count)] if keep_paths else None
+
+    forward_edges = graph.get_id_neighbors
+    backward_edges = reverse.__getitem__
+    report_every = max(1, node_count // 10)
+    for rank, hub in enumerate(order):
+        # Forward: distances from the hub, into the in-labels, pruned with
+        # the out-label of the hub
+        _pruned_search(hub, rank, forward_edges, dict(zip(out_hubs[hub], out_distances[hub])),
+                       in_hubs, in_distances, in_parents)
+        # Backward: distances to the hub, into the out-labels
+        _pruned_search(hub, rank, backward_edges, dict(zip(in_hubs[hub], in_distances[hub])),
+                       out_hubs, out_distances, out_parents)
+        if log and (rank + 1) % report_every == 0:
+            entries = sum(map(len, out_hubs)) + sum(map(len, in_hubs))
+            log(f"{rank + 1}/{node_count} hubs, {entries} label entries")
+
+    return HubLabels.from_lists(order, out_hubs, out_distances, in_hubs, in_distances,
+                                out_parents, in_parents, graph.get_label_sequence())
+
+
+def _pruned_search(hub, rank, edges, hub_label, hubs, distances, parents):
+    """One pruned Dijkstra search of pruned landmark labeling
+
+    Args:
+        hub: Node id of the hub
+        rank: Rank of the hub
+        edges: Function returning the (node id, weight) edges to follow
+        hub_label: {rank: distance} label of the hub in the opposite
+                   direction, to check whether the labels already cover a node
+        hubs, distances, parents: Labels the search adds (rank, distance) to
+    """
+    inf = float('inf')
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    dist = {hub: 0}
+    parent = {hub: NO_NODE}
+    done = set()
+    queue = [(0, hub)]
+    while queue:
+        distance, node = heappop(queue)
+        if node in done:
+            continue
+        done.add(node)
+
+        # Pruned when an earlier hub is on a path at least as short
+        covered = False
+        for other, other_distance in zip(hubs[node], distances[node]):
+            via = hub_label.get(other)
+            if via is not None and via + other_distance <= distance:
+                covered = True
+                break
+        if covered:
+            continue
+
+        hubs[node].append(rank)
+        distances[node].append(distance)
+        if parents is not None:
+            parents[node].append(parent[node])
+        for neighbor, weight in edges(node):
+            new_distance = distance + weight
+            if new_distance < dist.get(neighbor, inf):
+                dist[neighbor] = new_distance
+                parent[neighbor] = node
+                heappush(queue, (new_distance, neighbor))
+
+
+class HubLabels:
+    def __init__(self, order, arrays, labels=None):
+        """Hub labels in CSR arrays; use build_hub_labels or HubLabels.load
+
+        Args:
+            order: Node id of every hub rank
+            arrays: {section: array} for the out_* and in_* sections
+            labels: Node label of every id, None when the labels are the ids
+        """
+        self.order = order
+        self.node_count = len(order)
+        self.out_offsets = arrays['out_offsets']
+        self.out_hubs = arrays['out_hubs']
+        self.out_distances = arrays['out_distances']
+        self.out_parents = arrays.get('out_parents')
+        self.in_offsets = arrays['in_offsets']
+        self.in_hubs = arrays['in_hubs']
+        self.in_distances = arrays['in_distances']
+        self.in_parents = arrays.get('in_parents')
+        self.labels = labels
+        self._ids = {label: node_id for node_id, label in enumerate(labels)} if labels is not None else None
+
+    @classmethod
+    def from_lists(cls, order, out_hubs, out_distances, in_hubs, in_distances,
+                   out_parents=None, in_parents=None, labels=None):
+        """Pack per-node label lists into CSR arrays"""
+        int_distances = all(isinstance(distance, int) for lists in (out_distances, in_distances)
+                            for values in lists for distance in values)
+        distance_dtype = np.int64 if int_distances else np.float64
+
+        def pack(lists, dtype):
+            return np.fromiter((value for values in lists for value in values), dtype=dtype,
+                               count=sum(map(len, lists)))
+
+        def offsets(lists):
+            result = np.zeros(len(lists) + 1, dtype=np.int64)
+            np.cumsum([len(values) for values in lists], out=result[1:])
+            return result
+
+        arrays = {
+            'out_offsets': offsets(out_hubs),
+            'out_hubs': pack(out_hubs, np.int32),
+            'out_distances': pack(out_distances, distance_dtype),
+            'in_offsets': offsets(in_hubs),
+            'in_hubs': pack(in_hubs, np.int32),
+            'in_distances': pack(in_distances, distance_dtype)
+        }
+        if out_parents is not None:
+            arrays['out_parents'] = pack(out_parents, np.int32)
+            arrays['in_parents'] = pack(in_parents, np.int32)
+        if labels is not None and list(labels) == list(range(len(order))):
+            labels = None
+        return cls(np.asarray(order, dtype=np.int32), arrays, list(labels) if labels is not None else None)
+
+    @property
+    def has_paths(self):
+        return self.out_parents is not None
+
+    def entry_count(self):
+        """Total number of (hub, distance) entries of all labels"""
+        return len(self.out_hubs) + len(self.in_hubs)
+
+    def get_id(self, node):
+        """Node id of a label (KeyError for unknown nodes)"""
+        if self._ids is not None:
+            return self._ids[node]
+        if not (isinstance(node, int) and 0 <= node < self.node_count):
+            raise KeyError(node)
+        return node
+
+    def _best_hub(self, source_id, target_id):
+        """(distance, position in the out-label, position in the in-label) of the best common hub"""
+        start, end = self.out_offsets[source_id:source_id + 2].tolist()
+        out_hubs = self.out_hubs[start:end].tolist()
+        out_distances = self.out_distances[start:end].tolist()
+        in_start, in_end = self.in_offsets[target_id:target_id + 2].tolist()
+        in_hubs = self.in_hubs[in_start:in_end].tolist()
+        in_distances = self.in_distances[in_start:in_end].tolist()
+
+        # Both labels are sorted by hub rank: merge them
+        best = (float('inf'), -1, -1)
+        i = j = 0
+        out_count, in_count = len(out_hubs), len(in_hubs)
+        while i < out_count and j < in_count:
+            out_hub, in_hub = out_hubs[i], in_hubs[j]
+            if out_hub == in_hub:
+                distance = out_distances[i] + in_distances[j]
+                if distance < best[0]:
+                    best = (distance, start + i, in_start + j)
+                i += 1
+                j += 1
+            elif out_hub < in_hub:
+                i += 1
+            else:
+                j += 1
+        return best
+
+    def distance_ids(self, source_id, target_id):
+        """Shortest path distance between two node ids (inf when unreachable)"""
+        return self._best_hub(source_id, target_id)[0]
+
+    def distance(self, source, target):
+        """Shortest path distance between two nodes (inf when unreachable)"""
+        return self.distance_ids(self.get_id(source), self.get_id(target))
+
+    def path_ids(self, source_id, target_id):
+        """(distance, node ids of a shortest path), ([] when unreachable)
+
+        Needs labels built with keep_paths.
+        """
+        if not self.has_paths:
+            raise ValueError("Hub labels were built without paths (keep_paths=False)")
+        distance, out_position, in_position = self._best_hub(source_id, target_id)
+        if out_position < 0:
+            return distance, []
+        rank = int(self.out_hubs[out_position])
+        hub = int(self.order[rank])
+
+        # Every node on the way to (or from) the hub has the hub in its label
+        path = [source_id]
+        node = source_id
+        while node != hub:
+            node = int(self.out_parents[self._position(self.out_offsets, self.out_hubs, node, rank)])
+            path.append(node)
+        back = []
+        node = target_id
+        while node != hub:
+            back.append(node)
+            node = int(self.in_parents[self._position(self.in_offsets, self.in_hubs, node, rank)])
+        path.extend(reversed(back))
+        return distance, path
+
+    def path(self, source, target):
+        """(distance, node labels of a shortest path), ([] when unreachable)"""
+        distance, path = self.path_ids(self.get_id(source), self.get_id(target))
+        if self.labels is not None:
+            path = [self.labels[node] for node in path]
+        return distance, path
+
+    @staticmethod
+    def _position(offsets, hubs, node, rank):
+        """Position of a hub rank in the label of a node"""
+        start, end = offsets[node:node + 2].tolist()
+        return start + bisect.bisect_left(hubs[start:end].tolist(), rank)
+
+    def save(self, path):
+        """Write the labels to a file"""
+        flags = 0
+        if self.out_distances.dtype == np.int64:
+            flags |= FLAG_INT_DISTANCES
+        arrays = {
+            'order': self.order,
+            'out_offsets': self.out_offsets,
+            'out_hubs': self.out_hubs,
+            'out_distances': self.out_distances,
+            'in_offsets': self.in_offsets,
+            'in_hubs': self.in_hubs,
+            'in_distances': self.in_distances
+        }
+        if self.has_paths:
+            flags |= FLAG_PARENTS
+            arrays['out_parents'] = self.out_parents
+            arrays['in_parents'] = self.in_parents
+        if self.labels is not None:
+            flags |= FLAG_LABELS
+            arrays['labels'] = np.frombuffer(json.dumps(self.labels).encode('utf-8'), dtype=np.uint8)
+
+        layout = []
+        position = _aligned(HEADER.size)
+        for name in SECTIONS:
+            length = arrays[name].nbytes if name in arrays else 0
+            layout.extend((position if length else 0, length))
+            if length:
+                position = _aligned(position + length)
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, flags, 0, self.node_count, self.entry_count(), *layout))
+            for index, name in enumerate(SECTIONS):
+                if layout[2 * index + 1]:
+                    file.seek(layout[2 * index])
+                    file.write(np.ascontiguousarray(arrays[name]).tobytes())
+            file.truncate(position)
+
+    @classmethod
+    def load(cls, path):
+        """Open a label file; the arrays are memory mapped, not read"""
+        with open(path, 'rb') as file:
+            data = file.read(HEADER.size)
+        if len(data) < HEADER.size:
+            raise ValueError("Not a hub label file: file too short")
+        values = HEADER.unpack(data)
+        magic, version, flags, _, node_count, _ = values[:6]
+        if magic != MAGIC:
+            raise ValueError("Not a hub label file: bad magic")
+        if version != VERSION:
+            raise ValueError(f"Unsupported hub label file version {version}")
+
+        arrays = {}
+        for index, name in enumerate(SECTIONS):
+            offset, length = values[6 + 2 * index], values[7 + 2 * index]
+            dtype = np.dtype(_section_dtype(flags, name))
+            if length:
+                # Plain array views of the mapping slice faster than memmaps
+                arrays[name] = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+                                         shape=(length // dtype.itemsize,)).view(np.ndarray)
+            elif name in ('out_hubs', 'out_distances', 'in_hubs', 'in_distances'):
+                arrays[name] = np.zeros(0, dtype=dtype)
+        labels = None
+        if flags & FLAG_LABELS:
+            labels = json.loads(arrays.pop('labels').tobytes().decode('utf-8'))
+        return cls(arrays.pop('order'), arrays, labels)
+
+    def stats(self):
+        """Label sizes by name"""
+        out_sizes = np.diff(self.out_offsets)
+        in_sizes = np.diff(self.in_offsets)
+        node_count = max(1, self.node_count)
+        arrays = [self.order, self.out_offsets, self.out_hubs, self.out_distances,
+                  self.in_offsets, self.in_hubs, self.in_distances]
+        if self.has_paths:
+            arrays += [self.out_parents, self.in_parents]
+        total_bytes = sum(array.nbytes for array in arrays)
+        return {
+            'nodes': self.node_count,
+            'entries': self.entry_count(),
+            'entries_per_node': self.entry_count() / node_count,
+            'max_out_label': int(out_sizes.max()) if len(out_sizes) else 0,
+            'max_in_label': int(in_sizes.max()) if len(in_sizes) else 0,
+            'bytes': total_bytes,
+            'bytes_per_node': total_bytes / node_count
+        }
+
+
+def measure_queries(oracle, graph, count=10000, dijkstra_count=100, seed=0):
+    """Time random distance queries on the oracle and, for comparison, Dijkstra
+
+    Returns:
+        Dictionary with the latencies in microseconds and the number of
+        Dijkstra answers the oracle disagreed with
+    """
+    rng = random.Random(seed)
+    node_count = graph.get_node_count()
+    pairs = [(rng.randrange(node_count), rng.randrange(node_count)) for _ in range(count)]
+
+    latencies = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        oracle.distance_ids(source, target)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    dijkstra_time = 0.0
+    mismatches = 0
+    checked = pairs[:dijkstra_count]
+    for source, target in checked:
+        start = time.perf_counter()
+        dist, _, _ = shortest_path_tree(graph, source, target)
+        dijkstra_time += time.perf_counter() - start
+        if dist[target] != oracle.distance_ids(source, target):
+            mismatches += 1
+
+    return {
+        'queries': count,
+        'mean_us': sum(latencies) / max(1, len(latencies)) * 1e6,
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+        'dijkstra_mean_us': dijkstra_time / max(1, len(checked)) * 1e6,
+        'checked': len(checked),
+        'mismatches': mismatches
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a hub label distance oracle and report its "
+                                                 "preprocessing time, size and query latency")
+    parser.add_argument('--snapshot', help="load the graph from a snapshot file written by generators.py")
+    parser.add_argument('--edges', help="load the graph from a 'start end [weight]' edge list")
+    parser.add_argument('--undirected', action='store_true', help="edge list edges go both ways")
+    parser.add_argument('--output', help="write the labels to this file")
+    parser.add_argument('--labels', help="load labels written earlier with --output instead of building them")
+    parser.add_argument('--paths', action='store_true', help="keep what is needed to rebuild paths")
+    parser.add_argument('--queries', type=int, default=10000, help="random queries timed")
+    parser.add_argument('--verify', type=int, default=100,
+                        help="queries also answered with Dijkstra, for the comparison and a correctness check")
+    parser.add_argument('--seed', type=int, default=0, help="random seed of the queries")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    graph = load_graph(args.snapshot, args.edges, args.undirected)
+    report = {'graph_nodes': graph.get_node_count()}
+    start = time.perf_counter()
+    if args.labels:
+        oracle = HubLabels.load(args.labels)
+        report['load_s'] = time.perf_counter() - start
+    else:
+        oracle = build_hub_labels(graph, args.paths, log=lambda message: print(message, file=sys.stderr))
+        report['preprocessing_s'] = time.perf_counter() - start
+    if args.output:
+        oracle.save(args.output)
+    report['labels'] = oracle.stats()
+    report['queries'] = measure_queries(oracle, graph, args.queries, args.verify, args.seed)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 1 if report['queries']['mismatches'] else 0
+
+    labels = report['labels']
+    queries = report['queries']
+    if 'preprocessing_s' in report:
+        print(f"preprocessing: {report['preprocessing_s']:.2f}s for {report['graph_nodes']} nodes")
+    else:
+        print(f"loaded in {report['load_s'] * 1000:.1f}ms")
+    print(f"labels: {labels['entries']} entries, {labels['entries_per_node']:.1f} per node "
+          f"(largest out {labels['max_out_label']}, in {labels['max_in_label']}), "
+          f"{labels['bytes'] / 1e6:.2f} MB, {labels['bytes_per_node']:.0f} bytes per node")
+    print(f"queries: mean {queries['mean_us']:.1f}us  p50 {queries['p50_us']:.1f}us  p99 {queries['p99_us']:.1f}us; "
+          f"Dijkstra mean {queries['dijkstra_mean_us']:.0f}us "
+          f"({queries['dijkstra_mean_us'] / max(queries['mean_us'], 1e-9):.0f}x slower)")
+    print(f"checked {queries['checked']} queries against Dijkstra: {queries['mismatches']} mismatches")
+    return 1 if queries['mismatches'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import pygame
+
+# Profiler sections shown in the HUD, with their labels
+HUD_SECTIONS = [
+    ('frame', "Frame"),
+    ('graph', "Graph.draw"),
+    ('heap', "Heap draw"),
+    ('info', "Info panel draw"),
+    ('flip', "Flip")
+]
+
+class PerformanceHUD:
+    def __init__(self, position, font_size=14):
+        """Initialize the overlay showing render timings and algorithm counters
+
+        Args:
+            position: Top-left corner (x, y) of the overlay
+            font_size: Size of the font for text
+        """
+        self.position = position
+        self.font = pygame.font.SysFont('Consolas', font_size)
+        self.visible = False
+
+        # Colors
+        self.colors = {
+            'background': (0, 0, 0, 170),
+            'text': (230, 230, 230)
+        }
+
+        self.margin = 6
+
+    def toggle(self):
+        """Show or hide the overlay"""
+        self.visible = not self.visible
+
+    def lines(self, profiler, counters=None):
+        """Text lines shown in the overlay"""
+        lines = []
+        for name, label in HUD_SECTIONS:
+            lines.append(f"{label:<16}{profiler.recent_ms(name):7.2f} ms")
+
+        frame_ms = profiler.recent_ms('frame')
+        if frame_ms:
+            lines.append(f"{'Render rate':<16}{1000 / frame_ms:7.1f} fps")
+
+        if counters is not None:
+            lines.append(f"Pops {counters.pops} (stale {counters.stale_pops})")
+            lines.append(f"Pushes {counters.pushes}, peak queue {counters.peak_queue_size}")
+            lines.append(f"Relaxations {counters.relaxations} "
+                         f"({counters.successful_relaxations} improved)")
+        return lines
+
+    def draw(self, screen, profiler, counters=None):
+        """Draw the overlay when it is visible
+
+        Args:
+            screen: Pygame screen to draw on
+            profiler: Profiler with the section timings
+            counters: Optional AlgorithmCounters of the algorithm
+        """
+        if not self.visible:
+            return
+
+        texts = [self.font.render(line, True, self.colors['text']) for line in self.lines(profiler, counters)]
+        width = max(text.get_width() for text in texts) + self.margin * 2
+        line_height = self.font.get_linesize()
+        height = line_height * len(texts) + self.margin * 2
+
+        # Translucent background so the graph stays visible below
+        background = pygame.Surface((width, height), pygame.SRCALPHA)
+        background.fill(self.colors['background'])
+        screen.blit(background, self.position)
+
+        x = self.position[0] + self.margin
+        y = self.position[1] + self.margin
+        for text in texts:
+            screen.blit(text, (x, y))
+            y += line_height
@@ -1,9 +1,13 @@
 import pygame
 
+# Maximum number of cached text surfaces and wrapped log entries
+TEXT_CACHE_SIZE = 2048
+WRAP_CACHE_SIZE = 512
+
 class InfoPanel:
     def __init__(self, rect, font_size=16):
         """Initialize the information panel
-        
+
         Args:
             rect: A rectangle (x, y, width, height) to contain the panel
             font_size: Size of the font for text
@@ -12,7 +16,7 @@ class InfoPanel:
         self.font_size = font_size
         self.font = pygame.font.SysFont('Arial', font_size)
         self.title_font = pygame.font.SysFont('Arial', font_size + 4, bold=True)
-        
+
         # Colors
         self.colors = {
             'background': (240, 240, 240),
@@ -23,173 +27,258 @@ class InfoPanel:
             'table_row_odd': (245, 245, 245),
             'border': (100, 100, 200)
         }
-        
-    def draw(self, screen, distances_table, predecessors_table, logs):
+
+        # Layout
+        self.margin = 10
+        self.row_height = self.font_size + 10
+
+        # First table row shown; both tables scroll together
+        self.scroll_offset = 0
+        self.total_rows = 0
+
+        # Rendered text surfaces, so only cells whose text changed are rendered
+        self._text_cache = {}
+
+        # Wrapped log lines keyed by (text, width) and measured word widths
+        self._wrap_cache = {}
+        self._word_widths = {}
+
+    def visible_table_rows(self):
+        """Number of data rows of the tables that fit in the panel"""
+        rows_top = (self.rect[1] + self.margin + self.title_font.get_linesize() + self.margin
+                    + self.title_font.get_linesize() + 5 + self.row_height)
+        rows_bottom = self.rect[1] + self.rect[3] - 10
+        return max(1, (rows_bottom - rows_top) // self.row_height)
+
+    def visible_table_window(self):
+        """Window (start, count) of table rows shown in the panel"""
+        return self.scroll_offset, self.visible_table_rows()
+
+    def scroll(self, amount):
+        """Scroll the tables by amount rows"""
+        limit = max(0, self.total_rows - self.visible_table_rows())
+        self.scroll_offset = max(0, min(limit, self.scroll_offset + amount))
+
+    def draw(self, screen, distances_table, predecessors_table, logs, total_rows=None):
         """Draw the information panel with all data
-        
+
         Args:
             screen: Pygame screen to draw on
             distances_table: List of (node, distance) tuples
             predecessors_table: List of (node, predecessor) tuples
             logs: List of log strings to display
+            total_rows: Number of rows of the complete tables. When given, the
+                        tables only contain the rows of visible_table_window(),
+                        otherwise they are complete and sliced here
         """
+        if total_rows is None:
+            total_rows = len(distances_table)
+            start, count = self.visible_table_window()
+            distances_table = distances_table[start:start + count]
+            predecessors_table = predecessors_table[start:start + count]
+        self.total_rows = total_rows
+        if self.scroll_offset > max(0, total_rows - self.visible_table_rows()):
+            self.scroll(0)
+
         # Draw background rectangle
         pygame.draw.rect(screen, self.colors['background'], self.rect)
         pygame.draw.rect(screen, self.colors['border'], self.rect, 2)
-        
+
         # Panel margin
-        margin = 10
+        margin = self.margin
         content_width = self.rect[2] - margin * 2
-        
+
         # Current y position to draw content
         y_pos = self.rect[1] + margin
-        
+
         # Draw title
-        title_text = self.title_font.render("Algorithm Information", True, self.colors['title'])
+        title_text = self._render("Algorithm Information", self.colors['title'], self.title_font)
         title_rect = title_text.get_rect(centerx=self.rect[0]+self.rect[2]//2, y=y_pos)
         screen.blit(title_text, title_rect)
         y_pos = title_rect.bottom + margin
-        
+
         # Draw tables side by side
         table_width = (content_width - margin) // 2
-        
+
+        # Show which rows are visible when the tables don't fit
+        row_range = ""
+        if total_rows > len(distances_table):
+            first_row = self.scroll_offset + 1
+            row_range = f" ({first_row}-{self.scroll_offset + len(distances_table)} of {total_rows})"
+
         # Draw distances table
-        distances_height = self._draw_table(screen, 
-                                           (self.rect[0] + margin, y_pos, table_width, 0), 
-                                           "Distances", 
+        distances_height = self._draw_table(screen,
+                                           (self.rect[0] + margin, y_pos, table_width, 0),
+                                           "Distances" + row_range,
                                            [("Node", "Dist")] + distances_table)
-        
+
         # Draw predecessors table
-        predecessors_height = self._draw_table(screen, 
-                                              (self.rect[0] + margin + table_width + margin, y_pos, table_width, 0), 
-                                              "Predecessors", 
+        predecessors_height = self._draw_table(screen,
+                                              (self.rect[0] + margin + table_width + margin, y_pos, table_width, 0),
+                                              "Predecessors" + row_range,
                                               [("Node", "Prev")] + predecessors_table)
-        
+
         # Update y position to after the tables
         y_pos += max(distances_height, predecessors_height) + margin * 2
-        
+
+        # Stop if there is no room left for the logs
+        if y_pos > self.rect[1] + self.rect[3] - margin:
+            return
+
         # Draw logs
-        logs_title = self.title_font.render("Algorithm Steps", True, self.colors['title'])
+        logs_title = self._render("Algorithm Steps", self.colors['title'], self.title_font)
         logs_title_rect = logs_title.get_rect(x=self.rect[0] + margin, y=y_pos)
         screen.blit(logs_title, logs_title_rect)
         y_pos = logs_title_rect.bottom + margin
-        
+
         # Draw log entries
         for log in logs:
             # Word wrap long logs
-            words = log.split(' ')
-            lines = []
-            current_line = []
-            
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                test_width = self.font.size(test_line)[0]
-                
-                if test_width <= content_width:
-                    current_line.append(word)
-                else:
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-            
-            if current_line:
-                lines.append(' '.join(current_line))
-            
+            lines = self._wrap(log, content_width)
+
             # Draw each line
             for line in lines:
-                log_text = self.font.render(line, True, self.colors['text'])
+                log_text = self._render(line, self.colors['text'])
                 log_rect = log_text.get_rect(x=self.rect[0] + margin, y=y_pos)
                 screen.blit(log_text, log_rect)
                 y_pos = log_rect.bottom + 5
-                
+
                 # Check if we're out of the panel bounds
                 if y_pos > self.rect[1] + self.rect[3] - margin:
-                    more_text = self.font.render("...", True, self.colors['text'])
+                    more_text = self._render("...", self.colors['text'])
                     more_rect = more_text.get_rect(x=self.rect[0] + margin, y=y_pos - 20)
                     screen.blit(more_text, more_rect)
                     break
-            
+
             # Check if we're out of the panel bounds
             if y_pos > self.rect[1] + self.rect[3] - margin:
                 break
-    
+
+    def _render(self, text, color, font=None):
+        """Render text, reusing the surface if the same text was rendered before"""
+        if font is None:
+            font = self.font
+        key = (text, color, id(font))
+        surface = self._text_cache.get(key)
+        if surface is None:
+            if len(self._text_cache) >= TEXT_CACHE_SIZE:
+                self._text_cache.clear()
+            surface = font.render(text, True, color)
+            self._text_cache[key] = surface
+        return surface
+
+    def _wrap(self, text, width):
+        """Split text into lines no wider than width, cached by (text, width)
+
+        Every word is measured once and line widths are accumulated, instead of
+        measuring each growing prefix of the line.
+        """
+        key = (text, width)
+        lines = self._wrap_cache.get(key)
+        if lines is not None:
+            return lines
+
+        space_width = self._word_width(' ')
+        lines = []
+        current_line = []
+        current_width = 0
+
+        for word in text.split(' '):
+            word_width = self._word_width(word)
+            test_width = current_width + space_width + word_width if current_line else word_width
+
+            if test_width <= width:
+                current_line.append(word)
+                current_width = test_width
+            else:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+                current_width = word_width
+
+        if current_line:
+            lines.append(' '.join(current_line))
+
+        if len(self._wrap_cache) >= WRAP_CACHE_SIZE:
+            self._wrap_cache.clear()
+        self._wrap_cache[key] = lines
+        return lines
+
+    def _word_width(self, word):
+        """Width of a word in the panel font"""
+        width = self._word_widths.get(word)
+        if width is None:
+            if len(self._word_widths) >= TEXT_CACHE_SIZE:
+                self._word_widths.clear()
+            width = self.font.size(word)[0]
+            self._word_widths[word] = width
+        return width
+
     def _draw_table(self, screen, rect, title, data):
         """Draw a table with a title and data
-        
+
         Args:
             screen: Pygame screen to draw on
             rect: Rectangle to draw the table in (x, y, width, height)
             title: Title of the table
-            data: List of row tuples, first row is the header
-            
+            data: List of row tuples, first row is the header; the other rows
+                  are the visible rows, starting at scroll_offset
+
         Returns:
             The height of the table
         """
         x, y, width, _ = rect
-        
+
         # Draw title
-        title_text = self.title_font.render(title, True, self.colors['title'])
+        title_text = self._render(title, self.colors['title'], self.title_font)
         title_rect = title_text.get_rect(x=x, y=y)
         screen.blit(title_text, title_rect)
-        
+
         # Current y position after title
         y_pos = title_rect.bottom + 5
-        
+
         # Row height
-        row_height = self.font_size + 10
-        
+        row_height = self.row_height
+
         # Calculate column widths (even distribution)
         if data and len(data[0]) > 0:
             col_width = width // len(data[0])
-            
+
             # Draw header
             header_rect = pygame.Rect(x, y_pos, width, row_height)
             pygame.draw.rect(screen, self.colors['table_header'], header_rect)
             pygame.draw.rect(screen, self.colors['border'], header_rect, 1)
-            
+
             for i, cell in enumerate(data[0]):
-                cell_text = self.font.render(str(cell), True, self.colors['text'])
+                cell_text = self._render(str(cell), self.colors['text'])
                 cell_rect = cell_text.get_rect(
                     centerx=x + i*col_width + col_width//2,
                     centery=y_pos + row_height//2
                 )
                 screen.blit(cell_text, cell_rect)
-            
+
             y_pos += row_height
-            
-            # Draw data rows
-            for row_idx, row in enumerate(data[1:]):
+
+            # Draw the visible data rows
+            for row_idx, row in enumerate(data[1:self.visible_table_rows() + 1]):
                 row_rect = pygame.Rect(x, y_pos, width, row_height)
-                
-                # Alternate row colors
-                if row_idx % 2 == 0:
+
+                # Alternate row colors (by absolute row number, so they don't flicker while scrolling)
+                if (self.scroll_offset + row_idx) % 2 == 0:
                     pygame.draw.rect(screen, self.colors['table_row_even'], row_rect)
                 else:
                     pygame.draw.rect(screen, self.colors['table_row_odd'], row_rect)
-                    
+
                 pygame.draw.rect(screen, self.colors['border'], row_rect, 1)
-                
+
                 for i, cell in enumerate(row):
-                    cell_text = self.font.render(str(cell), True, self.colors['text'])
+                    cell_text = self._render(str(cell), self.colors['text'])
                     cell_rect = cell_text.get_rect(
                         centerx=x + i*col_width + col_width//2,
                         centery=y_pos + row_height//2
                     )
                     screen.blit(cell_text, cell_rect)
-                
+
                 y_pos += row_height
-                
-                # Check if we're out of the panel bounds
-                if y_pos > self.rect[1] + self.rect[3] - 10:
-                    more_rect = pygame.Rect(x, y_pos - row_height, width, row_height)
-                    pygame.draw.rect(screen, self.colors['table_row_odd'], more_rect)
-                    pygame.draw.rect(screen, self.colors['border'], more_rect, 1)
-                    
-                    more_text = self.font.render("...", True, self.colors['text'])
-                    more_rect = more_text.get_rect(centerx=x + width//2, centery=y_pos - row_height//2)
-                    screen.blit(more_text, more_rect)
-                    
-                    y_pos = y_pos - row_height + row_height
-                    break
-        
+
         # Return the height of the table
-        return y_pos - y 
\ No newline at end of file
+        return y_pos - y
@@ -0,0 +1,250 @@
+import heapq
+
+from dijkstra import NO_NODE
+from queries import reverse_adjacency
+
+# K shortest loopless paths (Yen's algorithm) on the integer id interface of
+# Graph and GridGraph.
+#
+# Every spur search runs on the graph with some nodes and edges removed, so
+# the distances to the target in the full graph are lower bounds for it.
+# They come from one backward search from the target (the reverse shortest
+# path tree) and are used twice: when the tree path from the spur node
+# avoids everything removed it is the spur path, without any search, and
+# otherwise they are the A* heuristic of the spur search, which also stops
+# early once it cannot beat the candidates already found.
+
+
+def reverse_tree(graph, target_id, reverse=None):
+    """Reverse shortest path tree of a target
+
+    Returns:
+        (to_target, next_hop): distance from every node id to the target
+        (inf when it cannot reach it) and the next node on that path
+        (NO_NODE for the target and unreachable nodes)
+    """
+    if reverse is None:
+        reverse = reverse_adjacency(graph)
+    node_count = graph.get_node_count()
+    to_target = [float('inf')] * node_count
+    next_hop = [NO_NODE] * node_count
+    done = bytearray(node_count)
+    to_target[target_id] = 0
+    queue = [(0, target_id)]
+    while queue:
+        distance, node = heapq.heappop(queue)
+        if done[node]:
+            continue
+        done[node] = 1
+        for predecessor, weight in reverse[node]:
+            new_distance = distance + weight
+            if new_distance < to_target[predecessor]:
+                to_target[predecessor] = new_distance
+                next_hop[predecessor] = node
+                heapq.heappush(queue, (new_distance, predecessor))
+    return to_target, next_hop
+
+
+class KShortestPaths:
+    def __init__(self, graph, source_id, target_id, reverse=None, shortest_ids=None):
+        """Enumerate loopless paths from source to target in order of length
+
+        Args:
+            graph: Graph with the integer id interface
+            source_id: Id of the first node of the paths
+            target_id: Id of the last node of the paths
+            reverse: Optional precomputed reverse_adjacency(graph)
+            shortest_ids: Optional shortest path already found (e.g. by a
+                          DijkstraAlgorithm run), returned first instead of
+                          the reverse tree path, which may be another tie
+        """
+        self.graph = graph
+        self.source_id = source_id
+        self.target_id = target_id
+        self.shortest_ids = shortest_ids
+        self.to_target, self.next_hop = reverse_tree(graph, target_id, reverse)
+
+        self.paths = []  # Found paths in order: (distance, [ids], [distance from source at each node])
+        self.candidates = []  # Heap of (distance, [ids], [distances]) not returned yet
+        self.seen = set()  # Node tuples of every path found or queued
+
+        # Statistics
+        self.tree_spurs = 0  # Spur paths taken from the reverse tree
+        self.searched_spurs = 0  # Spur paths that needed a search
+        self.pruned_spurs = 0  # Spur searches stopped by the bound
+        self.settled = 0
+
+    def _tree_path(self, node):
+        """Node ids of the reverse tree path from node to the target"""
+        path = [node]
+        while node != self.target_id:
+            node = self.next_hop[node]
+            path.append(node)
+        return path
+
+    def shortest(self):
+        """First path, the given one or straight from the reverse tree"""
+        if self.to_target[self.source_id] == float('inf'):
+            return None
+        path = self.shortest_ids or self._tree_path(self.source_id)
+        # Every part of a shortest path is a shortest path, so the distance
+        # from the source is the total minus the distance left
+        total = self.to_target[self.source_id]
+        return total, list(path), [total - self.to_target[node] for node in path]
+
+    def next_path(self, k=None):
+        """Find the next path
+
+        Args:
+            k: Number of paths the caller will ask for in total, if known;
+               spur searches then stop once they cannot make it into the
+               first k paths
+
+        Returns:
+            (distance, [ids]), or None when there are no more paths
+        """
+        if not self.paths:
+            first = self.shortest()
+            if first is None:
+                return None
+            self._accept(first)
+            return first[0], first[1]
+
+        self._add_spur_candidates(self.paths[-1], k)
+        while self.candidates:
+            candidate = heapq.heappop(self.candidates)
+            self._accept(candidate)
+            return candidate[0], candidate[1]
+        return None
+
+    def _accept(self, path):
+        self.paths.append(path)
+        self.seen.add(tuple(path[1]))
+
+    def _bound(self, k):
+        """Length a new candidate must stay below to be among the first k paths"""
+        needed = k - len(self.paths) if k is not None else None
+        if needed is None or len(self.candidates) < needed or needed <= 0:
+            return float('inf')
+        return heapq.nsmallest(needed, self.candidates)[-1][0]
+
+    def _add_spur_candidates(self, last, k):
+        """Yen's step: deviations from the last path at each of its nodes"""
+        _, last_path, last_distances = last
+        for index in range(len(last_path) - 1):
+            spur = last_path[index]
+            root = last_path[:index + 1]
+            root_distance = last_distances[index]
+
+            # Edges leaving the spur node along earlier paths with the same root
+            blocked_edges = set()
+            for _, path, _ in self.paths:
+                if len(path) > index + 1 and path[:index + 1] == root:
+                    blocked_edges.add(path[index + 1])
+            # The root nodes themselves, so the paths stay loopless
+            blocked_nodes = set(root[:-1])
+
+            bound = self._bound(k)
+            if root_distance + self.to_target[spur] >= bound:
+                self.pruned_spurs += 1
+                continue
+            spur_path = self._spur_path(spur, blocked_nodes, blocked_edges, bound - root_distance)
+            if spur_path is None:
+                continue
+
+            spur_nodes, spur_distances = spur_path
+            path = root[:-1] + spur_nodes
+            key = tuple(path)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            distances = last_distances[:index] + [root_distance + distance for distance in spur_distances]
+            heapq.heappush(self.candidates, (distances[-1], path, distances))
+
+    def _spur_path(self, spur, blocked_nodes, blocked_edges, limit):
+        """Shortest path from spur to the target avoiding the blocked nodes and edges
+
+        Returns:
+            ([ids], [distance from spur at each node]) or None when no path
+            shorter than limit exists
+        """
+        to_target = self.to_target
+        get_id_neighbors = self.graph.get_id_neighbors
+
+        # Every spur path leaves through some allowed neighbor v and costs at
+        # least w(spur, v) + to_target[v]; when the tree path of the best v
+        # avoids the root it reaches that bound and no search is needed
+        best_neighbor, best_distance = NO_NODE, float('inf')
+        for neighbor, weight in get_id_neighbors(spur):
+            if neighbor in blocked_edges or neighbor in blocked_nodes:
+                continue
+            if weight + to_target[neighbor] < best_distance:
+                best_neighbor, best_distance = neighbor, weight + to_target[neighbor]
+        if best_distance >= limit:
+            self.pruned_spurs += 1
+            return None
+        tree_path = [spur] + self._tree_path(best_neighbor)
+        if spur not in tree_path[1:] and blocked_nodes.isdisjoint(tree_path):
+            self.tree_spurs += 1
+            return tree_path, [0] + [best_distance - to_target[node] for node in tree_path[1:]]
+
+        # A* with the tree distances as heuristic; they are exact in the full
+        # graph, so they are consistent lower bounds in the reduced one
+        self.searched_spurs += 1
+        target_id = self.target_id
+        dist = {spur: 0}
+        pred = {spur: NO_NODE}
+        done = set()
+        queue = [(to_target[spur], 0, spur)]
+        while queue:
+            estimate, distance, node = heapq.heappop(queue)
+            if estimate >= limit:
+                self.pruned_spurs += 1
+                return None
+            if node in done:
+                continue
+            done.add(node)
+            self.settled += 1
+            if node == target_id:
+                path = []
+                while node != NO_NODE:
+                    path.append(node)
+                    node = pred[node]
+                path.reverse()
+                return path, [dist[node] for node in path]
+            for neighbor, weight in get_id_neighbors(node):
+                if neighbor in blocked_nodes or neighbor in done or to_target[neighbor] == float('inf'):
+                    continue
+                if node == spur and neighbor in blocked_edges:
+                    continue
+                new_distance = distance + weight
+                if new_distance < dist.get(neighbor, float('inf')):
+                    dist[neighbor] = new_distance
+                    pred[neighbor] = node
+                    heapq.heappush(queue, (new_distance + to_target[neighbor], new_distance, neighbor))
+        return None
+
+
+def k_shortest_paths(graph, source, target, k, shortest_path=None):
+    """Up to k shortest loopless paths between two nodes, shortest first
+
+    Args:
+        graph: Graph or GridGraph
+        source: Label of the first node
+        target: Label of the last node
+        k: Maximum number of paths
+        shortest_path: Optional labels of a shortest path already found,
+                       such as the path of a finished DijkstraAlgorithm
+
+    Returns:
+        List of (distance, [labels])
+    """
+    shortest_ids = [graph.get_id(node) for node in shortest_path] if shortest_path else None
+    search = KShortestPaths(graph, graph.get_id(source), graph.get_id(target), shortest_ids=shortest_ids)
+    paths = []
+    while len(paths) < k:
+        path = search.next_path(k)
+        if path is None:
+            break
+        paths.append((path[0], graph.get_labels(path[1])))
+    return paths
@@ -0,0 +1,263 @@
+import hashlib
+import os
+
+import numpy as np
+
+
+class ForceDirectedLayout:
+    def __init__(self, graph, iterations=300, theta=0.8, max_depth=12,
+                 seed=0, cache_dir=None):
+        """Force-directed (Fruchterman-Reingold) layout for a Graph
+
+        Repulsion between all nodes is approximated with a Barnes-Hut quadtree,
+        so one iteration costs O(n log n) instead of O(n^2). The work is split
+        into small chunks with step() so the UI can keep drawing frames while
+        the layout converges.
+
+        Args:
+            graph: Graph instance whose node_positions will be filled
+            iterations: Total number of iterations until the layout is done
+            theta: Barnes-Hut opening criterion (smaller is more accurate)
+            max_depth: Maximum depth of the quadtree
+            seed: Seed for the initial random placement
+            cache_dir: Directory where finished layouts are cached (None disables caching)
+        """
+        self.graph = graph
+        self.iterations = iterations
+        self.theta = theta
+        self.max_depth = max_depth
+        self.cache_dir = cache_dir
+
+        # Collect every node, including nodes that only appear as edge targets
+        nodes = list(graph.get_nodes())
+        known = set(nodes)
+        for node in list(nodes):
+            for neighbor, _ in graph.get_neighbors(node):
+                if neighbor not in known:
+                    known.add(neighbor)
+                    nodes.append(neighbor)
+        self.nodes = nodes
+        index = {node: i for i, node in enumerate(nodes)}
+
+        # Edge list as index arrays (direction is irrelevant for the layout)
+        sources = []
+        targets = []
+        for node in graph.get_nodes():
+            for neighbor, _ in graph.get_neighbors(node):
+                if neighbor != node:
+                    sources.append(index[node])
+                    targets.append(index[neighbor])
+        self.edge_sources = np.array(sources, dtype=np.int64)
+        self.edge_targets = np.array(targets, dtype=np.int64)
+
+        # Layout works in the unit square, positions are scaled on apply()
+        n = len(nodes)
+        self.k = 1.0 / np.sqrt(max(n, 1))
+        self.temperature = 0.1
+        self.cooling = self.temperature / max(iterations, 1)
+        self.iteration = 0
+
+        rng = np.random.default_rng(seed)
+        self.positions = rng.random((n, 2))
+
+        self.cache_key = self._compute_cache_key()
+        if self._load_cache():
+            self.iteration = self.iterations
+
+    @property
+    def done(self):
+        """True once the layout has converged (or was loaded from the cache)"""
+        return self.iteration >= self.iterations or len(self.nodes) < 2
+
+    def step(self, iterations=1):
+        """Run up to the given number of iterations
+
+        Returns:
+            True if the layout is done after this call
+        """
+        for _ in range(iterations):
+            if self.done:
+                break
+            self._iterate()
+            self.iteration += 1
+            if self.done:
+                self._save_cache()
+        return self.done
+
+    def run(self):
+        """Run all remaining iterations"""
+        return self.step(self.iterations - self.iteration)
+
+    def apply(self, rect, margin=40):
+        """Write the current positions into graph.node_positions
+
+        Args:
+            rect: Rectangle (x, y, width, height) the layout is scaled into
+            margin: Empty space kept at the rectangle borders
+        """
+        if not self.nodes:
+            return
+        x, y, width, height = rect
+        low = self.positions.min(axis=0)
+        span = self.positions.max(axis=0) - low
+        span[span == 0] = 1.0
+        scaled = (self.positions - low) / span
+        scaled[:, 0] = x + margin + scaled[:, 0] * (width - 2 * margin)
+        scaled[:, 1] = y + margin + scaled[:, 1] * (height - 2 * margin)
+        for node, (px, py) in zip(self.nodes, scaled.tolist()):
+            self.graph.node_positions[node] = (px, py)
+
+    def _iterate(self):
+        """Run a single Fruchterman-Reingold iteration"""
+        positions = self.positions
+        k2 = self.k * self.k
+
+        # Repulsive forces (Barnes-Hut)
+        displacement = self._repulsion() * k2
+
+        # Attractive forces along edges
+        if len(self.edge_sources):
+            delta = positions[self.edge_sources] - positions[self.edge_targets]
+            distance = np.sqrt((delta * delta).sum(axis=1)) + 1e-9
+            force = delta * (distance / self.k)[:, None]
+            displacement -= _scatter_sum(self.edge_sources, force, len(positions))
+            displacement += _scatter_sum(self.edge_targets, force, len(positions))
+
+        # Limit the displacement by the current temperature
+        length = np.sqrt((displacement * displacement).sum(axis=1)) + 1e-9
+        scale = np.minimum(length, self.temperature) / length
+        positions += displacement * scale[:, None]
+        self.temperature = max(self.temperature - self.cooling, 1e-4)
+
+    def _repulsion(self):
+        """Approximate sum over all pairs of d / |d|^2 with a Barnes-Hut quadtree
+
+        The quadtree is stored level by level as sorted Morton keys, and the
+        traversal is done for all nodes at once: every (node, cell) pair that
+        is too close to be approximated is expanded into the children of the
+        cell on the next level.
+        """
+        positions = self.positions
+        n = len(positions)
+        force = np.zeros_like(positions)
+        if n < 2:
+            return force
+
+        # Quantize the positions on the finest grid of the tree
+        low = positions.min(axis=0)
+        size = float((positions.max(axis=0) - low).max()) or 1.0
+        depth = self.max_depth
+        cells = 1 << depth
+        grid = np.minimum((positions - low) / size * cells, cells - 1).astype(np.int64)
+        codes = _morton(grid[:, 0], grid[:, 1], depth)
+
+        # Build the levels: sorted cell keys, mass and center of mass per cell
+        levels = []
+        for level in range(depth + 1):
+            keys = codes >> (2 * (depth - level))
+            unique, inverse = np.unique(keys, return_inverse=True)
+            mass = np.bincount(inverse, minlength=len(unique)).astype(np.float64)
+            center = np.empty((len(unique), 2))
+            center[:, 0] = np.bincount(inverse, positions[:, 0], len(unique)) / mass
+            center[:, 1] = np.bincount(inverse, positions[:, 1], len(unique)) / mass
+            levels.append((unique, mass, center, keys))
+
+        # Start with every node paired with the root cell
+        points = np.arange(n)
+        cell_index = np.zeros(n, dtype=np.int64)
+        for level in range(depth + 1):
+            unique, mass, center, keys = levels[level]
+            cell_size = size / (1 << level)
+
+            delta = positions[points] - center[cell_index]
+            dist2 = (delta * delta).sum(axis=1)
+            contains = keys[points] == unique[cell_index]
+            far = ~contains & (cell_size * cell_size < self.theta * self.theta * dist2)
+
+            if level == depth:
+                # Leaf cells: treat the remaining cells as point masses and
+                # remove the node itself from the cell that contains it
+                leaf_mass = mass[cell_index] - contains
+                leaf_center = center[cell_index] * mass[cell_index][:, None]
+                leaf_center[contains] -= positions[points[contains]]
+                valid = leaf_mass > 0
+                leaf_center[valid] /= leaf_mass[valid][:, None]
+                delta = positions[points] - leaf_center
+                dist2 = (delta * delta).sum(axis=1) + 1e-9
+                contribution = delta * (leaf_mass / dist2)[:, None]
+                contribution[~valid] = 0
+                force += _scatter_sum(points, contribution, n)
+                break
+
+            # Accept the far cells as a single point mass
+            if far.any():
+                contribution = delta[far] * (mass[cell_index[far]] / (dist2[far] + 1e-9))[:, None]
+                force += _scatter_sum(points[far], contribution, n)
+
+            # Expand the near cells into their children on the next level
+            near = ~far
+            points = points[near]
+            parents = unique[cell_index[near]]
+            child_keys = levels[level + 1][0]
+            first = np.searchsorted(child_keys, parents << 2)
+            last = np.searchsorted(child_keys, (parents << 2) + 4)
+            counts = last - first
+            points = np.repeat(points, counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            cell_index = np.repeat(first, counts) + offsets
+            if not len(points):
+                break
+
+        return force
+
+    def _compute_cache_key(self):
+        """Hash the graph structure and the layout parameters"""
+        digest = hashlib.sha1()
+        digest.update(repr((self.iterations, self.theta, self.max_depth)).encode())
+        digest.update(repr(self.nodes).encode())
+        digest.update(self.edge_sources.tobytes())
+        digest.update(self.edge_targets.tobytes())
+        return digest.hexdigest()
+
+    def _cache_path(self):
+        return os.path.join(self.cache_dir, f"{self.cache_key}.npy")
+
+    def _load_cache(self):
+        """Load a previously finished layout, returns True on success"""
+        if not self.cache_dir:
+            return False
+        try:
+            positions = np.load(self._cache_path())
+        except (OSError, ValueError):
+            return False
+        if positions.shape != self.positions.shape:
+            return False
+        self.positions = positions
+        return True
+
+    def _save_cache(self):
+        """Store the finished layout in the cache directory"""
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            np.save(self._cache_path(), self.positions)
+        except OSError:
+            pass
+
+
+def _morton(x, y, bits):
+    """Interleave the bits of x and y into Morton (Z-order) codes"""
+    code = np.zeros_like(x)
+    for bit in range(bits):
+        code |= ((x >> bit) & 1) << (2 * bit)
+        code |= ((y >> bit) & 1) << (2 * bit + 1)
+    return code
+
+
+def _scatter_sum(index, values, size):
+    """Sum rows of values (m, 2) into an (size, 2) array by index"""
+    result = np.empty((size, 2))
+    result[:, 0] = np.bincount(index, values[:, 0], size)
+    result[:, 1] = np.bincount(index, values[:, 1], size)
+    return result
@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from server import DEFAULT_PORT, read_message, percentile
+
+
+class Connection:
+    def __init__(self, host, port):
+        """Keep-alive HTTP connection to the route server"""
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        """Send a request and return (status, decoded JSON body or None)"""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode('latin-1') + body)
+        await self.writer.drain()
+
+        message = await read_message(self.reader)
+        if message is None:
+            raise ConnectionError("Server closed the connection")
+        start_line, _, response = message
+        status = int(start_line.split()[1])
+        return status, json.loads(response) if response else None
+
+    async def rpc(self, method, params, call_id=1):
+        """Call a JSON-RPC method and return its response object"""
+        _, response = await self.request('POST', '/rpc', {'jsonrpc': '2.0', 'id': call_id,
+                                                          'method': method, 'params': params})
+        return response
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def run_load(host, port, requests=10000, concurrency=16, pool=100, seed=0):
+    """Send shortest path calls between random nodes of a pool
+
+    A smaller pool repeats queries more often, which exercises the cache
+    and the coalescing of identical in-flight queries.
+
+    Returns:
+        Dictionary with the client side results and the server metrics
+    """
+    connection = Connection(host, port)
+    await connection.open()
+    nodes = (await connection.rpc('sample_nodes', {'count': pool, 'seed': seed}))['result']
+    rng = random.Random(seed)
+    queries = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(requests)]
+    pending = iter(enumerate(queries))
+
+    latencies = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        worker = Connection(host, port)
+        await worker.open()
+        try:
+            # The iterator is shared, every query is sent by exactly one client
+            for call_id, (source, target) in pending:
+                start = time.perf_counter()
+                response = await worker.rpc('shortest_path', {'source': source, 'target': target}, call_id)
+                latencies.append(time.perf_counter() - start)
+                if 'error' in response:
+                    errors += 1
+        finally:
+            worker.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    _, metrics = await connection.request('GET', '/metrics')
+    connection.close()
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'pool': pool,
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'requests_per_s': requests / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'mean': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+            'max': latencies[-1] * 1000 if latencies else 0.0
+        },
+        'server': metrics
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate load on the route server and report latency")
+    parser.add_argument('--host', default='127.0.0.1', help="server address")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="server port")
+    parser.add_argument('--requests', type=int, default=10000, help="number of shortest path calls")
+    parser.add_argument('--concurrency', type=int, default=16, help="number of concurrent connections")
+    parser.add_argument('--pool', type=int, default=100, help="number of distinct nodes queries are drawn from")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--json', action='store_true', help="print the full results as JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_load(args.host, args.port, args.requests, args.concurrency, args.pool, args.seed))
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    latency = results['latency_ms']
+    server = results['server']
+    print(f"{results['requests']} requests, {args.concurrency} connections: "
+          f"{results['requests_per_s']:.0f} requests/s, {results['errors']} errors")
+    print(f"latency ms: mean {latency['mean']:.2f}  p50 {latency['p50']:.2f}  "
+          f"p95 {latency['p95']:.2f}  p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    print(f"server: {server['solver_runs']} searches, {server['cache_hits']} cache hits, "
+          f"{server['coalesced']} coalesced, {server['solver_s']:.2f}s searching")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
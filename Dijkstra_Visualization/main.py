@@ -1,27 +1,83 @@
 import pygame
+import argparse
+import os
 import sys
+import threading
 import time
 
 from graph import Graph
+from layout import ForceDirectedLayout
 from dijkstra import DijkstraAlgorithm
 from heap_visual import HeapVisualizer
 from info_panel import InfoPanel
 from button import Button
-
-# Initialize pygame
-pygame.init()
+from worker import AlgorithmWorker
+from history import StepHistory
+from slider import Slider
+from run_trace import Trace, TracePlayer
+from graph_options import add_graph_arguments, corner_nodes, graph_from_args
+from profiler import Profiler
+from hud import PerformanceHUD
+from k_shortest import k_shortest_paths
+from race import RaceView
 
 # Constants
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 FPS = 60
 
+# While nothing animates, the main loop sleeps until an event arrives (or this
+# timeout expires) instead of rendering frames at FPS
+IDLE_TIMEOUT_MS = 500
+
+# Force-directed layout
+LAYOUT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.layout_cache')
+
+# Auto-run speeds: (label, seconds between batches, steps per batch)
+# Without a delay the worker publishes about one batch per frame, and a batch
+# size of None runs straight to the end
+SPEEDS = [
+    ("0.25x", 2.0, 1),
+    ("0.5x", 1.0, 1),
+    ("1x", 0.5, 1),
+    ("2x", 0.25, 1),
+    ("4x", 0.125, 1),
+    ("1 step/frame", 0.0, 1),
+    ("10 steps/frame", 0.0, 10),
+    ("100 steps/frame", 0.0, 100),
+    ("1k steps/frame", 0.0, 1000),
+    ("10k steps/frame", 0.0, 10000),
+    ("Jump to end", 0.0, None)
+]
+DEFAULT_SPEED = 2
+
+# Step history used by the timeline slider
+HISTORY_CHECKPOINT_INTERVAL = 100
+HISTORY_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes
+
+# Longest shortest path written out in full above the graph
+MAX_PATH_LABELS = 10
+
+# Alternative routes cycled through with "Next Route" once the run finished
+ALTERNATIVE_ROUTES = 5
+
 # Colors
 BACKGROUND_COLOR = (255, 255, 255)
 TEXT_COLOR = (0, 0, 0)
 
 class DijkstraVisualization:
-    def __init__(self):
+    def __init__(self, trace=None, graph=None, start_node=None, end_node=None):
+        """Create the visualization window
+        
+        Args:
+            trace: Optional Trace to replay instead of running the algorithm
+            graph: Optional Graph to show instead of the example graph
+            start_node: Start node used with graph
+            end_node: End node used with graph
+        """
+        # Initialize pygame here rather than on import; calling it again is harmless
+        pygame.init()
+        
         # Create the main window
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Dijkstra Algorithm Visualization")
@@ -29,12 +85,28 @@ class DijkstraVisualization:
         # Create a clock for controlling FPS
         self.clock = pygame.time.Clock()
         
-        # Create graph
-        self.graph = Graph()
-        self.graph.load_example_graph()
+        # Create graph (a trace stores the graph it was recorded on)
+        self.trace = trace
+        if trace is not None:
+            self.graph = trace.build_graph()
+            self.start_node = trace.start_node
+            self.end_node = trace.end_node
+        elif graph is not None:
+            self.graph = graph
+            self.start_node = start_node
+            self.end_node = end_node
+        else:
+            self.graph = Graph()
+            self.graph.load_example_graph()
+            self.start_node = 's'
+            self.end_node = 't'
+        
+        # Render timings and the overlay showing them (toggled with F3)
+        self.profiler = Profiler()
+        self.hud = PerformanceHUD((10, 90))
         
         # Create Dijkstra algorithm
-        self.dijkstra = DijkstraAlgorithm(self.graph)
+        self.dijkstra = self.create_algorithm()
         
         # Create visualization components
         # Panel sizes and positions
@@ -72,74 +144,274 @@ class DijkstraVisualization:
             'reset': Button(
                 (button_x, button_y + 3 * (button_height + button_margin), button_width, button_height),
                 "Reset"
+            ),
+            'slower': Button(
+                (button_x, button_y + 4 * (button_height + button_margin), button_height, button_height),
+                "-"
+            ),
+            'faster': Button(
+                (button_x + button_width - button_height, button_y + 4 * (button_height + button_margin),
+                 button_height, button_height),
+                "+"
+            ),
+            'jump': Button(
+                (button_x, button_y + 5 * (button_height + button_margin), button_width, button_height),
+                "Jump to End"
+            ),
+            'route': Button(
+                (button_x, button_y + 6 * (button_height + button_margin), button_width, button_height),
+                "Next Route"
             )
         }
         
+        # Area between the speed buttons where the current speed is shown
+        self.speed_label_center = (button_x + button_width // 2,
+                                   button_y + 4 * (button_height + button_margin) + button_height // 2)
+        
+        # Timeline slider to scrub through the executed steps
+        self.timeline = Slider((820, 740, 360, 10))
+        
         # Disable step and run buttons initially
         self.buttons['step'].disable()
         self.buttons['run'].disable()
+        self.buttons['jump'].disable()
+        self.buttons['route'].disable()
+        self.timeline.disable()
         
         # Algorithm state
         self.algorithm_state = None
         self.last_extracted = None
         self.auto_run = False
-        self.auto_run_delay = 0.5  # seconds between steps
-        self.last_step_time = 0
+        self.speed = DEFAULT_SPEED  # index into SPEEDS
+        
+        # Auto-run executes steps on a background worker; the lock guards the
+        # algorithm state while the render loop reads it
+        self.worker = None
+        self.algorithm_lock = threading.Lock()
+        self.panel_data = ([], 0, [], [], 0, ["Click 'Initialize Algorithm' to start."])
+        
+        # Step history of the current run, created on initialization
+        self.history = None
+        
+        # K shortest paths of the finished run, computed on the first
+        # "Next Route" click, and the one shown
+        self.routes = None
+        self.route_index = 0
+        
+        # Thread computing the routes (they can take seconds on large
+        # graphs) and the dictionary it leaves them in
+        self.route_thread = None
+        self.route_result = None
         
-    def handle_events(self):
-        """Handle pygame events"""
-        # Get mouse state
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_pressed = pygame.mouse.get_pressed()[0]  # Left button
+        # Side by side race of the algorithm variants (toggled with R)
+        self.race = None
         
-        # Update buttons
-        for name, button in self.buttons.items():
-            if button.update(mouse_pos, mouse_pressed):
-                self.handle_button_click(name)
+        # Set when an event or a state change requires a new frame
+        self.needs_redraw = True
         
-        for event in pygame.event.get():
+        # Compute a layout for graphs that don't have a position for every node.
+        # It converges on a thread (an iteration takes about half a second at
+        # 20k nodes); update() shows the positions of the latest iteration
+        self.layout = None
+        self.layout_thread = None
+        self.layout_stop = None
+        self.layout_shown = 0
+        # (grids draw themselves as a bitmap and need no positions)
+        if isinstance(self.graph, Graph) and any(node not in self.graph.node_positions
+                                                 for node in self.graph.get_nodes()):
+            self.start_layout()
+        
+    def create_algorithm(self):
+        """Create the algorithm shown in the window"""
+        if self.trace is not None:
+            # The player replays on the graph built from the trace in __init__
+            algorithm = TracePlayer(self.trace, self.graph)
+        else:
+            algorithm = DijkstraAlgorithm(self.graph)
+        if self.profiler.enabled:
+            algorithm.enable_counters()
+        return algorithm
+        
+    def toggle_profiling(self):
+        """Show or hide the performance overlay, measuring only while it is shown"""
+        self.hud.toggle()
+        with self.algorithm_lock:
+            if self.hud.visible:
+                self.profiler.enable()
+                self.dijkstra.enable_counters()
+            else:
+                self.profiler.disable()
+                self.dijkstra.disable_counters()
+                
+    def export_profile(self, path=None):
+        """Write the render timings and the algorithm counters of the run to a JSON file
+        
+        Returns:
+            The path of the written file
+        """
+        if path is None:
+            path = time.strftime("profile_%Y%m%d_%H%M%S.json")
+        with self.algorithm_lock:
+            counters = self.dijkstra.counters
+            node_count = self.graph.get_node_count()
+            get_id_neighbors = self.graph.get_id_neighbors
+            extra = {
+                'nodes': node_count,
+                'edges': sum(len(get_id_neighbors(node_id)) for node_id in range(node_count)),
+                'steps': self.dijkstra.steps_taken,
+                'finished': self.dijkstra.finished,
+                'counters': counters.to_dict() if counters is not None else None
+            }
+        self.profiler.export(path, extra)
+        return path
+        
+    def start_layout(self):
+        """Start (or restart) the force-directed layout of the graph"""
+        if self.layout_stop is not None:
+            # The old thread stops after its current iteration
+            self.layout_stop.set()
+        self.layout = layout = ForceDirectedLayout(self.graph, cache_dir=LAYOUT_CACHE_DIR)
+        self.layout.apply(self.graph_rect)
+        self.layout_shown = self.layout.iteration
+        self.layout_thread = self.layout_stop = None
+        if not layout.done:
+            stop = threading.Event()
+            
+            def converge():
+                while not stop.is_set() and not layout.step():
+                    pass
+                    
+            self.layout_stop = stop
+            self.layout_thread = threading.Thread(target=converge, daemon=True)
+            self.layout_thread.start()
+            
+    def finish_layout(self):
+        """Wait for the layout to converge and show it"""
+        if self.layout_thread is not None:
+            self.layout_thread.join()
+            self.layout_thread = self.layout_stop = None
+        if self.layout is not None:
+            self.layout.apply(self.graph_rect)
+            self.layout_shown = self.layout.iteration
+        
+    def handle_events(self, events=None):
+        """Handle pygame events
+        
+        Args:
+            events: Events to handle, by default the ones pending in the queue
+        """
+        if events is None:
+            events = pygame.event.get()
+            
+        for event in events:
+            if event.type == pygame.NOEVENT:
+                continue
+            self.needs_redraw = True
+            
+            # The race covers the controls, which are inactive meanwhile
+            if self.race is None and event.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN,
+                                                    pygame.MOUSEBUTTONUP):
+                # Update buttons
+                for name, button in self.buttons.items():
+                    if button.handle_event(event):
+                        self.handle_button_click(name)
+                        
+                # Update timeline slider
+                position = self.timeline.handle_event(event)
+                if position is not None:
+                    self.seek_step(position)
+                    
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
+            elif event.type == pygame.MOUSEWHEEL:
+                if self.heap_panel_rect.collidepoint(pygame.mouse.get_pos()):
+                    self.heap_visualizer.scroll(-event.y)
+                elif self.info_panel_rect.collidepoint(pygame.mouse.get_pos()):
+                    self.info_panel.scroll(-event.y)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.heap_visualizer.click(event.pos)
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_l and isinstance(self.graph, Graph):
+                    self.start_layout()
+                elif event.key == pygame.K_t:
+                    self.heap_visualizer.toggle_mode()
+                elif event.key == pygame.K_F3:
+                    self.toggle_profiling()
+                elif event.key == pygame.K_F4:
+                    print(f"Profile written to {self.export_profile()}", file=sys.stderr)
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.change_speed(-1)
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.change_speed(1)
+                elif event.key == pygame.K_LEFT and self.history is not None:
+                    self.seek_step(self.history.position - 1)
+                elif event.key == pygame.K_RIGHT and self.history is not None:
+                    self.seek_step(self.history.position + 1)
+                elif event.key == pygame.K_r:
+                    self.toggle_race()
+                elif event.key == pygame.K_n and self.buttons['route'].is_enabled:
+                    self.next_route()
     
     def handle_button_click(self, button_name):
         """Handle button clicks"""
         if button_name == 'init':
             # Initialize the algorithm
-            self.dijkstra.initialize('s', 't')
+            self.stop_worker()
+            self.dijkstra.initialize(self.start_node, self.end_node)
             self.algorithm_state = None
+            self.clear_routes()
             self.last_extracted = None
             self.auto_run = False
             
+            # Profiles cover a single run
+            self.profiler.reset()
+            
+            # Record the run for the timeline
+            if self.history is not None:
+                self.history.detach()
+            self.history = StepHistory(self.dijkstra, HISTORY_CHECKPOINT_INTERVAL, HISTORY_MEMORY_BUDGET)
+            self.timeline.enable()
+            
             # Enable step and run buttons
             self.buttons['step'].enable()
             self.buttons['run'].enable()
+            self.buttons['jump'].enable()
             
         elif button_name == 'step':
-            # Execute one step of the algorithm
-            state = self.dijkstra.step()
-            if state:
-                self.algorithm_state = state
-                
-                # Track the last extracted item for the heap visualization
-                if state.get('current_node') and state.get('priority_queue'):
-                    if hasattr(self.dijkstra, 'current_node') and self.dijkstra.current_node:
-                        distance = self.dijkstra.distances.get(self.dijkstra.current_node, float('inf'))
-                        self.last_extracted = (distance, self.dijkstra.current_node)
-                
-                # If algorithm is finished, disable step and run buttons
-                if state.get('finished', False):
-                    self.buttons['step'].disable()
-                    self.buttons['run'].disable()
+            # Execute one step of the algorithm (or replay it from the history)
+            self.seek_step(self.history.position + 1)
             
         elif button_name == 'run':
-            # Auto-run the algorithm
-            self.auto_run = True
-            self.last_step_time = time.time()
+            if self.worker is None:
+                self.start_worker(*SPEEDS[self.speed][1:])
+            elif self.worker.paused:
+                self.worker.resume()
+                self.buttons['run'].text = "Pause"
+            else:
+                self.worker.pause()
+                self.buttons['run'].text = "Resume"
+            
+        elif button_name == 'jump':
+            # Run straight to the end, showing only the final state
+            self.stop_worker()
+            self.start_worker(0.0, None)
+            
+        elif button_name == 'route':
+            self.next_route()
+            
+        elif button_name in ('slower', 'faster'):
+            self.change_speed(-1 if button_name == 'slower' else 1)
             
         elif button_name == 'reset':
             # Reset everything
-            self.dijkstra = DijkstraAlgorithm(self.graph)
+            self.stop_worker()
+            if self.history is not None:
+                self.history.detach()
+                self.history = None
+            self.timeline.set_range(0, 0)
+            self.timeline.disable()
+            self.dijkstra = self.create_algorithm()
             self.algorithm_state = None
             self.last_extracted = None
             self.auto_run = False
@@ -147,25 +419,201 @@ class DijkstraVisualization:
             # Disable step and run buttons
             self.buttons['step'].disable()
             self.buttons['run'].disable()
+            self.buttons['jump'].disable()
+            self.clear_routes()
+            
+    def next_route(self):
+        """Show the next of the k shortest paths, wrapping around to the first"""
+        if self.routes is None:
+            if self.route_thread is None:
+                # The first route is the path the run found
+                result = {}
+                graph, start_node, end_node = self.graph, self.start_node, self.end_node
+                path = self.algorithm_state.get('path')
+                
+                def search():
+                    result['routes'] = k_shortest_paths(graph, start_node, end_node, ALTERNATIVE_ROUTES, path)
+                    
+                self.route_result = result
+                self.route_thread = threading.Thread(target=search, daemon=True)
+                self.route_thread.start()
+            # update() shows the routes once the search is done
+            self.needs_redraw = True
+            return
+        if self.routes:
+            self.route_index = (self.route_index + 1) % len(self.routes)
+        self.needs_redraw = True
+        
+    def clear_routes(self):
+        """Go back to the path found by the run"""
+        self.routes = None
+        self.route_index = 0
+        # A search still running finishes on its own; its result is dropped
+        self.route_thread = None
+        self.route_result = None
+        self.buttons['route'].disable()
+            
+    def toggle_race(self):
+        """Start a race of the algorithm variants, or go back from it"""
+        if self.race is not None:
+            self.race = None
+            return
+        self.stop_worker()
+        self.race = RaceView(self.graph, self.start_node, self.end_node,
+                             pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), self.graph_rect.size)
+        
+    def change_speed(self, delta):
+        """Move to a slower (negative delta) or faster auto-run speed"""
+        self.speed = max(0, min(len(SPEEDS) - 1, self.speed + delta))
+        if self.worker is not None:
+            self.worker.set_speed(*SPEEDS[self.speed][1:])
+            
+    def apply_state(self, state):
+        """Show a state returned by a step of the algorithm"""
+        self.algorithm_state = state
+        self.needs_redraw = True
+        
+        # Track the last extracted item for the heap visualization
+        if state.get('current_node') is not None and state.get('priority_queue'):
+            node = state['current_node']
+            self.last_extracted = (state['distances'].get(node, float('inf')), node)
+        
+        # If algorithm is finished, disable step and run buttons
+        if state.get('finished', False):
+            self.buttons['step'].disable()
+            self.buttons['run'].disable()
+            self.buttons['jump'].disable()
+            if state.get('path'):
+                self.buttons['route'].enable()
+        else:
+            self.clear_routes()
+            
+    def seek_step(self, position):
+        """Show the algorithm state after the given number of steps"""
+        if self.history is None:
+            return
+        self.stop_worker()
+        with self.algorithm_lock:
+            self.history.seek(position)
+            state = self.dijkstra.get_state()
+        
+        self.last_extracted = None
+        self.apply_state(state)
+        if not state.get('finished', False):
+            self.buttons['step'].enable()
+            self.buttons['run'].enable()
+            self.buttons['jump'].enable()
+            
+    def start_worker(self, step_delay, steps_per_batch):
+        """Auto-run the algorithm on a background worker"""
+        self.auto_run = True
+        self.worker = AlgorithmWorker(self.dijkstra, lock=self.algorithm_lock,
+                                      step_delay=step_delay, steps_per_batch=steps_per_batch)
+        self.worker.start()
+        self.buttons['step'].disable()
+        self.buttons['run'].text = "Pause"
+            
+    def stop_worker(self):
+        """Cancel the auto-run worker, if any"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker = None
+        self.auto_run = False
+        self.buttons['run'].text = "Run All Steps"
             
     def update(self):
         """Update game state"""
-        # Handle auto-run
-        if self.auto_run:
-            current_time = time.time()
-            if current_time - self.last_step_time >= self.auto_run_delay:
-                self.handle_button_click('step')
-                self.last_step_time = current_time
+        # Show the layout iterations finished since the last frame
+        if self.layout_thread is not None:
+            if not self.layout_thread.is_alive():
+                self.layout_thread = self.layout_stop = None
+            iteration = self.layout.iteration
+            if iteration != self.layout_shown:
+                self.layout.apply(self.graph_rect)
+                self.layout_shown = iteration
+                self.needs_redraw = True
+            
+        # Show the routes once their search finished
+        if self.route_thread is not None and not self.route_thread.is_alive():
+            self.routes = self.route_result.get('routes', [])
+            self.route_index = 0
+            self.route_thread = None
+            self.route_result = None
+            self.needs_redraw = True
+            
+        # The race runs its steps in the render loop, at the current speed
+        if self.race is not None and self.race.update(*SPEEDS[self.speed][1:]):
+            self.needs_redraw = True
+            
+        # Consume the step results published by the auto-run worker
+        if self.worker is not None:
+            for state in self.worker.poll():
+                self.apply_state(state)
+            
+            # Stop auto-run once the worker is done and everything was shown
+            if self.worker.exhausted():
+                self.stop_worker()
+                if not self.dijkstra.finished:
+                    self.buttons['step'].enable()
+                    self.buttons['run'].enable()
+                    self.buttons['jump'].enable()
+                    
+        # Keep the timeline in sync with the recorded steps
+        if self.history is not None:
+            self.timeline.set_range(0, self.history.head)
+            if not self.timeline.is_dragging:
+                self.timeline.value = self.history.position
                 
-                # Stop auto-run if algorithm finished
-                if self.algorithm_state and self.algorithm_state.get('finished', False):
-                    self.auto_run = False
+    def read_panel_data(self):
+        """Read the heap, tables and logs shown in the side panels
+        
+        The worker holds the lock while it executes a step. Instead of waiting
+        for it, the data read on a previous frame is shown again.
+        """
+        if not self.algorithm_lock.acquire(blocking=False):
+            return self.panel_data
+        try:
+            if self.dijkstra.initialized:
+                # Only fetch the part of the queue the heap panel shows
+                if self.heap_visualizer.mode == 'list':
+                    start, count = self.heap_visualizer.visible_window()
+                    heap_items = self.dijkstra.get_heap_items(count, start)
+                else:
+                    heap_items = self.dijkstra.get_heap_entries(self.heap_visualizer.visible_indices())
+                # Only format the visible rows of the tables
+                start, count = self.info_panel.visible_table_window()
+                self.panel_data = (
+                    heap_items,
+                    self.dijkstra.get_heap_size(),
+                    self.dijkstra.get_distances_table(count, start),
+                    self.dijkstra.get_predecessors_table(count, start),
+                    self.dijkstra.get_table_size(),
+                    self.dijkstra.get_current_logs()
+                )
+            else:
+                self.panel_data = ([], 0, [], [], 0, ["Click 'Initialize Algorithm' to start."])
+        finally:
+            self.algorithm_lock.release()
+        return self.panel_data
     
     def draw(self):
         """Draw everything on the screen"""
+        with self.profiler.section('frame'):
+            self._draw_frame()
+        self.profiler.frame_finished()
+        
+    def _draw_frame(self):
+        """Draw and flip one frame"""
         # Fill the background
         self.screen.fill(BACKGROUND_COLOR)
         
+        if self.race is not None:
+            with self.profiler.section('graph'):
+                self.race.draw(self.screen)
+            with self.profiler.section('flip'):
+                pygame.display.flip()
+            return
+        
         # Draw graph
         current_node = None
         visited_nodes = []
@@ -179,54 +627,73 @@ class DijkstraVisualization:
             
             if self.algorithm_state.get('finished', False) and 'path' in self.algorithm_state:
                 shortest_path = self.algorithm_state.get('path', [])
+                if self.routes:
+                    shortest_path = self.routes[self.route_index][1]
         
-        self.graph.draw(
-            self.screen, 
-            current_node=current_node,
-            visited_nodes=visited_nodes,
-            testing_edges=testing_edges,
-            shortest_path=shortest_path,
-            start_node='s',
-            end_node='t'
-        )
+        with self.profiler.section('graph'):
+            self.graph.draw(
+                self.screen, 
+                current_node=current_node,
+                visited_nodes=visited_nodes,
+                testing_edges=testing_edges,
+                shortest_path=shortest_path,
+                start_node=self.start_node,
+                end_node=self.end_node
+            )
         
         # Draw heap visualization
-        heap_items = []
-        if self.dijkstra.initialized:
-            heap_items = self.dijkstra.get_heap_items()
+        heap_items, heap_size, distances_table, predecessors_table, table_size, logs = self.read_panel_data()
             
-        self.heap_visualizer.draw(
-            self.screen,
-            heap_items,
-            self.last_extracted
-        )
+        with self.profiler.section('heap'):
+            self.heap_visualizer.draw(
+                self.screen,
+                heap_items,
+                self.last_extracted,
+                heap_size
+            )
         
         # Draw info panel
-        distances_table = []
-        predecessors_table = []
-        logs = ["Click 'Initialize Algorithm' to start."]
-        
-        if self.dijkstra.initialized:
-            distances_table = self.dijkstra.get_distances_table()
-            predecessors_table = self.dijkstra.get_predecessors_table()
-            logs = self.dijkstra.get_current_logs()
-            
-        self.info_panel.draw(
-            self.screen,
-            distances_table,
-            predecessors_table,
-            logs
-        )
+        with self.profiler.section('info'):
+            self.info_panel.draw(
+                self.screen,
+                distances_table,
+                predecessors_table,
+                logs,
+                table_size
+            )
         
         # Draw buttons
         for button in self.buttons.values():
             button.draw(self.screen)
             
+        # Draw the timeline
+        if self.history is not None:
+            timeline_label = f"Step {self.history.position} / {self.history.head}"
+        else:
+            timeline_label = "Timeline"
+        self.timeline.draw(self.screen, timeline_label)
+        
+        # Draw the current auto-run speed between the speed buttons
+        speed_font = pygame.font.SysFont('Arial', 16)
+        speed_text = speed_font.render(SPEEDS[self.speed][0], True, TEXT_COLOR)
+        self.screen.blit(speed_text, speed_text.get_rect(center=self.speed_label_center))
+            
         # If algorithm is finished, display the result
         if self.algorithm_state and self.algorithm_state.get('finished', False):
             if 'path' in self.algorithm_state and self.algorithm_state['path']:
-                path_str = " → ".join(self.algorithm_state['path'])
-                distance = self.dijkstra.distances.get('t', float('inf'))
+                path = self.algorithm_state['path']
+                distance = self.dijkstra.distances.get(self.end_node, float('inf'))
+                path_title = "Shortest Path"
+                if self.routes:
+                    distance, path = self.routes[self.route_index]
+                    path_title = f"Route {self.route_index + 1}/{len(self.routes)}"
+                elif self.route_thread is not None:
+                    path_title = "Shortest Path (finding other routes...)"
+                if len(path) > MAX_PATH_LABELS:
+                    # Long paths (e.g. through a maze) would not fit the window
+                    half = MAX_PATH_LABELS // 2
+                    path = path[:half] + [f"... ({len(path)} nodes) ..."] + path[-half:]
+                path_str = " → ".join(str(node) for node in path)
                 
                 if distance == float('inf'):
                     distance_str = "∞ (no path)"
@@ -235,7 +702,7 @@ class DijkstraVisualization:
                 
                 # Draw result text
                 font = pygame.font.SysFont('Arial', 24, bold=True)
-                result_text = font.render(f"Shortest Path: {path_str}", True, (0, 100, 0))
+                result_text = font.render(f"{path_title}: {path_str}", True, (0, 100, 0))
                 distance_text = font.render(f"Total Distance: {distance_str}", True, (0, 100, 0))
                 
                 result_rect = result_text.get_rect(center=(self.graph_rect.width//2, 30))
@@ -244,19 +711,57 @@ class DijkstraVisualization:
                 self.screen.blit(result_text, result_rect)
                 self.screen.blit(distance_text, distance_rect)
         
+        # Draw the performance overlay (the counters are read without the
+        # lock; a value that is one step behind is fine here)
+        self.hud.draw(self.screen, self.profiler, self.dijkstra.counters)
+        
         # Update the display
-        pygame.display.flip()
+        with self.profiler.section('flip'):
+            pygame.display.flip()
     
+    def is_animating(self):
+        """True while something changes the screen without user input"""
+        return (self.auto_run or self.layout_thread is not None
+                or (self.race is not None and not self.race.finished) or self.route_thread is not None)
+        
     def run(self):
         """Main game loop"""
         running = True
         while running:
-            self.handle_events()
+            if self.is_animating():
+                self.handle_events()
+            else:
+                # Nothing animates: block until an event arrives
+                event = pygame.event.wait(IDLE_TIMEOUT_MS)
+                self.handle_events([event] + pygame.event.get())
             self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            
+            # Only render when something may have changed
+            if self.needs_redraw or self.is_animating():
+                self.draw()
+                self.needs_redraw = False
+                
+            if self.is_animating():
+                self.clock.tick(FPS)
+
+def add_visualization_arguments(parser):
+    """Add the options choosing what the visualization shows to an argparse parser"""
+    parser.add_argument('--trace', help="replay a recorded trace instead of running the algorithm")
+    add_graph_arguments(parser)
+
+
+def visualization_from_args(args):
+    """Create the visualization chosen by the options of add_visualization_arguments"""
+    graph = graph_from_args(args)
+    if graph is not None:
+        start_node, end_node = corner_nodes(graph)
+        return DijkstraVisualization(graph=graph, start_node=start_node, end_node=end_node)
+    return DijkstraVisualization(Trace.load(args.trace) if args.trace else None)
+
 
 # Run the application
 if __name__ == "__main__":
-    app = DijkstraVisualization()
+    parser = argparse.ArgumentParser(description="Dijkstra algorithm visualization")
+    add_visualization_arguments(parser)
+    app = visualization_from_args(parser.parse_args())
     app.run() 
\ No newline at end of file
@@ -0,0 +1,176 @@
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import sys
+import time
+
+from dijkstra import DijkstraAlgorithm
+from generators import lattice_chunks
+from mmap_graph import MappedGraph
+from server import percentile
+from snapshot import write_csr_snapshot
+
+DEFAULT_PATH = 'outofcore.djgs'
+DEFAULT_DEGREE = 16
+
+# Default graph size, relative to the physical memory
+DEFAULT_MEMORY_FACTOR = 1.25
+
+
+def physical_memory():
+    """Physical memory of the machine in bytes"""
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+
+def lattice_side(size, degree):
+    """Side of the square lattice graph whose snapshot takes about size bytes"""
+    # An int64 offset per node, an int32 target and an int64 weight per edge
+    return max(2, math.ceil(math.sqrt(size / (8 + 12 * degree))))
+
+
+def drop_page_cache(path):
+    """Ask the kernel to evict a file from the page cache
+
+    Returns:
+        False when the platform cannot do it, so the cold pass may be warm
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    with open(path, 'rb') as file:
+        os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return True
+
+
+def make_queries(side, count, distance, seed=0):
+    """Random (source, target) pairs at most distance rows and columns apart"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        row, column = rng.randrange(side), rng.randrange(side)
+        target_row = min(side - 1, max(0, row + rng.randint(-distance, distance)))
+        target_column = min(side - 1, max(0, column + rng.randint(-distance, distance)))
+        queries.append((row * side + column, target_row * side + target_column))
+    return queries
+
+
+def run_queries(graph, queries):
+    """Answer queries with DijkstraAlgorithm and measure them
+
+    Returns:
+        Dictionary with the timings, settled nodes and major page faults
+    """
+    algorithm = DijkstraAlgorithm(graph)
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_majflt
+    init_times = []
+    search_times = []
+    settled = 0
+    for source, target in queries:
+        start = time.perf_counter()
+        algorithm.initialize(source, target)
+        middle = time.perf_counter()
+        algorithm.run_to_completion()
+        search_times.append(time.perf_counter() - middle)
+        init_times.append(middle - start)
+        settled += len(algorithm.settle_order)
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_majflt - faults
+
+    search_times.sort()
+    return {
+        'queries': len(queries),
+        'init_ms': sum(init_times) / len(init_times) * 1000,
+        'search_ms': {
+            'mean': sum(search_times) / len(search_times) * 1000,
+            'p50': percentile(search_times, 0.50) * 1000,
+            'p95': percentile(search_times, 0.95) * 1000,
+            'max': search_times[-1] * 1000
+        },
+        'settled_per_query': settled / len(queries),
+        'major_faults_per_query': faults / len(queries)
+    }
+
+
+def run_benchmark(path, size, degree=DEFAULT_DEGREE, queries=50, distance=200, seed=0, rebuild=False, log=None):
+    """Build (or reuse) a lattice graph snapshot and time queries on it memory mapped
+
+    Returns:
+        Dictionary with the graph, the memory and the cold and warm results
+    """
+    result = {'path': path, 'physical_memory_bytes': physical_memory()}
+    if rebuild or not os.path.exists(path):
+        side = lattice_side(size, degree)
+        if log:
+            log(f"Writing {side * side} nodes, {side * side * degree} edges to {path}...")
+        start = time.perf_counter()
+        write_csr_snapshot(path, side * side, side * side * degree, lattice_chunks(side, side, degree, seed=seed))
+        result['build_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    graph = MappedGraph(path)
+    result['open_s'] = time.perf_counter() - start
+    side = math.isqrt(graph.get_node_count())
+    result.update({
+        'nodes': graph.get_node_count(),
+        'edges': graph.edge_count,
+        'file_bytes': os.path.getsize(path)
+    })
+
+    pairs = make_queries(side, queries, distance, seed)
+    result['cold_cache'] = drop_page_cache(path)
+    if log:
+        log("Cold pass...")
+    result['cold'] = run_queries(graph, pairs)
+    if log:
+        log("Warm pass...")
+    result['warm'] = run_queries(graph, pairs)
+
+    # ru_maxrss is in kilobytes on Linux
+    result['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time shortest path queries on a memory mapped graph "
+                                                 "larger than the physical memory")
+    parser.add_argument('--path', default=DEFAULT_PATH,
+                        help="snapshot file, written when missing (it is kept for later runs)")
+    parser.add_argument('--size-gb', type=float,
+                        help=f"size of the generated snapshot (default {DEFAULT_MEMORY_FACTOR}x the physical memory)")
+    parser.add_argument('--degree', type=int, default=DEFAULT_DEGREE, help="out-degree of every node")
+    parser.add_argument('--queries', type=int, default=50, help="number of queries per pass")
+    parser.add_argument('--distance', type=int, default=200, help="lattice rows and columns between query ends")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--rebuild', action='store_true', help="write the snapshot even if the file exists")
+    parser.add_argument('--json', action='store_true', help="print the full results as JSON")
+    args = parser.parse_args(argv)
+
+    size = args.size_gb * 1e9 if args.size_gb else DEFAULT_MEMORY_FACTOR * physical_memory()
+    results = run_benchmark(args.path, size, args.degree, args.queries, args.distance, args.seed, args.rebuild,
+                            log=lambda message: print(message, file=sys.stderr))
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    gigabyte = 1e9
+    print(f"graph: {results['nodes']} nodes, {results['edges']} edges, {results['file_bytes'] / gigabyte:.2f} GB "
+          f"on disk, {results['physical_memory_bytes'] / gigabyte:.2f} GB of memory")
+    if 'build_s' in results:
+        print(f"written in {results['build_s']:.1f}s, opened in {results['open_s'] * 1000:.1f}ms")
+    for name in ('cold', 'warm'):
+        run = results[name]
+        search = run['search_ms']
+        label = name if name == 'warm' or results['cold_cache'] else "cold (page cache not dropped)"
+        print(f"{label}: search mean {search['mean']:.1f}ms  p50 {search['p50']:.1f}ms  p95 {search['p95']:.1f}ms  "
+              f"max {search['max']:.1f}ms, initialize {run['init_ms']:.1f}ms, "
+              f"{run['settled_per_query']:.0f} nodes settled, {run['major_faults_per_query']:.0f} page faults per query")
+    # Pages written by write_csr_snapshot count as resident too
+    note = " (including writing the snapshot)" if 'build_s' in results else ""
+    print(f"peak resident memory{note}: {results['peak_rss_bytes'] / gigabyte:.2f} GB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
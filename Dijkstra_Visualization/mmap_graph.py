@@ -0,0 +1,120 @@
+import json
+
+import numpy as np
+
+from snapshot import KIND_CSR, read_header, section_dtype
+
+# Read-only graph backed by a memory mapped CSR snapshot. Nothing is loaded
+# up front: the adjacency arrays stay in the file and the operating system
+# pages in the parts a search touches, so graphs larger than the memory can
+# be searched. It implements the integer id interface of Graph, so
+# DijkstraAlgorithm and the query functions work on it unchanged.
+
+
+class MappedGraph:
+    def __init__(self, path):
+        """Open a CSR snapshot file written by save_snapshot or write_csr_snapshot
+
+        Args:
+            path: Snapshot file; grid snapshots are small and are loaded
+                  with load_snapshot instead
+        """
+        with open(path, 'rb') as file:
+            header = read_header(file)
+        if header['kind'] != KIND_CSR:
+            raise ValueError("Only adjacency (CSR) snapshots can be memory mapped")
+
+        self.path = path
+        self.header = header
+        self.node_count = header['node_count']
+        self.edge_count = header['edge_count']
+        self._offsets = self._map('offsets')
+        self._targets = self._map('targets')
+        self._weights = self._map('weights')
+
+        # Labels are only read when asked for; without a labels section the
+        # labels are the ids
+        self._labels = None
+        self._ids = None
+
+        # No positions: the graph is too big to draw
+        self.node_positions = {}
+
+    def _map(self, name):
+        """Read-only memory map of a section (an empty array when absent)"""
+        dtype = section_dtype(self.header, name)
+        if name not in self.header['sections']:
+            return np.zeros(0, dtype=dtype)
+        offset, length = self.header['sections'][name]
+        mapped = np.memmap(self.path, dtype=dtype, mode='r', offset=offset,
+                           shape=(length // np.dtype(dtype).itemsize,))
+        # A plain array view of the same mapping; slicing a memmap is
+        # several times slower, and get_id_neighbors slices on every call
+        return mapped.view(np.ndarray)
+
+    def _load_labels(self):
+        """Labels of every id, or None when the labels are the ids"""
+        if self._labels is None and 'labels' in self.header['sections']:
+            self._labels = json.loads(self._map('labels').tobytes().decode('utf-8'))
+            self._ids = {label: node_id for node_id, label in enumerate(self._labels)}
+        return self._labels
+
+    def has_node(self, node):
+        """True if the node is in the graph"""
+        if self._load_labels() is not None:
+            return node in self._ids
+        return isinstance(node, int) and not isinstance(node, bool) and 0 <= node < self.node_count
+
+    def get_id(self, node):
+        """Integer id of a node (KeyError for unknown nodes)"""
+        if self._load_labels() is not None:
+            return self._ids[node]
+        if not self.has_node(node):
+            raise KeyError(node)
+        return node
+
+    def get_label(self, node_id):
+        """Node label of an integer id"""
+        labels = self._load_labels()
+        return node_id if labels is None else labels[node_id]
+
+    def get_labels(self, node_ids):
+        """List of the node labels of a sequence of ids"""
+        labels = self._load_labels()
+        return list(node_ids) if labels is None else list(map(labels.__getitem__, node_ids))
+
+    def get_label_sequence(self):
+        """Sequence of the label of every id (callers must not change it)"""
+        labels = self._load_labels()
+        return range(self.node_count) if labels is None else labels
+
+    def get_node_count(self):
+        """Number of nodes; ids are 0..count-1"""
+        return self.node_count
+
+    def get_id_neighbors(self, node_id):
+        """Return list of (neighbor id, weight) tuples for a node id
+
+        Only the pages holding this node's edges are read.
+        """
+        start, end = self._offsets[node_id:node_id + 2].tolist()
+        return list(zip(self._targets[start:end].tolist(), self._weights[start:end].tolist()))
+
+    def get_neighbors_of_id(self, node_id):
+        """Return list of (neighbor, weight) tuples, with labels, for a node id"""
+        labels = self._load_labels()
+        neighbors = self.get_id_neighbors(node_id)
+        if labels is None:
+            return neighbors
+        return [(labels[neighbor], weight) for neighbor, weight in neighbors]
+
+    def get_neighbors(self, node):
+        """Return list of (neighbor, weight) tuples for a node"""
+        if not self.has_node(node):
+            return []
+        return self.get_neighbors_of_id(self.get_id(node))
+
+    def get_nodes(self):
+        """Return all nodes in the graph"""
+        labels = self._load_labels()
+        return range(self.node_count) if labels is None else list(labels)
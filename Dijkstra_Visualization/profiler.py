@@ -0,0 +1,123 @@
+import collections
+import json
+import time
+
+# Number of recent frames averaged for the on-screen values
+RECENT_FRAMES = 60
+
+
+class _Section:
+    """Context manager timing one section for a Profiler"""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSection:
+    """Context manager used while profiling is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class Profiler:
+    def __init__(self, recent_frames=RECENT_FRAMES):
+        """Time named sections of the render loop
+
+        Usage: with profiler.section('graph'): ... While disabled, section()
+        returns a shared no-op context manager and nothing is measured.
+
+        Args:
+            recent_frames: Number of recent timings kept per section for the HUD
+        """
+        self.enabled = False
+        self.recent_frames = recent_frames
+        self.reset()
+
+    def reset(self):
+        """Forget every timing"""
+        self.totals = {}  # name -> [calls, total seconds, max seconds]
+        self.recent = {}  # name -> deque of recent timings
+        self.order = []  # Section names in the order they were first recorded
+        self.frames = 0
+        self.started = time.perf_counter()
+
+    def enable(self):
+        """Start measuring"""
+        self.enabled = True
+
+    def disable(self):
+        """Stop measuring, keeping the timings"""
+        self.enabled = False
+
+    def section(self, name):
+        """Context manager timing the enclosed code as section name"""
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def record(self, name, seconds):
+        """Add a timing of a section"""
+        totals = self.totals.get(name)
+        if totals is None:
+            totals = self.totals[name] = [0, 0.0, 0.0]
+            self.recent[name] = collections.deque(maxlen=self.recent_frames)
+            self.order.append(name)
+        totals[0] += 1
+        totals[1] += seconds
+        if seconds > totals[2]:
+            totals[2] = seconds
+        self.recent[name].append(seconds)
+
+    def frame_finished(self):
+        """Count a rendered frame"""
+        if self.enabled:
+            self.frames += 1
+
+    def recent_ms(self, name):
+        """Average of the recent timings of a section, in milliseconds"""
+        recent = self.recent.get(name)
+        if not recent:
+            return 0.0
+        return sum(recent) / len(recent) * 1000
+
+    def summary(self):
+        """Timings of every section as a dictionary"""
+        sections = {}
+        for name in self.order:
+            calls, total, maximum = self.totals[name]
+            sections[name] = {
+                'calls': calls,
+                'total_s': total,
+                'mean_ms': total / calls * 1000,
+                'max_ms': maximum * 1000
+            }
+        return {
+            'frames': self.frames,
+            'elapsed_s': time.perf_counter() - self.started,
+            'sections': sections
+        }
+
+    def export(self, path, extra=None):
+        """Write the summary, merged with extra, to a JSON file"""
+        data = self.summary()
+        if extra:
+            data.update(extra)
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=2)
+        return data
@@ -0,0 +1,228 @@
+import heapq
+
+from dijkstra import NO_NODE
+
+# Shortest path queries with more than one target, on the integer id
+# interface of Graph and GridGraph (get_node_count, get_id_neighbors).
+
+
+class OneToManySearch:
+    def __init__(self, graph, source_id):
+        """Dijkstra search from one source that stops once its targets are settled
+
+        The search can be resumed with more targets; nodes settled by an
+        earlier call are not searched again.
+
+        Args:
+            graph: Graph with the integer id interface
+            source_id: Id of the source node
+        """
+        node_count = graph.get_node_count()
+        self.graph = graph
+        self.source_id = source_id
+        self.dist = [float('inf')] * node_count
+        self.pred = [NO_NODE] * node_count
+        self.done = bytearray(node_count)
+        self.settled = 0
+        self.dist[source_id] = 0
+        self.queue = [(0, source_id)]
+
+    def run(self, target_ids):
+        """Continue the search until every target is settled or the queue is empty
+
+        Returns:
+            Number of nodes settled so far
+        """
+        done = self.done
+        remaining = set(target_id for target_id in target_ids if not done[target_id])
+        if not remaining:
+            return self.settled
+
+        dist = self.dist
+        pred = self.pred
+        queue = self.queue
+        get_id_neighbors = self.graph.get_id_neighbors
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        settled = self.settled
+        while queue:
+            distance, node = heappop(queue)
+            if done[node]:
+                continue
+            done[node] = 1
+            settled += 1
+            for neighbor, weight in get_id_neighbors(node):
+                new_distance = distance + weight
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    pred[neighbor] = node
+                    heappush(queue, (new_distance, neighbor))
+            if node in remaining:
+                remaining.discard(node)
+                if not remaining:
+                    break
+        self.settled = settled
+        return settled
+
+    def distance(self, target_id):
+        """Distance of a settled target, inf when it is unreachable"""
+        return self.dist[target_id] if self.done[target_id] else float('inf')
+
+
+def one_to_many(graph, source_id, target_ids):
+    """Distances from one source to many targets
+
+    The search stops as soon as every target is settled, instead of
+    settling the whole graph.
+
+    Returns:
+        (distances, search): list of the distance of every target (inf when
+        unreachable) and the OneToManySearch, for paths and statistics
+    """
+    search = OneToManySearch(graph, source_id)
+    search.run(target_ids)
+    return [search.distance(target_id) for target_id in target_ids], search
+
+
+def reverse_adjacency(graph):
+    """Incoming edges of every node id, as lists of (predecessor id, weight)"""
+    reverse = [[] for _ in range(graph.get_node_count())]
+    for node in range(len(reverse)):
+        for neighbor, weight in graph.get_id_neighbors(node):
+            reverse[neighbor].append((node, weight))
+    return reverse
+
+
+def _backward_ball(reverse, target_id, ball_size):
+    """Backward search from a target settling at most ball_size nodes
+
+    Returns:
+        (settled, frontier, radius): {node: distance to the target} of the
+        settled nodes, {node: distance} of the nodes left in the queue (the
+        length of a real path, exact for nodes right before a shortest path
+        enters the ball) and the radius below which every node was settled
+        (inf when the search finished)
+    """
+    inf = float('inf')
+    distances = {target_id: 0}
+    settled = {}
+    queue = [(0, target_id)]
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    while queue and len(settled) < ball_size:
+        distance, node = heappop(queue)
+        if node in settled:
+            continue
+        settled[node] = distance
+        for predecessor, weight in reverse[node]:
+            new_distance = distance + weight
+            if new_distance < distances.get(predecessor, inf):
+                distances[predecessor] = new_distance
+                heappush(queue, (new_distance, predecessor))
+
+    # Stale entries at the top of the queue do not bound the radius
+    while queue and queue[0][1] in settled:
+        heappop(queue)
+    radius = queue[0][0] if queue else inf
+    frontier = {node: distance for node, distance in distances.items() if node not in settled}
+    return settled, frontier, radius
+
+
+def many_to_many(graph, source_ids, target_ids, reverse=None, ball_size=None):
+    """Distance table between every source and every target
+
+    Bucket-based: a bounded backward search (a ball) is run from every
+    target, and the nodes on its frontier get a (target, distance) entry in
+    their bucket. A shortest path from s to t either starts inside the ball
+    of t, which then holds the distance, or enters it from a frontier node
+    u, whose distance to t is at least the ball radius r. A forward search
+    from each source scans the buckets of the nodes it settles and stops
+    once its distance reaches best(s, t) - r for every target. The backward
+    work is shared by all sources, and only the frontiers, not the whole
+    balls, are scanned.
+
+    Args:
+        graph: Graph with the integer id interface
+        source_ids: Ids of the sources (rows)
+        target_ids: Ids of the targets (columns)
+        reverse: Optional precomputed reverse_adjacency(graph)
+        ball_size: Nodes settled by every backward search; by default a
+                   quarter of the graph, scaled down when there are more
+                   targets than sources. With the default and far fewer
+                   sources than targets, the rows are one-to-many searches,
+                   which is cheaper than filling buckets nobody scans
+
+    Returns:
+        (table, settled): table[i][j] is the distance from source_ids[i] to
+        target_ids[j] (inf when unreachable), settled counts the nodes
+        settled by all searches
+    """
+    if not source_ids or not target_ids:
+        return [[] for _ in source_ids], 0
+    if ball_size is None and 4 * len(source_ids) <= len(target_ids):
+        rows = [one_to_many(graph, source_id, target_ids) for source_id in source_ids]
+        return [distances for distances, _ in rows], sum(search.settled for _, search in rows)
+
+    node_count = graph.get_node_count()
+    if reverse is None:
+        reverse = reverse_adjacency(graph)
+    if ball_size is None:
+        ball_size = max(1, node_count * min(len(source_ids), len(target_ids)) // (4 * len(target_ids)))
+
+    balls = []
+    buckets = {}  # node id -> [(target index, distance to the target)]
+    radii = []
+    settled = 0
+    for index, target_id in enumerate(target_ids):
+        ball, frontier, radius = _backward_ball(reverse, target_id, ball_size)
+        balls.append(ball)
+        radii.append(radius)
+        settled += len(ball)
+        for node, distance in frontier.items():
+            buckets.setdefault(node, []).append((index, distance))
+
+    get_id_neighbors = graph.get_id_neighbors
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    inf = float('inf')
+
+    def forward_limit(best):
+        """Forward distance past which no bucket can improve a row"""
+        # A finished ball holds every node that reaches its target, so the
+        # row already has its final value
+        return max((distance - radius for distance, radius in zip(best, radii) if radius != inf), default=-inf)
+
+    table = []
+    for source_id in source_ids:
+        best = [ball.get(source_id, inf) for ball in balls]
+        limit = forward_limit(best)
+        dist = [inf] * node_count
+        done = bytearray(node_count)
+        dist[source_id] = 0
+        queue = [(0, source_id)]
+        while queue:
+            distance, node = heappop(queue)
+            if distance >= limit:
+                break
+            if done[node]:
+                continue
+            done[node] = 1
+            settled += 1
+
+            entries = buckets.get(node)
+            if entries:
+                improved = False
+                for index, to_target in entries:
+                    if distance + to_target < best[index]:
+                        best[index] = distance + to_target
+                        improved = True
+                if improved:
+                    limit = forward_limit(best)
+
+            for neighbor, weight in get_id_neighbors(node):
+                new_distance = distance + weight
+                if new_distance < dist[neighbor]:
+                    dist[neighbor] = new_distance
+                    heappush(queue, (new_distance, neighbor))
+        table.append(best)
+    return table, settled
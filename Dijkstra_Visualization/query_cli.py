@@ -0,0 +1,283 @@
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+
+from graph import Graph
+from dijkstra import path_ids
+from queries import OneToManySearch, many_to_many, reverse_adjacency
+
+# Queries read, answered and written together. Output is flushed after every
+# batch, so memory stays bounded however long the input stream is
+DEFAULT_BATCH_SIZE = 4096
+
+
+def parse_label(token):
+    """Node label of a text token: an integer when it looks like one, else the string"""
+    try:
+        return int(token)
+    except ValueError:
+        return token
+
+
+def parse_weight(token):
+    """Edge weight of a text token, keeping integers exact"""
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def load_edge_list(path, undirected=False):
+    """Load a graph from a text file with one "start end [weight]" edge per line
+
+    Blank lines and everything after a '#' are ignored. The weight defaults
+    to 1.
+
+    Args:
+        path: Edge list file
+        undirected: Also add every edge in the opposite direction
+    """
+    graph = Graph()
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) not in (2, 3):
+                raise ValueError(f"{path}:{number}: expected 'start end [weight]'")
+            start, end = parse_label(fields[0]), parse_label(fields[1])
+            weight = parse_weight(fields[2]) if len(fields) == 3 else 1
+            graph.add_edge(start, end, weight)
+            if undirected:
+                graph.add_edge(end, start, weight)
+    return graph
+
+
+def load_graph(snapshot=None, edges=None, undirected=False, mmap=False):
+    """Load the query graph: a snapshot, an edge list or the example graph
+
+    With mmap, an adjacency snapshot is memory mapped instead of loaded, for
+    graphs that do not fit in memory.
+    """
+    if snapshot and mmap:
+        from mmap_graph import MappedGraph
+        return MappedGraph(snapshot)
+    if snapshot:
+        from snapshot import load_snapshot
+        return load_snapshot(snapshot)
+    if edges:
+        return load_edge_list(edges, undirected)
+    graph = Graph()
+    graph.load_example_graph()
+    return graph
+
+
+def _query_node(node):
+    """Check that a JSON query node is a label a graph can have"""
+    if isinstance(node, bool) or not isinstance(node, (str, int)):
+        raise ValueError(f"nodes must be strings or integers, not {json.dumps(node)}")
+    return node
+
+
+def parse_query(line):
+    """Parse one query line
+
+    A query is either "source target" or a JSON object with source and
+    target, or with lists of sources and targets for a distance table, and
+    an optional id, which is copied to the result.
+
+    Returns:
+        Dictionary with source and target, or sources and targets, and id
+    """
+    line = line.strip()
+    if line.startswith('{'):
+        query = json.loads(line)
+        if isinstance(query.get('sources'), list) and isinstance(query.get('targets'), list):
+            return {'sources': [_query_node(node) for node in query['sources']],
+                    'targets': [_query_node(node) for node in query['targets']], 'id': query.get('id')}
+        if 'source' not in query or 'target' not in query:
+            raise ValueError("query needs a source and a target, or lists of sources and targets")
+        return {'source': _query_node(query['source']), 'target': _query_node(query['target']),
+                'id': query.get('id')}
+
+    fields = line.split()
+    if len(fields) != 2:
+        raise ValueError("expected 'source target'")
+    return {'source': parse_label(fields[0]), 'target': parse_label(fields[1]), 'id': None}
+
+
+def resolve(graph, node):
+    """Id of a query node, None when the graph has no such node
+
+    Integer tokens also match string labels ("12"), so a query can name a
+    node either way.
+    """
+    if graph.has_node(node):
+        return graph.get_id(node)
+    if isinstance(node, int) and graph.has_node(str(node)):
+        return graph.get_id(str(node))
+    return None
+
+
+def _json_distance(distance):
+    """Distance as written to the results, None when unreachable"""
+    return distance if distance != float('inf') else None
+
+
+class QueryRunner:
+    def __init__(self, graph, include_paths=True):
+        """Answer batches of shortest path queries on a graph
+
+        Queries of a batch that share a source are answered by one search,
+        which stops once all of their targets are settled. The search of the
+        last source is kept and resumed, so a stream sorted by source also
+        reuses it across batches. Table queries use the bucket-based
+        many-to-many search.
+
+        Args:
+            graph: Graph or GridGraph to query
+            include_paths: Whether results contain the path
+        """
+        self.graph = graph
+        self.include_paths = include_paths
+        self.search = None  # OneToManySearch of the last source
+        self.reverse = None  # Reverse adjacency, built by the first table query
+
+        # Statistics
+        self.queries = 0
+        self.errors = 0
+        self.runs = 0
+
+    def search_from(self, source_id):
+        """OneToManySearch of a source, resuming the last one when possible"""
+        if self.search is None or self.search.source_id != source_id:
+            self.search = OneToManySearch(self.graph, source_id)
+            self.runs += 1
+        return self.search
+
+    def answer_table(self, query, result):
+        """Fill result with the distance table of a sources/targets query"""
+        source_ids = [resolve(self.graph, node) for node in query['sources']]
+        target_ids = [resolve(self.graph, node) for node in query['targets']]
+        unknown = [node for node, node_id in zip(query['sources'] + query['targets'], source_ids + target_ids)
+                   if node_id is None]
+        if unknown:
+            self.errors += 1
+            result['error'] = f"unknown node {unknown[0]!r}"
+            return
+
+        if self.reverse is None:
+            self.reverse = reverse_adjacency(self.graph)
+        table, settled = many_to_many(self.graph, source_ids, target_ids, self.reverse)
+        self.runs += 1
+        result['distances'] = [[_json_distance(distance) for distance in row] for row in table]
+        result['settled'] = settled
+
+    def answer_batch(self, lines):
+        """Answer a batch of (line number, line) queries
+
+        Returns:
+            List of result dictionaries, in input order
+        """
+        results = [None] * len(lines)
+        by_source = {}  # source id -> [(result index, target id)], in order of first use
+        for index, (number, line) in enumerate(lines):
+            self.queries += 1
+            try:
+                query = parse_query(line)
+            except ValueError as error:
+                self.errors += 1
+                results[index] = {'line': number, 'error': str(error)}
+                continue
+
+            if 'sources' in query:
+                result = {'sources': query['sources'], 'targets': query['targets']}
+            else:
+                result = {'source': query['source'], 'target': query['target']}
+            if query['id'] is not None:
+                result['id'] = query['id']
+            results[index] = result
+
+            if 'sources' in query:
+                self.answer_table(query, result)
+                continue
+
+            source, target = query['source'], query['target']
+            source_id = resolve(self.graph, source)
+            target_id = resolve(self.graph, target)
+            if source_id is None or target_id is None:
+                self.errors += 1
+                result['error'] = f"unknown node {source if source_id is None else target!r}"
+                continue
+            by_source.setdefault(source_id, []).append((index, target_id))
+
+        # The kept search goes first, so it is resumed before being replaced
+        sources = sorted(by_source, key=lambda source_id: self.search is None or self.search.source_id != source_id)
+        for source_id in sources:
+            search = self.search_from(source_id)
+            search.run([target_id for _, target_id in by_source[source_id]])
+            for index, target_id in by_source[source_id]:
+                result = results[index]
+                distance = search.distance(target_id)
+                result['distance'] = _json_distance(distance)
+                if self.include_paths:
+                    reachable = distance != float('inf')
+                    result['path'] = self.graph.get_labels(path_ids(search.pred, target_id)) if reachable else []
+                result['settled'] = search.settled
+        return results
+
+
+def read_lines(file):
+    """(line number, line) of every non-blank line of a query stream"""
+    for number, line in enumerate(file, 1):
+        if line.strip() and not line.lstrip().startswith('#'):
+            yield number, line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a stream of shortest path queries as JSON Lines")
+    parser.add_argument('--snapshot', help="load the graph from a snapshot file written by generators.py")
+    parser.add_argument('--mmap', action='store_true',
+                        help="memory map the snapshot instead of loading it (graphs larger than memory)")
+    parser.add_argument('--edges', help="load the graph from a 'start end [weight]' edge list")
+    parser.add_argument('--undirected', action='store_true', help="edge list edges go both ways")
+    parser.add_argument('--queries', default='-', help="query file, one 'source target' per line (default stdin)")
+    parser.add_argument('--output', default='-', help="result file (default stdout)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="queries buffered and grouped by source before results are written")
+    parser.add_argument('--no-paths', action='store_true', help="only report distances")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    graph = load_graph(args.snapshot, args.edges, args.undirected, args.mmap)
+    print(f"Loaded {graph.get_node_count()} nodes in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    queries = sys.stdin if args.queries == '-' else open(args.queries)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+    runner = QueryRunner(graph, include_paths=not args.no_paths)
+    start = time.perf_counter()
+    try:
+        lines = read_lines(queries)
+        while True:
+            batch = list(islice(lines, args.batch_size))
+            if not batch:
+                break
+            results = runner.answer_batch(batch)
+            output.write(''.join(json.dumps(result) + '\n' for result in results))
+            output.flush()
+    finally:
+        if queries is not sys.stdin:
+            queries.close()
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Answered {runner.queries} queries ({runner.errors} errors) with {runner.runs} searches "
+          f"in {elapsed:.2f}s ({runner.queries / max(elapsed, 1e-9):.0f} queries/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import time
+
+import pygame
+
+import renderer
+from dijkstra import NO_NODE
+from graph import Graph
+from variants import VARIANTS, BidirectionalDijkstra
+
+# Screen layout of the race (inside the rectangle given to RaceView)
+TITLE_HEIGHT = 30
+COUNTERS_HEIGHT = 90
+PANE_MARGIN = 10
+
+# Colors
+TEXT_COLOR = (0, 0, 0)
+FINISHED_COLOR = (0, 100, 0)
+BORDER_COLOR = (180, 180, 180)
+BEST_COLOR = (0, 130, 0)
+
+
+class RacePane:
+    def __init__(self, algorithm_class, graph, start_node, end_node, rect):
+        """One algorithm of the race with its own state and counters
+
+        Args:
+            algorithm_class: DijkstraAlgorithm or one of its variants
+            graph: Graph shared by all panes
+            start_node: Start node
+            end_node: End node
+            rect: Area of the screen of the pane
+        """
+        self.rect = pygame.Rect(rect)
+        self.algorithm = algorithm_class(graph)
+        self.counters = self.algorithm.enable_counters()
+        self.algorithm.initialize(start_node, end_node)
+        self.elapsed = 0.0  # Seconds spent in the algorithm, drawing excluded
+
+    @property
+    def finished(self):
+        return self.algorithm.finished
+
+    def advance(self, steps):
+        """Execute up to steps steps, timing only the algorithm"""
+        start = time.perf_counter()
+        self.algorithm.advance(steps)
+        self.elapsed += time.perf_counter() - start
+
+    def distance(self):
+        """Distance to the end node found so far (inf when not reached)"""
+        algorithm = self.algorithm
+        if isinstance(algorithm, BidirectionalDijkstra):
+            # The forward state only gets the end node once the path is joined
+            return algorithm.best_distance
+        return algorithm.dist[algorithm.end_id] if algorithm.end_id != NO_NODE else float('inf')
+
+    def results(self):
+        """Counters of the pane by name"""
+        return {
+            'algorithm': self.algorithm.name,
+            'distance': self.distance(),
+            'path_nodes': len(self.algorithm.path),
+            'settled': len(self.algorithm.settle_order),
+            'relaxations': self.counters.relaxations,
+            'pops': self.counters.pops,
+            'time_s': self.elapsed,
+            'finished': self.algorithm.finished
+        }
+
+
+class RaceView:
+    def __init__(self, graph, start_node, end_node, rect, graph_size=(800, 600), variants=VARIANTS):
+        """Run several algorithms on the same graph side by side
+
+        Every pane has its own algorithm state, but the graph itself is
+        drawn once, scaled to the pane size, and that static layer is blitted
+        under the state of every pane.
+
+        Args:
+            graph: Graph or GridGraph
+            start_node: Start node of every algorithm
+            end_node: End node of every algorithm
+            rect: Area of the screen used by the race
+            graph_size: Size of the area the graph is laid out in on the main screen
+            variants: Algorithm classes, one pane each
+        """
+        self.graph = graph
+        self.start_node = start_node
+        self.end_node = end_node
+        self.rect = pygame.Rect(rect)
+
+        pane_width = self.rect.width // len(variants)
+        self.scale = min((pane_width - 2 * PANE_MARGIN) / graph_size[0],
+                         (self.rect.height * 0.55) / graph_size[1])
+        self.panes = [RacePane(variant, graph, start_node, end_node,
+                               (self.rect.left + index * pane_width, self.rect.top, pane_width,
+                                TITLE_HEIGHT + graph_size[1] * self.scale + COUNTERS_HEIGHT))
+                      for index, variant in enumerate(variants)]
+        self.summary_top = self.panes[0].rect.bottom + PANE_MARGIN
+
+        # Shared by every pane
+        self.static_layer = renderer.render_static_layer(graph, graph_size, self.scale, start_node, end_node)
+        if not isinstance(graph, Graph):
+            full = renderer.grid_image_rect(graph)
+            self.grid_image = pygame.Rect(full.left * self.scale, full.top * self.scale,
+                                          max(1, full.width * self.scale), max(1, full.height * self.scale))
+
+        self.title_font = pygame.font.SysFont('Arial', 20, bold=True)
+        self.font = pygame.font.SysFont('Arial', 16)
+        self.last_batch = 0.0
+
+    @property
+    def finished(self):
+        return all(pane.finished for pane in self.panes)
+
+    def update(self, step_delay, steps_per_batch):
+        """Advance every unfinished pane by the same number of steps
+
+        Args:
+            step_delay: Seconds between two batches
+            steps_per_batch: Steps per batch, None runs to the end
+
+        Returns:
+            True when a batch was executed
+        """
+        now = time.perf_counter()
+        if self.finished or now - self.last_batch < step_delay:
+            return False
+        self.last_batch = now
+        for pane in self.panes:
+            if not pane.finished:
+                pane.advance(steps_per_batch if steps_per_batch is not None else float('inf'))
+        return True
+
+    def results(self):
+        """Results of every pane, in pane order"""
+        return [pane.results() for pane in self.panes]
+
+    def draw(self, screen):
+        """Draw the panes and, once every algorithm finished, the summary"""
+        for pane in self.panes:
+            self._draw_pane(screen, pane)
+        if self.finished:
+            self._draw_summary(screen)
+        else:
+            hint = self.font.render("Racing... (-/+ change the speed, R goes back)", True, TEXT_COLOR)
+            screen.blit(hint, (self.rect.left + PANE_MARGIN, self.summary_top))
+
+    def _draw_pane(self, screen, pane):
+        rect = pane.rect
+        algorithm = pane.algorithm
+        title = self.title_font.render(algorithm.name, True, FINISHED_COLOR if pane.finished else TEXT_COLOR)
+        screen.blit(title, title.get_rect(midtop=(rect.centerx, rect.top + 5)))
+
+        origin = (rect.left + PANE_MARGIN, rect.top + TITLE_HEIGHT)
+        screen.blit(self.static_layer, origin)
+        current_id = algorithm.current_id if algorithm.current_id != NO_NODE and not pane.finished else None
+        if isinstance(self.graph, Graph):
+            renderer.draw_graph_overlay(self.graph, screen, origin, self.scale, algorithm.settle_order,
+                                        current_id, algorithm.path)
+        else:
+            renderer.draw_grid_overlay(self.graph, screen, self.grid_image.move(origin), algorithm.settle_order,
+                                       current_id, algorithm.path)
+        pygame.draw.rect(screen, BORDER_COLOR, (origin, self.static_layer.get_size()), 1)
+
+        # Live counters
+        results = pane.results()
+        distance = results['distance']
+        lines = [
+            f"Settled nodes: {results['settled']}",
+            f"Relaxations: {results['relaxations']}",
+            f"Time: {results['time_s'] * 1000:.1f} ms",
+            f"Distance: {'∞' if distance == float('inf') else distance}" + ("" if pane.finished else " (so far)")
+        ]
+        y = origin[1] + self.static_layer.get_height() + 5
+        for line in lines:
+            text = self.font.render(line, True, TEXT_COLOR)
+            screen.blit(text, (rect.left + PANE_MARGIN, y))
+            y += 20
+
+    def _draw_summary(self, screen):
+        """Table comparing the finished algorithms, relative to the first pane"""
+        results = self.results()
+        baseline = results[0]
+        columns = [("Algorithm", 160), ("Distance", 110), ("Path nodes", 110), ("Settled", 100),
+                   ("Relaxations", 120), ("Time (ms)", 110), ("Settled vs " + baseline['algorithm'], 170)]
+        best_time = min(result['time_s'] for result in results)
+        best_settled = min(result['settled'] for result in results)
+
+        x0 = self.rect.left + PANE_MARGIN
+        y = self.summary_top
+        x = x0
+        for name, width in columns:
+            screen.blit(self.title_font.render(name, True, TEXT_COLOR), (x, y))
+            x += width
+        y += 28
+        for result in results:
+            ratio = result['settled'] / baseline['settled'] if baseline['settled'] else 1.0
+            cells = [
+                (result['algorithm'], TEXT_COLOR),
+                ('∞' if result['distance'] == float('inf') else str(result['distance']), TEXT_COLOR),
+                (str(result['path_nodes']), TEXT_COLOR),
+                (str(result['settled']), BEST_COLOR if result['settled'] == best_settled else TEXT_COLOR),
+                (str(result['relaxations']), TEXT_COLOR),
+                (f"{result['time_s'] * 1000:.1f}", BEST_COLOR if result['time_s'] == best_time else TEXT_COLOR),
+                (f"{ratio:.2f}x", TEXT_COLOR)
+            ]
+            x = x0
+            for (text, color), (_, width) in zip(cells, columns):
+                screen.blit(self.font.render(text, True, color), (x, y))
+                x += width
+            y += 24
+        hint = self.font.render("R goes back to the single algorithm view", True, TEXT_COLOR)
+        screen.blit(hint, (x0, y + 10))
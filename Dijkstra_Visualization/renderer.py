@@ -0,0 +1,318 @@
+import math
+
+import numpy as np
+import pygame
+
+from grid import WALL_NORTH, WALL_EAST, WALL_SOUTH, WALL_WEST, MAX_COST
+
+# Drawing code of Graph and GridGraph. The data model modules only import
+# this module inside their draw() methods, so they load without pygame.
+
+# Palette indices used while drawing a grid; 0..15 are the cell costs
+_VISITED = 16
+_TESTING = 17
+_PATH = 18
+_CURRENT = 19
+_START = 20
+_END = 21
+_WALL = 22
+
+
+def draw_graph(graph, screen, current_node=None, visited_nodes=None,
+               testing_edges=None, shortest_path=None, start_node=None, end_node=None):
+    """Draw a Graph on the screen with visualization of algorithm state"""
+    if visited_nodes is None:
+        visited_nodes = []
+    if testing_edges is None:
+        testing_edges = []
+    if shortest_path is None:
+        shortest_path = []
+
+    # Membership tests below run once per node or edge
+    visited_nodes = set(visited_nodes)
+    testing_edges = set(testing_edges)
+    labels = graph.get_label_sequence()
+    colors = graph.colors
+
+    # Draw edges first (so they appear behind the nodes)
+    for start_id, start in enumerate(labels):
+        start_pos = graph.node_positions[start]
+        for end_id, weight in graph.get_id_neighbors(start_id):
+            end = labels[end_id]
+            end_pos = graph.node_positions[end]
+
+            # Determine edge color based on algorithm state
+            edge_color = colors['edge']
+
+            # Check if this edge is part of the shortest path
+            if shortest_path and len(shortest_path) > 1:
+                for i in range(len(shortest_path) - 1):
+                    if shortest_path[i] == start and shortest_path[i + 1] == end:
+                        edge_color = colors['shortest']
+                        break
+
+            # Check if this edge is being tested
+            if (start, end) in testing_edges:
+                edge_color = colors['testing']
+
+            # Draw the edge line
+            _draw_edge(graph, screen, start_pos, end_pos, weight, edge_color)
+
+    # Draw nodes
+    for node in labels:
+        # Determine node color based on algorithm state
+        node_color = colors['node']
+
+        if node == current_node:
+            node_color = colors['current']
+        elif node in visited_nodes:
+            node_color = colors['visited']
+
+        if node == start_node:
+            node_color = colors['start']
+        elif node == end_node:
+            node_color = colors['end']
+
+        # Draw the node
+        pos = graph.node_positions[node]
+        pygame.draw.circle(screen, node_color, pos, graph.node_radius)
+        pygame.draw.circle(screen, colors['edge'], pos, graph.node_radius, 2)
+
+        # Draw node label
+        font = pygame.font.SysFont('Arial', 20)
+        text = font.render(str(node), True, colors['text'])
+        text_rect = text.get_rect(center=pos)
+        screen.blit(text, text_rect)
+
+
+def _draw_edge(graph, screen, start_pos, end_pos, weight, color):
+    """Draw a directed edge with weight and arrow"""
+    # Calculate direction vector
+    dx = end_pos[0] - start_pos[0]
+    dy = end_pos[1] - start_pos[1]
+    distance = max(1, math.sqrt(dx * dx + dy * dy))
+
+    # Normalize direction
+    dx, dy = dx / distance, dy / distance
+
+    # Adjust start and end positions to account for node radius
+    adjusted_start_x = start_pos[0] + dx * graph.node_radius
+    adjusted_start_y = start_pos[1] + dy * graph.node_radius
+    adjusted_end_x = end_pos[0] - dx * graph.node_radius
+    adjusted_end_y = end_pos[1] - dy * graph.node_radius
+
+    # Draw the line
+    pygame.draw.line(screen, color,
+                     (adjusted_start_x, adjusted_start_y),
+                     (adjusted_end_x, adjusted_end_y), 2)
+
+    # Draw arrow at the end
+    _draw_arrow(graph, screen, (adjusted_end_x, adjusted_end_y), (dx, dy), color)
+
+    # Draw weight
+    # Position the weight text in the middle of the edge
+    mid_x = (adjusted_start_x + adjusted_end_x) / 2
+    mid_y = (adjusted_start_y + adjusted_end_y) / 2
+
+    # Offset the text slightly to the side of the edge
+    normal_x, normal_y = -dy, dx  # Normal vector to the edge
+    offset_x = mid_x + normal_x * 15
+    offset_y = mid_y + normal_y * 15
+
+    font = pygame.font.SysFont('Arial', 16)
+    text = font.render(str(weight), True, color)
+    text_rect = text.get_rect(center=(offset_x, offset_y))
+    screen.blit(text, text_rect)
+
+
+def _draw_arrow(graph, screen, pos, direction, color):
+    """Draw an arrow head at pos pointing in direction"""
+    dx, dy = direction
+    size = graph.arrow_size
+
+    # Calculate perpendicular vector
+    perp_dx, perp_dy = -dy, dx
+
+    # Calculate arrow points
+    x, y = pos
+    point1 = (x - dx * size - perp_dx * size/2,
+              y - dy * size - perp_dy * size/2)
+    point2 = (x - dx * size + perp_dx * size/2,
+              y - dy * size + perp_dy * size/2)
+
+    # Draw arrow head
+    pygame.draw.polygon(screen, color, [pos, point1, point2])
+
+
+def draw_grid(grid, screen, current_node=None, visited_nodes=None,
+              testing_edges=None, shortest_path=None, start_node=None, end_node=None):
+    """Draw a GridGraph as a bitmap, one tile per cell, inside grid.rect
+
+    Takes the same arguments as draw_graph. When a cell is smaller than a
+    pixel the grid is sampled, and walls are only drawn when the tiles are
+    at least 2 pixels wide.
+    """
+    width, height = grid.width, grid.height
+    rect = pygame.Rect(grid.rect)
+    tile = min(rect.width // width, rect.height // height)
+
+    codes = _grid_cache(grid)['costs'].copy()
+    flat = codes.reshape(-1)
+    if visited_nodes:
+        flat[np.fromiter(visited_nodes, dtype=np.int64, count=len(visited_nodes))] = _VISITED
+    if testing_edges:
+        flat[[end for _, end in testing_edges]] = _TESTING
+    if shortest_path:
+        flat[list(shortest_path)] = _PATH
+    for node, code in ((current_node, _CURRENT), (start_node, _START), (end_node, _END)):
+        if node is not None:
+            flat[node] = code
+
+    if tile >= 2:
+        codes = np.repeat(np.repeat(codes, tile, axis=0), tile, axis=1)
+        codes[_wall_mask(grid, tile)] = _WALL
+    elif tile == 0:
+        # More cells than pixels: sample one cell per pixel
+        scale = min(rect.width / width, rect.height / height)
+        rows = np.arange(max(1, int(height * scale))) * height // max(1, int(height * scale))
+        columns = np.arange(max(1, int(width * scale))) * width // max(1, int(width * scale))
+        codes = codes[rows[:, None], columns]
+
+    image = _palette(grid)[codes]
+    surface = pygame.surfarray.make_surface(image.swapaxes(0, 1))
+    screen.blit(surface, surface.get_rect(center=rect.center))
+
+
+def grid_image_rect(grid):
+    """Screen rectangle covered by the bitmap draw_grid blits into grid.rect"""
+    rect = pygame.Rect(grid.rect)
+    tile = min(rect.width // grid.width, rect.height // grid.height)
+    if tile >= 1:
+        size = (grid.width * tile, grid.height * tile)
+    else:
+        scale = min(rect.width / grid.width, rect.height / grid.height)
+        size = (max(1, int(grid.width * scale)), max(1, int(grid.height * scale)))
+    image = pygame.Rect((0, 0), size)
+    image.center = rect.center
+    return image
+
+
+def render_static_layer(graph, size, scale, start_node=None, end_node=None):
+    """Draw a graph without any algorithm state on its own surface, scaled
+
+    The layer is drawn once and blitted under the state of every view
+    showing the graph (see race.py), instead of drawing the graph again
+    for each of them.
+
+    Args:
+        graph: Graph or GridGraph, drawn as on the main screen
+        size: (width, height) of the surface the graph is drawn on at full size
+        scale: Factor the surface is scaled by
+    """
+    surface = pygame.Surface(size)
+    surface.fill(graph.colors.get('background', (255, 255, 255)))
+    graph.draw(surface, start_node=start_node, end_node=end_node)
+    return pygame.transform.smoothscale(surface, (max(1, int(size[0] * scale)), max(1, int(size[1] * scale))))
+
+
+def draw_graph_overlay(graph, screen, origin, scale, visited_ids=(), current_id=None, path=None):
+    """Draw the algorithm state of a Graph over a layer from render_static_layer
+
+    Visited nodes get a ring, so the labels of the layer stay readable.
+
+    Args:
+        origin: Screen position of the layer
+        scale: Scale of the layer
+        visited_ids: Ids of the visited nodes
+        current_id: Id of the current node, if any
+        path: Labels of the shortest path, if any
+    """
+    labels = graph.get_label_sequence()
+    positions = graph.node_positions
+    colors = graph.colors
+    radius = max(2, int(graph.node_radius * scale))
+
+    def point(label):
+        x, y = positions[label]
+        return (origin[0] + x * scale, origin[1] + y * scale)
+
+    if path:
+        points = [point(node) for node in path]
+        if len(points) > 1:
+            pygame.draw.lines(screen, colors['shortest'], False, points, max(2, int(4 * scale)))
+    for node_id in visited_ids:
+        pygame.draw.circle(screen, colors['visited'], point(labels[node_id]), radius, max(2, radius // 3))
+    if current_id is not None:
+        pygame.draw.circle(screen, colors['current'], point(labels[current_id]), radius, max(2, radius // 3))
+
+
+def draw_grid_overlay(grid, screen, image_rect, visited_ids=(), current_id=None, path=None):
+    """Draw the algorithm state of a GridGraph over a layer from render_static_layer
+
+    The state is drawn as a translucent bitmap with one pixel per cell,
+    stretched over image_rect (where the layer shows the cells), so the
+    walls underneath stay visible.
+    """
+    codes = np.zeros(grid.width * grid.height, dtype=np.uint8)
+    if visited_ids:
+        codes[np.fromiter(visited_ids, dtype=np.int64, count=len(visited_ids))] = 1
+    if path:
+        codes[list(path)] = 2
+    if current_id is not None:
+        codes[current_id] = 3
+    # Index 0 is the transparent color key
+    palette = np.array([(255, 0, 255), grid.colors['visited'], grid.colors['shortest'], grid.colors['current']],
+                       dtype=np.uint8)
+    image = palette[codes.reshape(grid.height, grid.width)]
+    surface = pygame.surfarray.make_surface(image.swapaxes(0, 1))
+    surface = pygame.transform.scale(surface, image_rect.size)
+    surface.set_colorkey((255, 0, 255))
+    surface.set_alpha(170)
+    screen.blit(surface, image_rect)
+
+
+def _grid_cache(grid):
+    """Drawing cache of a grid, rebuilt when the grid version changes
+
+    Holds the (height, width) array of cost indices and the wall masks by
+    tile size.
+    """
+    cache = grid.draw_cache
+    if cache is None or cache['version'] != grid.version:
+        cells = np.frombuffer(bytes(grid.cells), dtype=np.uint8).reshape(grid.height, grid.width)
+        cache = grid.draw_cache = {'version': grid.version, 'costs': cells >> 4, 'wall_masks': {}}
+    return cache
+
+
+def _wall_mask(grid, tile):
+    """Pixels covered by walls when every cell is a tile x tile square"""
+    masks = _grid_cache(grid)['wall_masks']
+    mask = masks.get(tile)
+    if mask is not None:
+        return mask
+
+    cells = np.frombuffer(bytes(grid.cells), dtype=np.uint8).reshape(grid.height, grid.width)
+    mask = np.zeros((grid.height, tile, grid.width, tile), dtype=bool)
+
+    # Shared walls are drawn once, on the north and west side of a tile;
+    # east and south walls only matter on the last column and row
+    mask[:, 0, :, :] |= ((cells & WALL_NORTH) != 0)[:, :, None]
+    mask[:, :, :, 0] |= ((cells & WALL_WEST) != 0)[:, None, :]
+    mask[:, :, -1, -1] |= ((cells[:, -1] & WALL_EAST) != 0)[:, None]
+    mask[-1, -1, :, :] |= ((cells[-1, :] & WALL_SOUTH) != 0)[:, None]
+
+    # Corner posts keep the maze readable where walls meet
+    mask[:, 0, :, 0] = True
+
+    mask = mask.reshape(grid.height * tile, grid.width * tile)
+    masks[tile] = mask
+    return mask
+
+
+def _palette(grid):
+    """RGB color of every palette index"""
+    low = np.array(grid.colors['cell'], dtype=float)
+    high = np.array(grid.colors['expensive'], dtype=float)
+    shades = [low + (high - low) * cost / (MAX_COST - 1) for cost in range(MAX_COST)]
+    named = [grid.colors[name] for name in ('visited', 'testing', 'shortest', 'current', 'start', 'end', 'wall')]
+    return np.array(shades + named, dtype=np.uint8)
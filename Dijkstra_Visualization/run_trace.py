@@ -0,0 +1,517 @@
+import argparse
+import heapq
+import struct
+import sys
+
+from dijkstra import DijkstraAlgorithm, StepListener
+from graph import Graph
+from graph_options import add_graph_arguments, corner_nodes, graph_from_args
+from query_cli import parse_label, resolve
+from variants import AStarAlgorithm
+
+# File layout:
+#   header   MAGIC, version (B), node count (I), start id (I), end id (I), edge count (I)
+#   labels   node count x (kind (B), length (H), UTF-8 bytes), ids are the table order
+#   edges    edge count x (source (I), target (I), weight)
+#   potential  count (I), then count x value: the potential added to the
+#            queue keys, per node id (count is 0 without one; version 2)
+#   events   opcode (B) followed by the payload of the event
+# Weights and potential values are a flag byte (FLOAT or 0) and a number.
+MAGIC = b'DJTR'
+VERSION = 2
+TRACE_NO_NODE = 0xFFFFFFFF  # Missing start or end node in the header
+
+# Algorithms the record command can run (their steps must be recordable)
+RECORD_ALGORITHMS = {
+    'dijkstra': DijkstraAlgorithm,
+    'astar': AStarAlgorithm
+}
+
+# Event opcodes
+STEP = 0x01     # a new call of step() starts
+POP = 0x02      # node, distance: entry removed from the queue
+SETTLE = 0x03   # node: node marked as visited
+RELAX = 0x04    # node, neighbor, distance: edge tested, distance not shorter
+UPDATE = 0x05   # node, neighbor, distance: shorter distance found and pushed
+
+# Numbers are stored as int64 unless the opcode has this bit set (float64)
+FLOAT = 0x80
+
+_HEADER = struct.Struct('<4sBIIII')
+_LABEL = struct.Struct('<BH')
+_NODE = struct.Struct('<I')
+_EDGE = struct.Struct('<II')
+_COUNT = struct.Struct('<I')
+_NODE_NUMBER = {False: struct.Struct('<Iq'), True: struct.Struct('<Id')}
+_TWO_NODES_NUMBER = {False: struct.Struct('<IIq'), True: struct.Struct('<IId')}
+_NUMBER = {False: struct.Struct('<q'), True: struct.Struct('<d')}
+
+# Size of every record, indexed by opcode
+_RECORD_SIZES = {
+    STEP: 1,
+    POP: 1 + 12, POP | FLOAT: 1 + 12,
+    SETTLE: 1 + 4,
+    RELAX: 1 + 16, RELAX | FLOAT: 1 + 16,
+    UPDATE: 1 + 16, UPDATE | FLOAT: 1 + 16
+}
+
+
+def _encode_label(label):
+    if isinstance(label, int) and not isinstance(label, bool):
+        kind = ord('i')
+    elif isinstance(label, str):
+        kind = ord('s')
+    else:
+        raise ValueError(f"Cannot store node label {label!r} in a trace")
+    data = str(label).encode('utf-8')
+    if len(data) > 0xFFFF:
+        raise ValueError(f"Node label of {len(data)} bytes is too long for a trace")
+    return kind, data
+
+
+def _decode_label(kind, data):
+    text = data.decode('utf-8')
+    return int(text) if kind == ord('i') else text
+
+
+def _number_flag(value):
+    return FLOAT if isinstance(value, float) else 0
+
+
+class TraceRecorder(StepListener):
+    def __init__(self, algorithm, output, include_graph=True, buffer_size=1 << 16):
+        """Record the steps of an algorithm as a compact binary trace
+
+        Nodes are written once in a label table and referenced in the events
+        by their graph id (the position in the table). The potential of the
+        algorithm (see AStarAlgorithm) is stored too, so a replay builds the
+        same queue. Register the recorder right after initialize() and close()
+        it when the run is over.
+
+        Args:
+            algorithm: Initialized DijkstraAlgorithm to record
+            output: Binary file object (or path) receiving the trace
+            include_graph: Store the edges, so the trace can be drawn without the graph
+            buffer_size: Bytes buffered before they are written to the output
+        """
+        if not algorithm.recordable:
+            raise ValueError(f"{algorithm.name} steps cannot be recorded")
+        self.algorithm = algorithm
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+
+        graph = algorithm.graph
+        labels = graph.get_nodes()
+        edges = []
+        if include_graph:
+            for node in range(len(labels)):
+                for neighbor, weight in graph.get_id_neighbors(node):
+                    edges.append((node, neighbor, weight))
+
+        # Ids are never negative, the algorithm uses -1 for a missing end node
+        end_id = algorithm.end_id if algorithm.end_id >= 0 else TRACE_NO_NODE
+        self.buffer += _HEADER.pack(MAGIC, VERSION, len(labels), algorithm.start_id, end_id, len(edges))
+        for label in labels:
+            kind, data = _encode_label(label)
+            self.buffer += _LABEL.pack(kind, len(data))
+            self.buffer += data
+        for source, target, weight in edges:
+            flag = _number_flag(weight)
+            self.buffer.append(flag)
+            self.buffer += _EDGE.pack(source, target)
+            self.buffer += _NUMBER[bool(flag)].pack(weight)
+        potential = algorithm.potential if algorithm.potential is not None else []
+        self.buffer += _COUNT.pack(len(potential))
+        for value in potential:
+            flag = _number_flag(value)
+            self.buffer.append(flag)
+            self.buffer += _NUMBER[bool(flag)].pack(value)
+
+        # Opened last, so unsupported labels leave no partial file behind
+        self.owns_output = isinstance(output, str)
+        self.output = open(output, 'wb') if self.owns_output else output
+        algorithm.listeners.append(self)
+
+    def close(self):
+        """Stop recording and write the buffered events"""
+        if self in self.algorithm.listeners:
+            self.algorithm.listeners.remove(self)
+        self._flush()
+        if self.owns_output:
+            self.output.close()
+        else:
+            self.output.flush()
+
+    def step_started(self, algorithm):
+        self.buffer.append(STEP)
+
+    def node_popped(self, distance, node):
+        flag = _number_flag(distance)
+        self.buffer.append(POP | flag)
+        self.buffer += _NODE_NUMBER[bool(flag)].pack(node, distance)
+
+    def node_settled(self, node):
+        self.buffer.append(SETTLE)
+        self.buffer += _NODE.pack(node)
+
+    def edge_relaxed(self, node, neighbor, new_distance, improved, old_distance, old_predecessor):
+        flag = _number_flag(new_distance)
+        self.buffer.append((UPDATE if improved else RELAX) | flag)
+        self.buffer += _TWO_NODES_NUMBER[bool(flag)].pack(node, neighbor, new_distance)
+
+    def step_finished(self, algorithm):
+        if len(self.buffer) >= self.buffer_size:
+            self._flush()
+
+    def _flush(self):
+        self.output.write(self.buffer)
+        self.buffer = bytearray()
+
+
+class Trace:
+    def __init__(self, data):
+        """A recorded run loaded in memory
+
+        Loading builds an index with the offset of every step, so the events
+        of any step can be decoded directly.
+
+        Args:
+            data: Bytes of a trace file
+        """
+        self.data = data
+        magic, version, node_count, start_id, end_id, edge_count = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version not in (1, VERSION):
+            raise ValueError("Not a trace file (or unsupported version)")
+
+        offset = _HEADER.size
+        self.labels = []
+        for _ in range(node_count):
+            kind, length = _LABEL.unpack_from(data, offset)
+            offset += _LABEL.size
+            self.labels.append(_decode_label(kind, data[offset:offset + length]))
+            offset += length
+        self.start_node = self.labels[start_id] if start_id != TRACE_NO_NODE else None
+        self.end_node = self.labels[end_id] if end_id != TRACE_NO_NODE else None
+
+        self.edges = []
+        for _ in range(edge_count):
+            flag = data[offset]
+            source, target = _EDGE.unpack_from(data, offset + 1)
+            weight, = _NUMBER[bool(flag & FLOAT)].unpack_from(data, offset + 1 + _EDGE.size)
+            self.edges.append((source, target, weight))
+            offset += 1 + _EDGE.size + 8
+
+        # Version 1 traces have no potential
+        self.potential = None
+        if version >= 2:
+            count, = _COUNT.unpack_from(data, offset)
+            offset += _COUNT.size
+            if count:
+                self.potential = []
+                for _ in range(count):
+                    value, = _NUMBER[bool(data[offset] & FLOAT)].unpack_from(data, offset + 1)
+                    self.potential.append(value)
+                    offset += 9
+
+        # Index the start of every step
+        self.step_offsets = []
+        size = len(data)
+        while offset < size:
+            opcode = data[offset]
+            if opcode == STEP:
+                self.step_offsets.append(offset)
+            offset += _RECORD_SIZES[opcode]
+        self.step_offsets.append(size)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as trace_file:
+            return cls(trace_file.read())
+
+    @property
+    def step_total(self):
+        """Number of recorded steps"""
+        return len(self.step_offsets) - 1
+
+    def step_events(self, index):
+        """Decode the events of one step
+
+        Returns:
+            List of (opcode, node, neighbor, distance) tuples with node labels;
+            unused fields are None and the FLOAT bit is removed from opcodes
+        """
+        labels = self.labels
+        return [(opcode, labels[node], None if neighbor is None else labels[neighbor], distance)
+                for opcode, node, neighbor, distance in self.step_event_ids(index)]
+
+    def step_event_ids(self, index):
+        """Decode the events of one step, like step_events but with node ids"""
+        data = self.data
+        offset = self.step_offsets[index] + 1
+        end = self.step_offsets[index + 1]
+        events = []
+        while offset < end:
+            opcode = data[offset]
+            is_float = bool(opcode & FLOAT)
+            kind = opcode & ~FLOAT
+            if kind == POP:
+                node, distance = _NODE_NUMBER[is_float].unpack_from(data, offset + 1)
+                events.append((POP, node, None, distance))
+            elif kind == SETTLE:
+                node, = _NODE.unpack_from(data, offset + 1)
+                events.append((SETTLE, node, None, None))
+            else:
+                node, neighbor, distance = _TWO_NODES_NUMBER[is_float].unpack_from(data, offset + 1)
+                events.append((kind, node, neighbor, distance))
+            offset += _RECORD_SIZES[opcode]
+        return events
+
+    def build_graph(self):
+        """Graph with the nodes and edges stored in the trace (without positions)
+
+        Node ids of the graph are the ids used in the trace.
+        """
+        neighbors = [[] for _ in self.labels]
+        for source, target, weight in self.edges:
+            neighbors[source].append((target, weight))
+        return Graph.from_adjacency(self.labels, neighbors)
+
+    def summary(self):
+        """Count the events of the trace"""
+        counts = {'steps': self.step_total, 'pops': 0, 'settled': 0, 'relaxations': 0, 'updates': 0}
+        names = {POP: 'pops', SETTLE: 'settled', RELAX: 'relaxations', UPDATE: 'updates'}
+        for index in range(self.step_total):
+            for event in self.step_events(index):
+                counts[names[event[0]]] += 1
+        counts['relaxations'] += counts['updates']
+        return counts
+
+    def final_distances(self):
+        """Distances of every reached node at the end of the run"""
+        distances = {self.start_node: 0}
+        for index in range(self.step_total):
+            for opcode, _, neighbor, distance in self.step_events(index):
+                if opcode == UPDATE:
+                    distances[neighbor] = distance
+        return distances
+
+    def settle_order(self):
+        """Nodes in the order they were settled"""
+        order = []
+        for index in range(self.step_total):
+            for opcode, node, _, _ in self.step_events(index):
+                if opcode == SETTLE:
+                    order.append(node)
+        return order
+
+
+class TracePlayer(DijkstraAlgorithm):
+    def __init__(self, trace, graph=None):
+        """Replay a recorded trace with the interface of DijkstraAlgorithm
+
+        Steps apply the recorded events instead of exploring the graph, so the
+        visualizer (and StepHistory for random access) work unchanged.
+
+        Args:
+            trace: Trace to replay
+            graph: Graph already built with trace.build_graph(), built when not given
+        """
+        super().__init__(graph if graph is not None else trace.build_graph())
+        self.trace = trace
+
+    def initialize(self, start_node=None, end_node=None):
+        """Initialize the replay; the start and end nodes come from the trace"""
+        super().initialize(self.trace.start_node, self.trace.end_node)
+
+    def _compute_potential(self):
+        return self.trace.potential
+
+    def _execute_step(self, listeners):
+        """Apply the events of the next recorded step (index steps_taken)"""
+        if self.steps_taken >= self.trace.step_total:
+            self.finished = True
+            return
+        events = self.trace.step_event_ids(self.steps_taken)
+        labels = self.graph.get_label_sequence()
+        dist = self.dist
+        pred = self.pred
+
+        settled = False
+        for opcode, node, neighbor, distance in events:
+            if opcode == POP:
+                self.step_count += 1
+                self.testing_ids = []
+                heapq.heappop(self.priority_queue)
+                self.current_id = node
+                if listeners:
+                    for listener in listeners:
+                        listener.node_popped(distance, node)
+                if node == self.end_id:
+                    self.logs.append(f"Reached destination node {self.end_node}")
+                    self.finished = True
+                    self._reconstruct_path()
+                    return
+                if self.settled[node]:
+                    self.logs.append(f"Node {labels[node]} has already been visited. Skipping.")
+            elif opcode == SETTLE:
+                settled = True
+                self.settled[node] = 1
+                self.settle_order.append(node)
+                if listeners:
+                    for listener in listeners:
+                        listener.node_settled(node)
+                self.logs.append(f"Step {self.step_count}: Processing node {labels[node]} "
+                                 f"with distance {dist[node]}")
+            else:
+                improved = opcode == UPDATE
+                self.testing_ids.append((node, neighbor))
+                if listeners:
+                    for listener in listeners:
+                        listener.edge_relaxed(node, neighbor, distance, improved, dist[neighbor], pred[neighbor])
+                if improved:
+                    self.logs.append(f"Found shorter path to {labels[neighbor]} via {labels[node]}: {distance}")
+                    dist[neighbor] = distance
+                    pred[neighbor] = node
+                    key = distance if self.potential is None else distance + self.potential[neighbor]
+                    heapq.heappush(self.priority_queue, (key, neighbor))
+                else:
+                    self.logs.append(f"Path to {labels[neighbor]} via {labels[node]} is not shorter: "
+                                     f"{distance} >= {dist[neighbor]}")
+
+        # A step without a processed node ends with an empty queue
+        if not settled:
+            self.step_count += 1
+            self.testing_ids = []
+            self.logs.append("Priority queue is empty. Algorithm complete.")
+            self.finished = True
+            self._reconstruct_path()
+
+
+def diff_traces(first, second):
+    """Compare two traces of the same query, e.g. from two algorithm variants
+
+    Returns:
+        Dictionary with the event counts of both traces, the first step whose
+        events differ, the first position where the settle order differs and
+        the nodes whose final distances disagree
+    """
+    first_step = None
+    for index in range(min(first.step_total, second.step_total)):
+        if first.step_events(index) != second.step_events(index):
+            first_step = index
+            break
+    if first_step is None and first.step_total != second.step_total:
+        first_step = min(first.step_total, second.step_total)
+
+    first_order = first.settle_order()
+    second_order = second.settle_order()
+    settle_divergence = None
+    for index, (a, b) in enumerate(zip(first_order, second_order)):
+        if a != b:
+            settle_divergence = index
+            break
+    if settle_divergence is None and len(first_order) != len(second_order):
+        settle_divergence = min(len(first_order), len(second_order))
+
+    first_distances = first.final_distances()
+    second_distances = second.final_distances()
+    distance_mismatches = {}
+    for node in first_distances.keys() | second_distances.keys():
+        a = first_distances.get(node, float('inf'))
+        b = second_distances.get(node, float('inf'))
+        if a != b:
+            distance_mismatches[node] = (a, b)
+
+    return {
+        'first': first.summary(),
+        'second': second.summary(),
+        'first_different_step': first_step,
+        'settle_order_divergence': settle_divergence,
+        'distance_mismatches': distance_mismatches
+    }
+
+
+def record_run(path, graph, start_node, end_node, algorithm_class=DijkstraAlgorithm, include_graph=True):
+    """Run an algorithm to the end, recording it to a trace file
+
+    Returns:
+        The finished algorithm
+    """
+    algorithm = algorithm_class(graph)
+    algorithm.initialize(start_node, end_node)
+    recorder = TraceRecorder(algorithm, path, include_graph)
+    try:
+        algorithm.run_to_completion()
+    finally:
+        recorder.close()
+    return algorithm
+
+
+def record_example(path, start_node='s', end_node='t'):
+    """Record a run on the example graph"""
+    graph = Graph()
+    graph.load_example_graph()
+    record_run(path, graph, start_node, end_node)
+
+
+def _node_argument(graph, token):
+    """Node label named by a command line token"""
+    node_id = resolve(graph, parse_label(token))
+    if node_id is None:
+        raise SystemExit(f"Unknown node {token!r}")
+    return graph.get_label(node_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record, inspect and compare algorithm traces")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="record a run on the example graph, a maze or a snapshot")
+    record.add_argument('output')
+    record.add_argument('--start', help="start node (s on the example graph, else the first node)")
+    record.add_argument('--end', help="end node (t on the example graph, else the last node)")
+    record.add_argument('--algorithm', choices=sorted(RECORD_ALGORITHMS), default='dijkstra',
+                        help="algorithm to record")
+    record.add_argument('--no-graph', action='store_true',
+                        help="leave the edges out of the trace (it can then only be inspected and compared)")
+    add_graph_arguments(record)
+
+    info = commands.add_parser('info', help="show the event counts of a trace")
+    info.add_argument('trace')
+
+    diff = commands.add_parser('diff', help="compare two traces")
+    diff.add_argument('first')
+    diff.add_argument('second')
+
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        graph = graph_from_args(args)
+        if graph is None:
+            graph = Graph()
+            graph.load_example_graph()
+            start_node, end_node = 's', 't'
+        else:
+            start_node, end_node = corner_nodes(graph)
+        if args.start is not None:
+            start_node = _node_argument(graph, args.start)
+        if args.end is not None:
+            end_node = _node_argument(graph, args.end)
+        algorithm = record_run(args.output, graph, start_node, end_node,
+                               RECORD_ALGORITHMS[args.algorithm], not args.no_graph)
+        print(f"Recorded {algorithm.steps_taken} steps of {algorithm.name} from {start_node} to {end_node}: "
+              f"distance {algorithm.dist[algorithm.end_id] if algorithm.end_id >= 0 else None}", file=sys.stderr)
+    elif args.command == 'info':
+        trace = Trace.load(args.trace)
+        print(f"{trace.start_node} -> {trace.end_node}, {len(trace.labels)} nodes, {len(trace.edges)} edges")
+        for name, count in trace.summary().items():
+            print(f"{name}: {count}")
+    elif args.command == 'diff':
+        result = diff_traces(Trace.load(args.first), Trace.load(args.second))
+        for name, value in result.items():
+            print(f"{name}: {value}")
+        if result['first_different_step'] is not None:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
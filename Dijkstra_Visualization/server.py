@@ -0,0 +1,404 @@
+import argparse
+import asyncio
+import collections
+import json
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dijkstra import shortest_path_tree, path_ids
+from query_cli import load_graph, resolve
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 10000
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 20
+
+# Most header lines accepted in a request; a line itself is capped by the
+# stream reader limit (64 KiB by default)
+MAX_HEADERS = 100
+
+# Number of recent calls the latency percentiles and the recent rate are computed from
+LATENCY_WINDOW = 2048
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+UNKNOWN_NODE = -32000
+
+STATUS_TEXT = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large'}
+
+
+class RpcError(Exception):
+    """Error returned to the client as a JSON-RPC error object"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class HttpError(Exception):
+    """Malformed or refused HTTP message, answered with its status before closing"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_line(reader, status):
+    """Read one line, raising HttpError with the status when it is over the reader limit"""
+    try:
+        return await reader.readline()
+    except ValueError:
+        raise HttpError(status, "Line too long") from None
+
+
+async def read_message(reader):
+    """Read one HTTP/1.1 message
+
+    Returns:
+        (start line, {lowercase header: value}, body), or None at end of stream
+
+    Raises:
+        HttpError: 400 for a request line over the reader limit or an invalid
+                   Content-Length, 431 for a header line over the limit or
+                   more than MAX_HEADERS headers, 413 for a body over MAX_BODY
+    """
+    line = await read_line(reader, 400)
+    if not line:
+        return None
+    start_line = line.decode('latin-1').rstrip('\r\n')
+    headers = {}
+    for _ in range(MAX_HEADERS + 1):
+        line = await read_line(reader, 431)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(431, f"More than {MAX_HEADERS} headers")
+
+    value = headers.get('content-length', '0')
+    if not (value.isascii() and value.isdigit()):
+        raise HttpError(400, f"Invalid Content-Length {value!r}")
+    length = int(value)
+    if length > MAX_BODY:
+        raise HttpError(413, f"Body of {length} bytes is too large")
+    body = await reader.readexactly(length) if length else b''
+    return start_line, headers, body
+
+
+def format_response(status, payload=None, keep_alive=True):
+    """HTTP response bytes with a JSON body"""
+    body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+def percentile(values, fraction):
+    """Value at a fraction (0..1) of the sorted values, 0.0 when empty"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class ServerMetrics:
+    def __init__(self, window=LATENCY_WINDOW):
+        """Counters and latencies of the calls answered by the server
+
+        Only updated from the event loop thread, so no locking is needed.
+
+        Args:
+            window: Number of recent calls kept for percentiles and the recent rate
+        """
+        self.started = time.monotonic()
+        self.http_requests = 0
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.solver_runs = 0
+        self.solver_seconds = 0.0
+        self.latencies = collections.deque(maxlen=window)  # Seconds per call
+        self.finished = collections.deque(maxlen=window)  # Completion times of the recent calls
+
+    def observe(self, seconds, error=False):
+        """Record a finished call"""
+        self.calls += 1
+        if error:
+            self.errors += 1
+        self.latencies.append(seconds)
+        self.finished.append(time.monotonic())
+
+    def to_dict(self):
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+        recent_rate = 0.0
+        if len(self.finished) > 1 and self.finished[-1] > self.finished[0]:
+            recent_rate = (len(self.finished) - 1) / (self.finished[-1] - self.finished[0])
+        return {
+            'uptime_s': uptime,
+            'http_requests': self.http_requests,
+            'calls': self.calls,
+            'errors': self.errors,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'solver_runs': self.solver_runs,
+            'solver_s': self.solver_seconds,
+            'calls_per_s': self.calls / uptime if uptime else 0.0,
+            'recent_calls_per_s': recent_rate,
+            'latency_ms': {
+                'mean': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                'p50': percentile(latencies, 0.50) * 1000,
+                'p95': percentile(latencies, 0.95) * 1000,
+                'p99': percentile(latencies, 0.99) * 1000,
+                'max': latencies[-1] * 1000 if latencies else 0.0
+            }
+        }
+
+
+class RouteService:
+    def __init__(self, graph, executor, cache_size=DEFAULT_CACHE_SIZE):
+        """Answer shortest path calls on a loaded graph
+
+        Searches run in the executor, so the event loop keeps serving other
+        connections meanwhile. Identical queries arriving while a search is
+        running wait for that search instead of starting another one, and
+        recent results are kept in an LRU cache.
+
+        Args:
+            graph: Graph or GridGraph to query, never modified
+            executor: concurrent.futures executor running the searches
+            cache_size: Maximum number of cached results (0 disables the cache)
+        """
+        self.graph = graph
+        self.executor = executor
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()  # (source id, target id) -> result, oldest first
+        self.in_flight = {}  # (source id, target id) -> future of the running search
+        self.metrics = ServerMetrics()
+
+        self.methods = {
+            'shortest_path': self.shortest_path,
+            'sample_nodes': self.sample_nodes,
+            'metrics': self.get_metrics
+        }
+
+    async def call(self, method, params):
+        """Run a JSON-RPC method with its params (object or array)"""
+        function = self.methods.get(method)
+        if function is None:
+            raise RpcError(METHOD_NOT_FOUND, f"Unknown method {method!r}")
+        if params is not None and not isinstance(params, (dict, list)):
+            raise RpcError(INVALID_PARAMS, "params must be an object or an array")
+        try:
+            if isinstance(params, dict):
+                return await function(**params)
+            return await function(*(params or []))
+        except TypeError as error:
+            raise RpcError(INVALID_PARAMS, str(error))
+
+    def _node_id(self, node):
+        node_id = resolve(self.graph, node)
+        if node_id is None:
+            raise RpcError(UNKNOWN_NODE, f"Unknown node {node!r}")
+        return node_id
+
+    async def shortest_path(self, source, target):
+        """Distance and path from source to target"""
+        key = (self._node_id(source), self._node_id(target))
+
+        result = self.cache.get(key)
+        if result is not None:
+            self.cache.move_to_end(key)
+            self.metrics.cache_hits += 1
+            return result
+
+        future = self.in_flight.get(key)
+        if future is not None:
+            self.metrics.coalesced += 1
+        else:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self._solve, *key)
+            future.add_done_callback(lambda done: self._search_finished(key, done))
+            self.in_flight[key] = future
+        # Shielded, so a client going away does not cancel a search others wait for
+        result, _ = await asyncio.shield(future)
+        return result
+
+    def _solve(self, source_id, target_id):
+        """Search run in the executor; returns (result, seconds)"""
+        start = time.perf_counter()
+        dist, pred, settled = shortest_path_tree(self.graph, source_id, target_id)
+        distance = dist[target_id]
+        reachable = distance != float('inf')
+        result = {
+            'distance': distance if reachable else None,
+            'path': self.graph.get_labels(path_ids(pred, target_id)) if reachable else [],
+            'settled': settled
+        }
+        return result, time.perf_counter() - start
+
+    def _search_finished(self, key, future):
+        """Cache the result of a search, on the event loop thread"""
+        self.in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        result, seconds = future.result()
+        self.metrics.solver_runs += 1
+        self.metrics.solver_seconds += seconds
+        if self.cache_size:
+            self.cache[key] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    async def sample_nodes(self, count=10, seed=None):
+        """Labels of count random nodes, to build test queries"""
+        node_count = self.graph.get_node_count()
+        ids = random.Random(seed).sample(range(node_count), min(count, node_count))
+        return self.graph.get_labels(ids)
+
+    async def get_metrics(self):
+        """Server metrics, also served on GET /metrics"""
+        metrics = self.metrics.to_dict()
+        metrics.update({
+            'nodes': self.graph.get_node_count(),
+            'cache_size': len(self.cache),
+            'in_flight': len(self.in_flight)
+        })
+        return metrics
+
+
+class RouteServer:
+    def __init__(self, service):
+        """HTTP front end of a RouteService
+
+        POST /rpc takes a JSON-RPC 2.0 request or batch, GET /metrics returns
+        the metrics and GET /health answers when the server is up.
+        Connections are kept alive between requests.
+        """
+        self.service = service
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    message = await read_message(reader)
+                except HttpError as error:
+                    writer.write(format_response(error.status, {'error': str(error)}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if message is None:
+                    break
+
+                start_line, headers, body = message
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                status, payload = await self.handle_request(start_line, body)
+                self.service.metrics.http_requests += 1
+                writer.write(format_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, start_line, body):
+        """(status, JSON payload) of one HTTP request"""
+        parts = start_line.split()
+        if len(parts) != 3:
+            return 400, {'error': "Malformed request line"}
+        method, path, _ = parts
+        path = path.split('?', 1)[0]
+
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/metrics':
+            if method != 'GET':
+                return 405, {'error': "Use GET"}
+            return 200, await self.service.get_metrics()
+        if path != '/rpc':
+            return 404, {'error': f"No route {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST"}
+
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return 200, rpc_error(None, PARSE_ERROR, "Parse error")
+        if isinstance(request, list):
+            if not request:
+                return 200, rpc_error(None, INVALID_REQUEST, "Empty batch")
+            responses = await asyncio.gather(*(self.handle_call(call) for call in request))
+            responses = [response for response in responses if response is not None]
+            return (200, responses) if responses else (204, None)
+        response = await self.handle_call(request)
+        return (200, response) if response is not None else (204, None)
+
+    async def handle_call(self, call):
+        """JSON-RPC response object of one call (None for notifications)"""
+        if not isinstance(call, dict) or not isinstance(call.get('method'), str):
+            return rpc_error(None, INVALID_REQUEST, "Invalid request")
+        call_id = call.get('id')
+
+        start = time.perf_counter()
+        try:
+            result = await self.service.call(call['method'], call.get('params'))
+        except RpcError as error:
+            self.service.metrics.observe(time.perf_counter() - start, error=True)
+            response = rpc_error(call_id, error.code, error.message)
+        except Exception as error:
+            self.service.metrics.observe(time.perf_counter() - start, error=True)
+            response = rpc_error(call_id, INTERNAL_ERROR, f"{type(error).__name__}: {error}")
+        else:
+            self.service.metrics.observe(time.perf_counter() - start)
+            response = {'jsonrpc': '2.0', 'id': call_id, 'result': result}
+        return response if 'id' in call else None
+
+
+def rpc_error(call_id, code, message):
+    return {'jsonrpc': '2.0', 'id': call_id, 'error': {'code': code, 'message': message}}
+
+
+async def serve(graph, host='127.0.0.1', port=DEFAULT_PORT, workers=2, cache_size=DEFAULT_CACHE_SIZE):
+    """Serve route queries on a graph until cancelled"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        server = RouteServer(RouteService(graph, executor, cache_size))
+        listener = await asyncio.start_server(server.handle_connection, host, port)
+        print(f"Serving {graph.get_node_count()} nodes on http://{host}:{port}", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve shortest path queries over HTTP/JSON-RPC")
+    parser.add_argument('--snapshot', help="load the graph from a snapshot file written by generators.py")
+    parser.add_argument('--edges', help="load the graph from a 'start end [weight]' edge list")
+    parser.add_argument('--undirected', action='store_true', help="edge list edges go both ways")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument('--workers', type=int, default=2, help="threads running searches")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="number of results kept in the LRU cache (0 disables it)")
+    args = parser.parse_args(argv)
+
+    graph = load_graph(args.snapshot, args.edges, args.undirected)
+    try:
+        asyncio.run(serve(graph, args.host, args.port, args.workers, args.cache_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import pygame
+
+class Slider:
+    def __init__(self, rect, min_value=0, max_value=0, font_size=16):
+        """Initialize a horizontal slider selecting an integer value
+
+        Args:
+            rect: A rectangle (x, y, width, height) for the slider track
+            min_value: Smallest selectable value
+            max_value: Largest selectable value
+            font_size: Size of the font for the value label
+        """
+        self.rect = pygame.Rect(rect)
+        self.min_value = min_value
+        self.max_value = max_value
+        self.value = min_value
+        self.font = pygame.font.SysFont('Arial', font_size)
+
+        # Colors
+        self.colors = {
+            'track': (200, 200, 220),
+            'fill': (100, 100, 200),
+            'handle': (50, 50, 150),
+            'text': (0, 0, 0),
+            'disabled': (150, 150, 150)
+        }
+
+        self.handle_radius = self.rect.height // 2 + 2
+        self.is_dragging = False
+        self.is_enabled = True
+
+    def enable(self):
+        """Enable the slider"""
+        self.is_enabled = True
+
+    def disable(self):
+        """Disable the slider"""
+        self.is_enabled = False
+        self.is_dragging = False
+
+    def set_range(self, min_value, max_value):
+        """Change the selectable range, keeping the value inside it"""
+        self.min_value = min_value
+        self.max_value = max(min_value, max_value)
+        self.value = max(self.min_value, min(self.max_value, self.value))
+
+    def handle_event(self, event):
+        """Update slider state from a pygame mouse event
+
+        Args:
+            event: Pygame event (MOUSEMOTION, MOUSEBUTTONDOWN or MOUSEBUTTONUP)
+
+        Returns:
+            The new value when the event moved the handle to a different value, else None
+        """
+        if not self.is_enabled:
+            return None
+
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            hit_rect = self.rect.inflate(self.handle_radius * 2, self.handle_radius * 2)
+            if not hit_rect.collidepoint(event.pos):
+                return None
+            self.is_dragging = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.is_dragging = False
+            return None
+        elif event.type != pygame.MOUSEMOTION or not self.is_dragging:
+            return None
+
+        value = self._value_at(event.pos[0])
+        if value != self.value:
+            self.value = value
+            return value
+        return None
+
+    def _value_at(self, x):
+        """Convert an x coordinate on the track into a value"""
+        if self.max_value == self.min_value:
+            return self.min_value
+        fraction = (x - self.rect.x) / max(1, self.rect.width)
+        fraction = max(0.0, min(1.0, fraction))
+        return self.min_value + round(fraction * (self.max_value - self.min_value))
+
+    def _handle_x(self):
+        """X coordinate of the handle for the current value"""
+        if self.max_value == self.min_value:
+            return self.rect.x
+        fraction = (self.value - self.min_value) / (self.max_value - self.min_value)
+        return self.rect.x + fraction * self.rect.width
+
+    def draw(self, screen, label=None):
+        """Draw the slider on the screen
+
+        Args:
+            screen: Pygame screen to draw on
+            label: Optional text drawn above the track
+        """
+        handle_x = self._handle_x()
+        fill_color = self.colors['fill'] if self.is_enabled else self.colors['disabled']
+        handle_color = self.colors['handle'] if self.is_enabled else self.colors['disabled']
+
+        # Draw track and the filled part up to the handle
+        pygame.draw.rect(screen, self.colors['track'], self.rect, border_radius=3)
+        filled = pygame.Rect(self.rect.x, self.rect.y, handle_x - self.rect.x, self.rect.height)
+        pygame.draw.rect(screen, fill_color, filled, border_radius=3)
+
+        # Draw handle
+        pygame.draw.circle(screen, handle_color, (handle_x, self.rect.centery), self.handle_radius)
+
+        # Draw label above the track
+        if label:
+            text_surf = self.font.render(label, True, self.colors['text'])
+            text_rect = text_surf.get_rect(centerx=self.rect.centerx, bottom=self.rect.y - 6)
+            screen.blit(text_surf, text_rect)
@@ -0,0 +1,315 @@
+import json
+import struct
+
+import numpy as np
+
+from graph import Graph
+from grid import GridGraph
+
+# File layout (little endian):
+#   header   HEADER struct, padded to ALIGNMENT bytes
+#   sections raw arrays, each starting at a multiple of ALIGNMENT, so they can
+#            be memory mapped directly
+#
+# Adjacency lists are stored in CSR form: the edges of node i are
+# targets[offsets[i]:offsets[i + 1]] with the matching weights. Nodes are
+# numbered 0..node_count-1; the labels section maps them back to labels.
+# Grids store their cells instead of edges.
+MAGIC = b'DJGS'
+VERSION = 1
+ALIGNMENT = 64
+
+KIND_CSR = 0
+KIND_GRID = 1
+
+# Flags
+FLAG_INT_WEIGHTS = 1  # weights are int64 instead of float64
+FLAG_WIDE_TARGETS = 2  # targets are int64 instead of int32
+FLAG_POSITIONS = 4  # positions section present
+FLAG_LABELS = 8  # labels section present, otherwise node i is labeled i
+
+# Sections, in file order
+SECTIONS = ['offsets', 'targets', 'weights', 'positions', 'labels', 'cells']
+
+# magic, version, kind, flags, node count, edge count, grid width, grid height,
+# then (offset, length) in bytes of every section
+HEADER = struct.Struct('<4sBBHQQII' + 'QQ' * len(SECTIONS))
+
+
+def _aligned(position):
+    """Round position up to the next multiple of ALIGNMENT"""
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _section_layout(lengths):
+    """Place the sections in the file
+
+    Args:
+        lengths: {section: length in bytes}; missing sections are absent
+
+    Returns:
+        (layout, size): flat list of (offset, length) of every section, as
+        stored in the header, and the size of the file
+    """
+    layout = []
+    position = _aligned(HEADER.size)
+    for name in SECTIONS:
+        length = lengths.get(name, 0)
+        layout.extend((position if length else 0, length))
+        if length:
+            position = _aligned(position + length)
+    return layout, position
+
+
+def _write_sections(file, kind, flags, node_count, edge_count, width, height, arrays):
+    """Write the header followed by the given {section: bytes-like} arrays"""
+    layout, position = _section_layout({name: len(memoryview(data).cast('B'))
+                                        for name, data in arrays.items() if data is not None})
+
+    file.write(HEADER.pack(MAGIC, VERSION, kind, flags, node_count, edge_count, width, height, *layout))
+    for index, name in enumerate(SECTIONS):
+        offset, length = layout[2 * index], layout[2 * index + 1]
+        if length:
+            file.seek(offset)
+            file.write(arrays[name])
+    # Pad the file to the end of the last section
+    file.truncate(position)
+
+
+def save_snapshot(path, graph):
+    """Write a Graph or GridGraph to a snapshot file
+
+    Labels of a Graph must be strings or integers, unless they already are
+    0..n-1 in order.
+    """
+    with open(path, 'wb') as file:
+        if isinstance(graph, GridGraph):
+            _write_sections(file, KIND_GRID, 0, graph.width * graph.height, 0,
+                            graph.width, graph.height, {'cells': graph.cells})
+            return
+
+        # Graph ids become the snapshot node numbers
+        labels = list(graph.get_nodes())
+        node_count = len(labels)
+
+        offsets = np.zeros(node_count + 1, dtype=np.int64)
+        targets = []
+        weights = []
+        for index in range(node_count):
+            neighbors = graph.get_id_neighbors(index)
+            offsets[index + 1] = offsets[index] + len(neighbors)
+            for neighbor, weight in neighbors:
+                targets.append(neighbor)
+                weights.append(weight)
+
+        flags = 0
+        wide = node_count > np.iinfo(np.int32).max
+        if wide:
+            flags |= FLAG_WIDE_TARGETS
+        if all(isinstance(weight, int) for weight in weights):
+            flags |= FLAG_INT_WEIGHTS
+        arrays = {
+            'offsets': offsets,
+            'targets': np.array(targets, dtype=np.int64 if wide else np.int32),
+            'weights': np.array(weights, dtype=np.int64 if flags & FLAG_INT_WEIGHTS else np.float64)
+        }
+
+        if graph.node_positions:
+            flags |= FLAG_POSITIONS
+            positions = np.full((node_count, 2), np.nan)
+            for label, position in graph.node_positions.items():
+                if graph.has_node(label):
+                    positions[graph.get_id(label)] = position
+            arrays['positions'] = positions
+
+        if labels != list(range(node_count)):
+            for label in labels:
+                if not isinstance(label, (str, int)):
+                    raise ValueError(f"Cannot store node label {label!r} in a snapshot")
+            flags |= FLAG_LABELS
+            arrays['labels'] = json.dumps(labels).encode('utf-8')
+
+        _write_sections(file, KIND_CSR, flags, node_count, len(targets), 0, 0, arrays)
+
+
+def save_csr_snapshot(path, offsets, targets, weights, positions=None):
+    """Write CSR arrays to a snapshot file, without building a Graph
+
+    Nodes are labeled with their numbers.
+
+    Args:
+        path: Snapshot file to write
+        offsets: node_count + 1 edge offsets
+        targets: Target node of every edge
+        weights: Weight of every edge; integer arrays are stored as int64
+        positions: Optional (node_count, 2) array of node positions
+    """
+    node_count = len(offsets) - 1
+    flags = 0
+    wide = node_count > np.iinfo(np.int32).max
+    if wide:
+        flags |= FLAG_WIDE_TARGETS
+    int_weights = np.issubdtype(np.asarray(weights).dtype, np.integer)
+    if int_weights:
+        flags |= FLAG_INT_WEIGHTS
+    arrays = {
+        'offsets': np.ascontiguousarray(offsets, dtype=np.int64),
+        'targets': np.ascontiguousarray(targets, dtype=np.int64 if wide else np.int32),
+        'weights': np.ascontiguousarray(weights, dtype=np.int64 if int_weights else np.float64)
+    }
+    if positions is not None:
+        flags |= FLAG_POSITIONS
+        arrays['positions'] = np.ascontiguousarray(positions, dtype=np.float64)
+    with open(path, 'wb') as file:
+        _write_sections(file, KIND_CSR, flags, node_count, len(targets), 0, 0, arrays)
+
+
+def write_csr_snapshot(path, node_count, edge_count, chunks, int_weights=True):
+    """Write a CSR snapshot from chunks of consecutive nodes
+
+    The sections are filled through memory maps of the file, so only one
+    chunk is in memory at a time and graphs larger than the memory can be
+    written. Nodes are labeled with their numbers.
+
+    Args:
+        path: Snapshot file to write
+        node_count: Total number of nodes
+        edge_count: Total number of edges
+        chunks: Iterable of (degrees, targets, weights) arrays: the out-degree
+                of each of the next nodes, then their edges in node order
+        int_weights: Store the weights as int64 instead of float64
+    """
+    flags = FLAG_INT_WEIGHTS if int_weights else 0
+    if node_count > np.iinfo(np.int32).max:
+        flags |= FLAG_WIDE_TARGETS
+    header = {'flags': flags}
+    lengths = {name: count * np.dtype(section_dtype(header, name)).itemsize
+               for name, count in (('offsets', node_count + 1), ('targets', edge_count), ('weights', edge_count))}
+    layout, size = _section_layout(lengths)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, KIND_CSR, flags, node_count, edge_count, 0, 0, *layout))
+        file.truncate(size)
+
+    def mapped(name, count):
+        index = SECTIONS.index(name)
+        if not count:
+            return np.zeros(0, dtype=section_dtype(header, name))
+        return np.memmap(path, dtype=section_dtype(header, name), mode='r+',
+                         offset=layout[2 * index], shape=(count,))
+
+    offsets = mapped('offsets', node_count + 1)
+    targets = mapped('targets', edge_count)
+    weights = mapped('weights', edge_count)
+    node = edge = 0
+    offsets[0] = 0
+    for degrees, chunk_targets, chunk_weights in chunks:
+        count = len(degrees)
+        ends = np.cumsum(degrees, dtype=np.int64)
+        chunk_edges = int(ends[-1]) if count else 0
+        if chunk_edges != len(chunk_targets) or chunk_edges != len(chunk_weights):
+            raise ValueError(f"Chunk degrees add up to {chunk_edges} edges, "
+                             f"got {len(chunk_targets)} targets and {len(chunk_weights)} weights")
+        if node + count > node_count or edge + len(chunk_targets) > edge_count:
+            raise ValueError("More nodes or edges than declared")
+        offsets[node + 1:node + 1 + count] = edge + ends
+        targets[edge:edge + len(chunk_targets)] = chunk_targets
+        weights[edge:edge + len(chunk_weights)] = chunk_weights
+        node += count
+        edge += len(chunk_targets)
+    if node != node_count or edge != edge_count:
+        raise ValueError(f"Wrote {node} nodes and {edge} edges, declared {node_count} and {edge_count}")
+    for array in (offsets, targets, weights):
+        if isinstance(array, np.memmap):
+            array.flush()
+
+
+def read_header(file):
+    """Read the header of an open snapshot file
+
+    Returns:
+        Dictionary with kind, flags, node_count, edge_count, width, height and
+        sections mapping every present section to (offset, length)
+    """
+    data = file.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Not a graph snapshot: file too short")
+    values = HEADER.unpack(data)
+    magic, version, kind, flags, node_count, edge_count, width, height = values[:8]
+    if magic != MAGIC:
+        raise ValueError("Not a graph snapshot: bad magic")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+
+    sections = {}
+    for index, name in enumerate(SECTIONS):
+        offset, length = values[8 + 2 * index], values[9 + 2 * index]
+        if length:
+            sections[name] = (offset, length)
+    return {
+        'kind': kind,
+        'flags': flags,
+        'node_count': node_count,
+        'edge_count': edge_count,
+        'width': width,
+        'height': height,
+        'sections': sections
+    }
+
+
+def section_dtype(header, name):
+    """Numpy dtype of a section"""
+    flags = header['flags']
+    if name == 'offsets':
+        return np.int64
+    if name == 'targets':
+        return np.int64 if flags & FLAG_WIDE_TARGETS else np.int32
+    if name == 'weights':
+        return np.int64 if flags & FLAG_INT_WEIGHTS else np.float64
+    if name == 'positions':
+        return np.float64
+    return np.uint8
+
+
+def _read_section(file, header, name, required=False):
+    """Read a section as a numpy array
+
+    Absent sections are None, or an empty array when required: the edge
+    sections of a graph without edges are not written.
+    """
+    if name not in header['sections']:
+        return np.zeros(0, dtype=section_dtype(header, name)) if required else None
+    offset, length = header['sections'][name]
+    file.seek(offset)
+    return np.frombuffer(file.read(length), dtype=section_dtype(header, name))
+
+
+def load_snapshot(path):
+    """Load a snapshot file as a Graph or GridGraph"""
+    with open(path, 'rb') as file:
+        header = read_header(file)
+        if header['kind'] == KIND_GRID:
+            grid = GridGraph(header['width'], header['height'])
+            grid.cells = bytearray(_read_section(file, header, 'cells').tobytes())
+            grid.version += 1
+            return grid
+
+        offsets = _read_section(file, header, 'offsets', required=True).tolist()
+        targets = _read_section(file, header, 'targets', required=True).tolist()
+        weights = _read_section(file, header, 'weights', required=True).tolist()
+        positions = _read_section(file, header, 'positions')
+        labels = _read_section(file, header, 'labels')
+
+    if labels is not None:
+        labels = json.loads(labels.tobytes().decode('utf-8'))
+    else:
+        labels = range(header['node_count'])
+
+    # Snapshot node numbers become the graph ids
+    neighbors = [list(zip(targets[offsets[index]:offsets[index + 1]], weights[offsets[index]:offsets[index + 1]]))
+                 for index in range(len(labels))]
+    node_positions = {}
+    if positions is not None:
+        for label, (x, y) in zip(labels, positions.reshape(-1, 2).tolist()):
+            if x == x:  # NaN marks nodes without a position
+                node_positions[label] = (x, y)
+    return Graph.from_adjacency(labels, neighbors, node_positions)
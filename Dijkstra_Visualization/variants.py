@@ -0,0 +1,193 @@
+import heapq
+import math
+
+import numpy as np
+
+from dijkstra import DijkstraAlgorithm, NO_NODE, path_ids
+from grid import GridGraph
+from queries import reverse_adjacency
+
+# Variants of DijkstraAlgorithm with the same step interface, so they can be
+# shown and compared side by side (see race.py).
+
+
+def distance_lower_bounds(graph, target_id):
+    """Consistent lower bounds on the distance from every node id to a target
+
+    Grids use the Manhattan distance times the smallest cell cost. Graphs
+    use the straight-line distance between node positions times the
+    smallest ratio of edge weight to edge length, so no edge is shorter
+    than its bound says.
+
+    Returns:
+        List indexed by node id, or None when the graph gives no useful
+        bound (nodes without a position, zero-weight edges)
+    """
+    if isinstance(graph, GridGraph):
+        min_cost = (min(graph.cells) >> 4) + 1  # The cost is the high nibble
+        rows, columns = np.divmod(np.arange(graph.get_node_count()), graph.width)
+        target_row, target_column = divmod(target_id, graph.width)
+        return (min_cost * (np.abs(rows - target_row) + np.abs(columns - target_column))).tolist()
+
+    positions = graph.node_positions
+    labels = graph.get_label_sequence()
+    if any(label not in positions for label in labels):
+        return None
+    points = [positions[label] for label in labels]
+
+    scale = float('inf')
+    for node in range(len(points)):
+        x, y = points[node]
+        for neighbor, weight in graph.get_id_neighbors(node):
+            length = math.hypot(points[neighbor][0] - x, points[neighbor][1] - y)
+            if length > 0:
+                scale = min(scale, weight / length)
+    if not 0 < scale < float('inf'):
+        return None
+
+    target_x, target_y = points[target_id]
+    return [scale * math.hypot(x - target_x, y - target_y) for x, y in points]
+
+
+class AStarAlgorithm(DijkstraAlgorithm):
+    """A*: Dijkstra's algorithm ordered by distance plus a lower bound on the distance left
+
+    The bounds come from distance_lower_bounds; without them (or without an
+    end node) it runs exactly like Dijkstra's algorithm.
+    """
+    name = "A*"
+
+    def _compute_potential(self):
+        if self.end_id == NO_NODE:
+            return None
+        return distance_lower_bounds(self.graph, self.end_id)
+
+
+class BidirectionalDijkstra(DijkstraAlgorithm):
+    """Dijkstra's algorithm from the start and, on reversed edges, from the end
+
+    Every step settles one node of the side whose queue has the smaller
+    key. The best path found through a node reached by both sides is kept,
+    and the search stops once the two queue keys add up to at least its
+    length. dist, pred and priority_queue hold the forward search, the
+    backward one is in backward_dist, backward_next and backward_queue;
+    settle_order and settled cover both (a node is never settled by both).
+
+    The backward changes are not in the forward state, so this algorithm
+    cannot be recorded by StepHistory or TraceRecorder.
+    """
+    name = "Bidirectional"
+    recordable = False
+
+    def initialize(self, start_node, end_node):
+        super().initialize(start_node, end_node)
+        node_count = self.graph.get_node_count()
+        self.reverse = reverse_adjacency(self.graph)
+        self.backward_dist = [float('inf')] * node_count
+        self.backward_next = [NO_NODE] * node_count
+        self.backward_queue = []
+        self.best_distance = float('inf')  # Length of the best path found so far
+        self.meeting_id = NO_NODE  # Node where that path goes from one side to the other
+        if self.end_id != NO_NODE:
+            self.backward_dist[self.end_id] = 0
+            heapq.heappush(self.backward_queue, (0, self.end_id))
+            if self.end_id == self.start_id:
+                self.best_distance = 0
+                self.meeting_id = self.start_id
+        self.logs.append("Searching backward from the end node at the same time")
+
+    def _execute_step(self, listeners):
+        """Settle one node on the side with the smaller queue key"""
+        if self.end_id == NO_NODE:
+            # Without an end node there is nothing to search backward from
+            super()._execute_step(listeners)
+            return
+
+        settled = self.settled
+        labels = self.graph.get_label_sequence()
+        while True:
+            self.step_count += 1
+            self.testing_ids = []
+            forward_key = self.priority_queue[0][0] if self.priority_queue else float('inf')
+            backward_key = self.backward_queue[0][0] if self.backward_queue else float('inf')
+
+            # Every path not found yet is longer than the two smallest keys
+            if forward_key + backward_key >= self.best_distance or not (self.priority_queue and self.backward_queue):
+                self.logs.append("The two searches met. Algorithm complete.")
+                self.finished = True
+                self._reconstruct_path()
+                return
+
+            forward = forward_key <= backward_key
+            queue = self.priority_queue if forward else self.backward_queue
+            current_distance, node = heapq.heappop(queue)
+            self.current_id = node
+            if listeners:
+                for listener in listeners:
+                    listener.node_popped(current_distance, node)
+            if settled[node]:
+                self.logs.append(f"Node {labels[node]} has already been visited. Skipping.")
+                continue
+            break
+
+        settled[node] = 1
+        self.settle_order.append(node)
+        if listeners:
+            for listener in listeners:
+                listener.node_settled(node)
+
+        if forward:
+            dist, pred, other_dist = self.dist, self.pred, self.backward_dist
+            edges = self.graph.get_id_neighbors(node)
+        else:
+            dist, pred, other_dist = self.backward_dist, self.backward_next, self.dist
+            edges = self.reverse[node]
+        side = "forward" if forward else "backward"
+        self.logs.append(f"Step {self.step_count}: Processing node {labels[node]} ({side}) "
+                         f"with distance {current_distance}")
+
+        testing = self.testing_ids
+        for neighbor, weight in edges:
+            # Tested edges are stored in graph direction
+            testing.append((node, neighbor) if forward else (neighbor, node))
+            new_distance = current_distance + weight
+            improved = new_distance < dist[neighbor]
+            if listeners:
+                for listener in listeners:
+                    listener.edge_relaxed(node, neighbor, new_distance, improved, dist[neighbor], pred[neighbor])
+            if improved:
+                dist[neighbor] = new_distance
+                pred[neighbor] = node
+                heapq.heappush(queue, (new_distance, neighbor))
+            if new_distance + other_dist[neighbor] < self.best_distance:
+                self.best_distance = new_distance + other_dist[neighbor]
+                self.meeting_id = neighbor
+                self.logs.append(f"Searches meet at {labels[neighbor]}: path of length {self.best_distance}")
+
+    def _reconstruct_path(self):
+        """Join the forward path to the meeting node with the backward path from it"""
+        if self.end_id == NO_NODE:
+            super()._reconstruct_path()
+            return
+        if self.meeting_id == NO_NODE:
+            self.logs.append(f"No path exists from {self.start_node} to {self.end_node}")
+            return
+
+        path = path_ids(self.pred, self.meeting_id)
+        node = self.meeting_id
+        while node != self.end_id:
+            following = self.backward_next[node]
+            # Link the backward part into the forward state, so the
+            # distances and predecessors views show the whole path
+            self.pred[following] = node
+            path.append(following)
+            node = following
+        self.dist[self.end_id] = self.best_distance
+
+        self.path = self.graph.get_labels(path)
+        self.logs.append(f"Shortest path: {' -> '.join(str(node) for node in self.path)}")
+        self.logs.append(f"Total distance: {self.best_distance}")
+
+
+# Algorithms raced against each other by default, in pane order
+VARIANTS = [DijkstraAlgorithm, AStarAlgorithm, BidirectionalDijkstra]
@@ -0,0 +1,123 @@
+import queue
+import threading
+
+# Steps executed per lock acquisition when running straight to the end
+RUN_TO_END_CHUNK = 1024
+
+
+class AlgorithmWorker:
+    def __init__(self, algorithm, lock=None, step_delay=0.0, steps_per_batch=1,
+                 queue_size=2):
+        """Run algorithm steps on a background thread
+
+        Step results are published through a bounded queue. When the consumer
+        falls behind, the worker blocks on the full queue (back-pressure)
+        instead of piling up states in memory. Several steps can be executed
+        as one batch, in which case only the state after the last step of the
+        batch is published.
+
+        Args:
+            algorithm: Initialized algorithm instance with a run_steps() method
+            lock: Lock held while a step is executed, so readers can take a
+                  consistent look at the algorithm state between steps
+            step_delay: Seconds to wait between batches
+            steps_per_batch: Number of steps per published state, None runs
+                             to the end and publishes only the final state
+            queue_size: Maximum number of unconsumed step results
+        """
+        self.algorithm = algorithm
+        self.lock = lock if lock is not None else threading.Lock()
+        self.step_delay = step_delay
+        self.steps_per_batch = steps_per_batch
+        self.results = queue.Queue(maxsize=queue_size)
+
+        self._resume = threading.Event()
+        self._resume.set()
+        self._cancel = threading.Event()
+        self._thread = None
+        self.done = False
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    def set_speed(self, step_delay, steps_per_batch):
+        """Change the pace of the worker, effective from the next batch"""
+        self.step_delay = step_delay
+        self.steps_per_batch = steps_per_batch
+
+    def start(self):
+        """Start executing steps on the worker thread"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def pause(self):
+        """Pause after the step that is currently executing"""
+        self._resume.clear()
+
+    def resume(self):
+        """Continue executing steps"""
+        self._resume.set()
+
+    def cancel(self):
+        """Stop the worker and wait for the thread to finish"""
+        self._cancel.set()
+        self._resume.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.done = True
+
+    def poll(self):
+        """Return all published step results without blocking (oldest first)"""
+        states = []
+        while True:
+            try:
+                states.append(self.results.get_nowait())
+            except queue.Empty:
+                return states
+
+    def exhausted(self):
+        """True when the worker stopped and every result has been consumed"""
+        return self.done and self.results.empty()
+
+    def _run(self):
+        """Worker thread loop"""
+        try:
+            while not self._cancel.is_set():
+                self._resume.wait()
+                if self._cancel.is_set():
+                    break
+
+                steps_per_batch = self.steps_per_batch
+                with self.lock:
+                    if steps_per_batch is None:
+                        state = self.algorithm.run_steps(RUN_TO_END_CHUNK)
+                    else:
+                        state = self.algorithm.run_steps(steps_per_batch)
+                if state is None:
+                    break
+                if steps_per_batch is None and not state.get('finished', False):
+                    continue
+                if not self._publish(state):
+                    break
+                if state.get('finished', False):
+                    break
+
+                if self.step_delay:
+                    self._cancel.wait(self.step_delay)
+        finally:
+            self.done = True
+
+    def _publish(self, state):
+        """Put a state on the queue, waiting while it is full
+
+        Returns:
+            False if the worker was cancelled before the state was queued
+        """
+        while not self._cancel.is_set():
+            try:
+                self.results.put(state, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False